@@ -1,5 +1,5 @@
 import {useModel, useModelState} from "@anywidget/react";
-import {Col, Form, Input, InputNumber, Progress, Radio, Row, Select} from "antd";
+import {Col, Form, Input, InputNumber, Progress, Radio, Row, Select, Space, Table} from "antd";
 import {CheckboxChangeEvent} from "antd/es/checkbox";
 import React, {ChangeEvent} from "react";
 import {FormattedMessage, useIntl} from "react-intl";
@@ -9,9 +9,51 @@ interface AcqRunProgress {
   total: number;
 }
 
+interface AcqPhaseStats {
+  count: number;
+  mean: number;
+  p50: number;
+  p95: number;
+  p99: number;
+  max: number;
+}
+
+interface AcqPerfStats {
+  traces: number;
+  traces_per_second: number;
+  recent_traces_per_second: number;
+  bytes_per_second: number;
+  recent_bytes_per_second: number;
+  phases: Record<string, AcqPhaseStats>;
+}
+
+interface AcqOnlineCpa {
+  trace_count: number;
+  byte_indexes: number[];
+  best_guesses: number[];
+  best_correlations: number[];
+  key_ranks: number[] | null;
+  key_recovered: boolean;
+}
+
+const formatMs = (seconds: number) => (seconds * 1000).toFixed(3);
+
+const formatBytesPerSecond = (bytesPerSecond: number) => {
+  const units = ["B/s", "KB/s", "MB/s", "GB/s"];
+  let value = bytesPerSecond;
+  let unit = 0;
+  while (value >= 1024 && unit < units.length - 1) {
+    value /= 1024;
+    unit++;
+  }
+  return value.toFixed(2) + " " + units[unit];
+};
+
 const AcquisitionPanel: React.FC = () => {
   const [acqStatus] = useModelState<number>("acq_status"); // 0 停止 1 测试 2 运行
   const [acqRunProgress] = useModelState<AcqRunProgress>("acq_run_progress"); //{'finished': 1, total: 1000}
+  const [acqPerfStats] = useModelState<AcqPerfStats>("acq_perf_stats");
+  const [acqOnlineCpa] = useModelState<AcqOnlineCpa>("acq_online_cpa");
   const [traceCount, setTraceCount] = useModelState<number>("trace_count");
   // const [sampleOffset, setSampleOffset] = useModelState<number>("sample_offset");
   // const [sampleLength, setSampleLength] = useModelState<number>("sample_length");
@@ -198,6 +240,61 @@ const AcquisitionPanel: React.FC = () => {
           </Form>
         </Col>
       </Row>
+      {acqOnlineCpa?.best_guesses && (
+        <Row>
+          <Col span={24}>
+            <Space size={"large"} wrap>
+              <span>
+                {intl.formatMessage({id: "acquisition.onlineCpa.traceCount"})}: {acqOnlineCpa.trace_count}
+              </span>
+              <span>
+                {intl.formatMessage({id: "acquisition.onlineCpa.bestGuess"})}:{" "}
+                <code>{acqOnlineCpa.best_guesses.map((g) => g.toString(16).padStart(2, "0")).join(" ")}</code>
+              </span>
+              {acqOnlineCpa.key_ranks && (
+                <span>
+                  {intl.formatMessage({id: "acquisition.onlineCpa.keyRank"})}:{" "}
+                  <code>{acqOnlineCpa.key_ranks.join(" ")}</code>
+                </span>
+              )}
+              {acqOnlineCpa.key_recovered && (
+                <span style={{color: "#52c41a"}}>{intl.formatMessage({id: "acquisition.onlineCpa.keyRecovered"})}</span>
+              )}
+            </Space>
+          </Col>
+        </Row>
+      )}
+      {acqPerfStats?.phases && Object.keys(acqPerfStats.phases).length > 0 && (
+        <Row>
+          <Col span={24}>
+            <Space size={"large"}>
+              <span>
+                {intl.formatMessage({id: "acquisition.perf.tracesPerSecond"})}:{" "}
+                {acqPerfStats.recent_traces_per_second.toFixed(2)} ({acqPerfStats.traces_per_second.toFixed(2)})
+              </span>
+              <span>
+                {intl.formatMessage({id: "acquisition.perf.bytesPerSecond"})}:{" "}
+                {formatBytesPerSecond(acqPerfStats.recent_bytes_per_second)} ({formatBytesPerSecond(acqPerfStats.bytes_per_second)})
+              </span>
+            </Space>
+            <Table
+              size={"small"}
+              pagination={false}
+              rowKey={"phase"}
+              dataSource={Object.entries(acqPerfStats.phases).map(([phase, stats]) => ({phase, ...stats}))}
+              columns={[
+                {title: intl.formatMessage({id: "acquisition.perf.phase"}), dataIndex: "phase"},
+                {title: intl.formatMessage({id: "acquisition.perf.count"}), dataIndex: "count"},
+                ...(["p50", "p95", "p99", "max"] as const).map((key) => ({
+                  title: key + " (ms)",
+                  dataIndex: key,
+                  render: (v: number) => formatMs(v),
+                })),
+              ]}
+            />
+          </Col>
+        </Row>
+      )}
     </div>
   );
 };
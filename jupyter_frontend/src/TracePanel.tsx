@@ -4,24 +4,68 @@ import ReactEcharts from "echarts-for-react";
 import Slider from "@/Slider.tsx";
 import {ECharts, EChartsOption} from "echarts";
 import {useIntl, FormattedMessage} from "react-intl";
-import {Tabs} from "antd";
+import {message, Tabs} from "antd";
 import {CompatibilityProps} from "antd/es/tabs";
 import type {Tab} from 'rc-tabs/lib/interface';
 import GeneralControl, {TraceIndex, TraceIndexFilter} from "@/components/trace/GeneralControl.tsx";
 import ShiftControl, {TraceInfo} from "@/components/trace/ShiftControl.tsx";
 
+const TYPED_ARRAYS = {
+    int8: Int8Array,
+    uint8: Uint8Array,
+    int16: Int16Array,
+    uint16: Uint16Array,
+    int32: Int32Array,
+    uint32: Uint32Array,
+    float32: Float32Array,
+    float64: Float64Array,
+};
+
+interface SeriesBuffer {
+    dtype: keyof typeof TYPED_ARRAYS;
+    length: number;
+    buffer: DataView | ArrayBuffer;
+}
+
 interface SeriesData {
     color: string;
     name: string;
-    data: Array<Array<number>>;
+    data: {
+        x: SeriesBuffer;
+        y: SeriesBuffer;
+    };
     z: number;
     realSampleCount: number
 }
 
+const decodeSeriesBuffer = (seriesBuffer: SeriesBuffer) => {
+    const TypedArray = TYPED_ARRAYS[seriesBuffer.dtype];
+    const view = seriesBuffer.buffer instanceof DataView ? seriesBuffer.buffer : new DataView(seriesBuffer.buffer);
+    if (view.byteOffset % TypedArray.BYTES_PER_ELEMENT == 0) {
+        return new TypedArray(view.buffer, view.byteOffset, seriesBuffer.length);
+    }
+    // Typed arrays can not be created on an unaligned offset, copy the bytes in this case.
+    return new TypedArray(view.buffer.slice(view.byteOffset, view.byteOffset + view.byteLength));
+};
+
+// The series are sent as binary buffers of x and y, interleave them into the flat [x0, y0, x1, y1, ...] format
+// echarts accepts as typed array data.
+const decodeSeriesData = (data: SeriesData["data"]): Float64Array => {
+    const x = decodeSeriesBuffer(data.x);
+    const y = decodeSeriesBuffer(data.y);
+    const points = new Float64Array(x.length * 2);
+    for (let i = 0; i < x.length; i++) {
+        points[2 * i] = x[i];
+        points[2 * i + 1] = y[i];
+    }
+    return points;
+};
+
 interface TraceSeries {
     seriesDataList: Array<SeriesData>,
     percentRange: Array<number>,
     range: Array<number>,
+    seq: number,
 }
 
 interface ChartSize {
@@ -71,6 +115,38 @@ const TracePanel: React.FC = () => {
 
     const anyWidgetModel = useModel();
 
+    // Sequence number of the latest range request, the series computed for an earlier request are outdated.
+    const rangeRequestSeqRef = useRef<number>(anyWidgetModel.get("range_request_seq") ?? 0);
+
+    // Bump the sequence before setting a range, it is saved together with the range in the same message.
+    const nextRangeRequest = () => {
+        rangeRequestSeqRef.current += 1;
+        anyWidgetModel.set("range_request_seq", rangeRequestSeqRef.current);
+    };
+
+    const isOutdated = (series: TraceSeries) => series.seq != null && series.seq < rangeRequestSeqRef.current;
+
+    useEffect(() => {
+        // The kernel bumps the sequence when it changes the shown traces, the series computed before are outdated.
+        const seqCallback = () => {
+            rangeRequestSeqRef.current = Math.max(rangeRequestSeqRef.current, anyWidgetModel.get("range_request_seq") ?? 0);
+        };
+        // eslint-disable-next-line @typescript-eslint/ban-ts-comment
+        // @ts-expect-error
+        // eslint-disable-next-line @typescript-eslint/no-unused-vars
+        const customCallback = (msg, _) => {
+            if ("errorMessage" in msg) {
+                message.error(msg["errorMessage"]);
+            }
+        };
+        anyWidgetModel.on("change:range_request_seq", seqCallback);
+        anyWidgetModel.on("msg:custom", customCallback);
+        return () => {
+            anyWidgetModel.off("change:range_request_seq", seqCallback);
+            anyWidgetModel.off("msg:custom", customCallback);
+        };
+    }, [anyWidgetModel]);
+
     const intl = useIntl();
 
     useEffect(() => {
@@ -104,6 +180,7 @@ const TracePanel: React.FC = () => {
                 let [newStart, newEnd] = brushParams.areas[0].coordRange
                 newStart = Math.max(Math.floor(newStart), maxRange[0])
                 newEnd = Math.min(Math.ceil(newEnd), maxRange[1])
+                nextRangeRequest()
                 setSelectedRange([newStart, newEnd])
                 chart.dispatchAction({
                     type: 'brush',
@@ -137,7 +214,8 @@ const TracePanel: React.FC = () => {
                 series.push({
                     name: seriesData.name,
                     type: "line",
-                    data: seriesData.data,
+                    dimensions: ["x", "y"],
+                    data: decodeSeriesData(seriesData.data),
                     symbol: "none",
                     lineStyle: {
                         width: 1,
@@ -163,7 +241,8 @@ const TracePanel: React.FC = () => {
             return [{
                 name: overviewSeriesData.name,
                 type: "line",
-                data: overviewSeriesData.data,
+                dimensions: ["x", "y"],
+                data: decodeSeriesData(overviewSeriesData.data),
                 symbol: "none",
                 lineStyle: {
                     width: 1,
@@ -330,6 +409,9 @@ const TracePanel: React.FC = () => {
     });
 
     useEffect(() => {
+        if (isOutdated(traceSeries)) {
+            return
+        }
         setOption({
             series: getSeries()
         })
@@ -407,6 +489,7 @@ const TracePanel: React.FC = () => {
                 let [newStart, newEnd] = brushParams.areas[0].coordRange
                 newStart = Math.max(Math.floor(newStart), maxRange[0])
                 newEnd = Math.min(Math.ceil(newEnd), maxRange[1])
+                nextRangeRequest()
                 setOverviewSelectedRange([newStart, newEnd])
             }
         });
@@ -487,6 +570,9 @@ const TracePanel: React.FC = () => {
     }, [overviewTraceSeries]);
 
     useEffect(() => {
+        if (isOutdated(traceSeries)) {
+            return
+        }
         setSliderPercentRange(traceSeries.percentRange)
     }, [traceSeries]);
 
@@ -540,6 +626,7 @@ const TracePanel: React.FC = () => {
             zoomStart={showRange[0]}
             zoomEnd={showRange[1]}
             zoomApply={(start: number, end: number) => {
+                nextRangeRequest();
                 setSelectedRange([start, end]);
                 // setOverviewRange(start, end);
             }}
@@ -562,6 +649,7 @@ const TracePanel: React.FC = () => {
             <ReactEcharts ref={overviewChartRef} option={overviewOption} style={{height: 60}} replaceMerge={"series"}
                           onChartReady={onOverviewChartReady}/>
             <Slider start={sliderPercentRange[0]} end={sliderPercentRange[1]} onChangeFinish={(s, e) => {
+                nextRangeRequest();
                 setPercentRange([s, e]);
                 setOverviewRange(s, e)
             }} onChange={(s, e) => {
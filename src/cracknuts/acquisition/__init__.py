@@ -32,6 +32,7 @@ def simple_acq(
     init_func: typing.Callable[[CrackerS1], None] = lambda cracker: None,
     do_func: typing.Callable[[CrackerS1, int], dict[str, bytes]] = lambda cracker, count: {},
     finish_func: typing.Callable[[CrackerS1], None] = lambda cracker: None,
+    prepare_func: typing.Callable[[CrackerS1, int], typing.Any] | None = None,
     **kwargs,
 ) -> "Acquisition":
     """
@@ -85,6 +86,25 @@ def simple_acq(
                 cracker.nut_clock_disable()
                 cracker.uart_io_disable()
     :type finish_func: typing.Callable[[CrackerS1], None]
+    :param prepare_func:
+        准备函数（可选），该函数接受一个CrackerS1实例和采集计数作为参数，用于生成该次采集的输入数据（如明文、参考密文等）。
+        设置该函数后，其返回值会作为第三个参数传给执行函数。配合 pipelined=True 使用时，
+        下一次采集的准备函数会在获取当前曲线波形的同时在后台线程中执行。
+        参数说明：
+            - cracker: (CrackerS1) Cracker实例
+            - count: (int) 需要准备的采集计数，从0开始
+            - 返回值：任意对象，作为执行函数的第三个参数
+        示例：
+            def prepare_func(cracker: CrackerS1, count: int) -> bytes:
+                return random.randbytes(aes_data_len)
+
+            def do_func(cracker: CrackerS1, count: int, plaintext: bytes) -> dict[str, bytes]:
+                status, ciphertext = cracker.uart_transmit_receive(cmd_aes_enc + plaintext, rx_count= 12)
+                return {
+                    "plaintext": plaintext,
+                    "ciphertext": ciphertext,
+                }
+    :type prepare_func: typing.Callable[[CrackerS1, int], typing.Any] | None
     :param kwargs: 其他Acquisition的关键字参数
     :type kwargs: dict
     :return: Acquisition实例
@@ -98,7 +118,13 @@ def simple_acq(
         def init(self):
             init_func(cracker)
 
+        def prepare(self, count: int):
+            if prepare_func is not None:
+                return prepare_func(cracker, count)
+
         def do(self, count: int):
+            if prepare_func is not None:
+                return do_func(cracker, count, self.prepared)
             return do_func(cracker, count)
 
         def finish(self):
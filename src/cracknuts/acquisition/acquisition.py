@@ -1,6 +1,7 @@
 # Copyright 2024 CrackNuts. All rights reserved.
 
 import abc
+import concurrent.futures
 import dataclasses
 from dataclasses import dataclass
 import datetime
@@ -14,7 +15,12 @@ import typing
 import numpy as np
 
 from cracknuts import logger
+from cracknuts.acquisition.dataset_writer import DatasetWriter, DatasetWriterError
+from cracknuts.acquisition.online_cpa import OnlineCPA
+from cracknuts.acquisition.perf_stats import PerfStats
+from cracknuts.acquisition.trigger_waiter import TriggerWaiter
 from cracknuts.cracker.cracker_basic import CrackerBasic
+from cracknuts.trace.pyramid import build_pyramid
 from cracknuts.trace.trace import ZarrTraceDataset, NumpyTraceDataset
 
 
@@ -32,9 +38,11 @@ class AcquisitionConfig:
 
 
 class AcqProgress:
-    def __init__(self, finished: int, total: int):
+    def __init__(self, finished: int, total: int, writer_queue_depth: int = 0, writer_lag: int = 0):
         self.finished: int = finished
         self.total: int = total
+        self.writer_queue_depth: int = writer_queue_depth
+        self.writer_lag: int = writer_lag
 
 
 class Acquisition(abc.ABC):
@@ -72,11 +80,16 @@ class Acquisition(abc.ABC):
         file_format: str = "zarr",
         file_path: str = "auto",
         trace_fetch_interval: float = 0,
+        dataset_writer_queue_size: int = 64,
+        pipelined: bool = False,
+        online_cpa: OnlineCPA | None = None,
+        build_pyramid: bool = False,
     ):
         """
         :param cracker: The controlled Cracker object.
         :type cracker: CrackerBasic
-        :param trace_count: The number of traces to acquire.
+        :param trace_count: The number of traces to acquire. If it is less than or equal to 0, run mode keeps
+                            acquiring until stopped and the trace dataset grows with the acquired traces.
         :type trace_count: int
         :param sample_length: the sample length to be acquired,
                               If it is -1, it will be set to the value of `cracker.current_count().sample_len`.
@@ -85,7 +98,8 @@ class Acquisition(abc.ABC):
         :type sample_offset: int
         :param trigger_judge_timeout: The trigger judge timeout in seconds.
         :type trigger_judge_timeout: float
-        :param trigger_judge_wait_time: The trigger judge wait time in seconds.
+        :param trigger_judge_wait_time: The maximum interval between two trigger status polls in seconds.
+                                        The interval adapts to the trigger latency learned during the run.
         :type trigger_judge_wait_time: float
         :param do_error_handler_strategy: The strategy to handle error handling.
                                           0: Exit immediately, 1: Exit after exceeding the error count.
@@ -98,6 +112,19 @@ class Acquisition(abc.ABC):
         :param file_path: The file path of the trace dataset. If set to "auto", a folder with a timestamp format
                           will be created in the current working directory to save the data.
         :type file_path: str
+        :param dataset_writer_queue_size: The maximum number of acquired traces waiting to be written to the dataset
+                                          by the background writer. The acquisition blocks when the queue is full.
+        :type dataset_writer_queue_size: int
+        :param pipelined: Whether to run `prepare` for the next trace on a worker thread while the waves of the
+                          current trace are being fetched from the device.
+        :type pipelined: bool
+        :param online_cpa: The online CPA fed with the traces of each run, see `set_online_cpa`.
+        :type online_cpa: OnlineCPA | None
+        :param build_pyramid: Whether to build the min/max pyramid of a zarr dataset when the acquisition finishes,
+                              so the trace panel can zoom into long traces without reading the raw samples. It costs
+                              an extra pass over the dataset, `cracknuts.trace.pyramid.build_pyramid` can build it
+                              later instead.
+        :type build_pyramid: bool
         """
         self._logger = logger.get_logger(self)
         self._last_wave: dict[int, np.ndarray] | None = {1: np.zeros(1)}
@@ -128,6 +155,18 @@ class Acquisition(abc.ABC):
         self._on_run_progress_changed_listeners: list[typing.Callable[[dict], None]] = []
         self._on_config_changed_listener: list[typing.Callable[[str, typing.Any], None]] = []
         self._trace_fetch_interval = trace_fetch_interval
+        self._dataset_writer_queue_size: int = dataset_writer_queue_size
+        self._dataset_writer: DatasetWriter | None = None
+        self.pipelined: bool = pipelined
+        self._prepared: typing.Any = None
+        self._trigger_waiter: TriggerWaiter = TriggerWaiter(self._is_triggered, trigger_judge_wait_time)
+        self._perf_stats: PerfStats = PerfStats()
+        self._online_cpa: OnlineCPA | None = None
+        self._on_online_cpa_result_changed_listeners: list[typing.Callable[[dict[str, typing.Any]], None]] = []
+        if online_cpa is not None:
+            self.set_online_cpa(online_cpa)
+        self._dataset_path: str | None = None
+        self.build_pyramid: bool = build_pyramid
 
     def on_config_changed(self, listener: typing.Callable[[str, typing.Any], None]):
         self._on_config_changed_listener.append(listener)
@@ -222,6 +261,60 @@ class Acquisition(abc.ABC):
         for listener in self._on_config_changed_listener:
             listener("trace_fetch_interval", value)
 
+    @property
+    def prepared(self) -> typing.Any:
+        """
+        The value returned by `prepare` for the trace currently being acquired.
+        """
+        return self._prepared
+
+    def get_trigger_stats(self) -> dict[str, typing.Any]:
+        """
+        Get the trigger statistics of the current or last run: the number of triggers, timeouts and polls,
+        and the trigger latency percentiles in seconds.
+
+        :return: The trigger statistics.
+        :rtype: dict[str, typing.Any]
+        """
+        return self._trigger_waiter.get_stats()
+
+    def get_perf_stats(self) -> dict[str, typing.Any]:
+        """
+        Get the performance statistics of the current or last run: the duration percentiles in seconds of each phase
+        of the acquisition loop (prepare, pre_do, do, trigger, wave_transfer, dataset_queue, dataset_write, post_do
+        and the whole trace), the traces per second and the wave bytes per second received from the device.
+
+        When the dataset is persisted, the statistics are also exported at finish to a ``.perf.json`` file next to it.
+
+        :return: The performance statistics.
+        :rtype: dict[str, typing.Any]
+        """
+        return self._perf_stats.get_stats()
+
+    @property
+    def online_cpa(self) -> OnlineCPA | None:
+        return self._online_cpa
+
+    def set_online_cpa(self, online_cpa: OnlineCPA | None) -> None:
+        """
+        Set the online CPA fed with the traces of each run, None to disable it. Its results are relayed to the
+        listeners registered by `on_online_cpa_result_changed`, and the run stops early once it reports the key as
+        recovered if `OnlineCPA.stop_on_key_recovered` is set.
+
+        :param online_cpa: The online CPA.
+        :type online_cpa: OnlineCPA | None
+        """
+        self._online_cpa = online_cpa
+        if online_cpa is not None:
+            online_cpa.on_result_changed(self._online_cpa_result_changed)
+
+    def on_online_cpa_result_changed(self, callback: typing.Callable[[dict[str, typing.Any]], None]) -> None:
+        self._on_online_cpa_result_changed_listeners.append(callback)
+
+    def _online_cpa_result_changed(self, result: dict[str, typing.Any]):
+        for listener in self._on_online_cpa_result_changed_listeners:
+            listener(result)
+
     def get_status(self):
         return self._status
 
@@ -267,7 +360,8 @@ class Acquisition(abc.ABC):
         Start run mode in the background.
         The parameters configured here will override the settings specified in `__init__`.
 
-        :param count: The number of traces to acquire.
+        :param count: The number of traces to acquire. If it is less than or equal to 0, the acquisition runs
+                      until stopped and the trace dataset grows with the acquired traces.
         :type count: int
         :param sample_length: The sample length to be acquired.
         :type sample_length: int
@@ -612,6 +706,19 @@ class Acquisition(abc.ABC):
         do_error_count = 0
         trace_index = 0
         self._progress_changed(AcqProgress(trace_index, self.trace_count))
+        prepare_executor = (
+            concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="acquisition-prepare")
+            if self.pipelined
+            else None
+        )
+        prepare_future: concurrent.futures.Future | None = None
+        self._trigger_waiter.reset()
+        self._perf_stats.reset()
+        self._dataset_path = None
+        online_cpa = self._online_cpa if not test else None
+        if online_cpa is not None:
+            online_cpa.reset()
+        loop_start_time = time.time()
 
         cracker_version = self.cracker.get_firmware_version()
         if persistent:
@@ -636,11 +743,14 @@ class Acquisition(abc.ABC):
             elif file_format == "numpy":
                 file_path += ".npy"
 
+            # A non-positive trace count means an open-ended run, the dataset grows with the acquired traces.
+            dataset_trace_count = self.trace_count if self.trace_count is not None and self.trace_count > 0 else None
+
             if file_format == "zarr":
                 dataset = ZarrTraceDataset.new(
                     file_path,
                     channel_names,
-                    self.trace_count,
+                    dataset_trace_count,
                     sample_length,
                     version=f"({cracker_version}, {cracker_version})",
                     data_plaintext_length=self.metadata_plaintext_length,
@@ -652,7 +762,7 @@ class Acquisition(abc.ABC):
                 dataset = NumpyTraceDataset.new(
                     file_path,
                     channel_names,
-                    self.trace_count,
+                    dataset_trace_count,
                     sample_length,
                     version=f"({cracker_version}, {cracker_version})",
                     data_plaintext_length=self.metadata_plaintext_length,
@@ -663,19 +773,30 @@ class Acquisition(abc.ABC):
             else:
                 self._logger.error(f"Unsupported file format: {file_format}")
                 return
+            self._dataset_path = file_path
+            self._dataset_writer = DatasetWriter(dataset, self._dataset_writer_queue_size, self._perf_stats)
+            self._dataset_writer.start()
         else:
-            dataset = None
+            self._dataset_writer = None
 
-        while self._status != 0 and (True if test else self.trace_count - trace_index != 0):
+        while self._status != 0 and (test or self.trace_count <= 0 or trace_index < self.trace_count):
             if self._status < 0:
                 self._status_changed()
                 self._run_thread_pause_event.wait()
                 self._status_changed()
             self._logger.debug("Get wave data: %s", trace_index)
-            self.pre_do()
+            trace_start_time = time.perf_counter()
+            with self._perf_stats.measure(PerfStats.PHASE_PRE_DO):
+                self.pre_do()
             start = time.time()
             try:
-                data = self.do(trace_index)
+                if prepare_future is not None:
+                    self._prepared, prepare_future = prepare_future.result(), None
+                else:
+                    with self._perf_stats.measure(PerfStats.PHASE_PREPARE):
+                        self._prepared = self.prepare(trace_index)
+                with self._perf_stats.measure(PerfStats.PHASE_DO):
+                    data = self.do(trace_index)
                 if not isinstance(data, dict):
                     data = data.__dict__
                 self.current_data = data
@@ -694,54 +815,104 @@ class Acquisition(abc.ABC):
                     self._logger.error(f"Do function get error count: {do_error_count}")
                     continue
             self._logger.debug(f"count: {trace_index} delay: {time.time() - start}")
+            if prepare_executor is not None and (test or self.trace_count <= 0 or trace_index + 1 < self.trace_count):
+                # Prepare the next trace while waiting for the trigger and fetching the waves of this one.
+                prepare_future = prepare_executor.submit(self._timed_prepare, trace_index + 1)
             trigger_judge_start_time = time.time()
-            while self._status != 0:
+            self._logger.debug("Judge trigger status.")
+            wire_bytes = 0
+            with self._perf_stats.measure(PerfStats.PHASE_TRIGGER):
+                triggered = self._trigger_waiter.wait(
+                    self.trigger_judge_timeout, self.trigger_judge_wait_time, lambda: self._status != 0
+                )
+            if triggered:
                 trigger_judge_time = time.time() - trigger_judge_start_time
-                if trigger_judge_time > self.trigger_judge_timeout:
-                    self._logger.error(
-                        "Triggered judge timeout and will get next waves, " "judge time: %s and timeout is %s",
-                        trigger_judge_time,
-                        self.trigger_judge_timeout,
-                    )
-                    break
-                self._logger.debug("Judge trigger status.")
-                if self._is_triggered():
-                    self._logger.debug(f"Triggered! Cost {trigger_judge_time}.")
+                self._logger.debug(f"Triggered! Cost {trigger_judge_time}.")
+                with self._perf_stats.measure(PerfStats.PHASE_WAVE_TRANSFER):
                     self._last_wave = self._get_waves(self.sample_offset, self.sample_length)
-                    if self._last_wave is not None:
-                        self._logger.debug(
-                            "Got wave: %s.",
-                            {k: v.shape for k, v in self._last_wave.items()},
-                        )
-                        # self._logger.debug('Got wave: ')
-                    if self._on_wave_loaded_callback and callable(self._on_wave_loaded_callback):
-                        try:
-                            self._on_wave_loaded_callback(self._last_wave)
-                        except Exception as e:
-                            self._logger.error("Wave loaded event callback error: %s", e.args)
+                if self._last_wave is not None:
+                    wire_bytes = sum(wave.nbytes for wave in self._last_wave.values())
+                    self._logger.debug(
+                        "Got wave: %s.",
+                        {k: v.shape for k, v in self._last_wave.items()},
+                    )
+                if self._on_wave_loaded_callback and callable(self._on_wave_loaded_callback):
+                    try:
+                        self._on_wave_loaded_callback(self._last_wave)
+                    except Exception as e:
+                        self._logger.error("Wave loaded event callback error: %s", e.args)
+            elif self._status != 0:
+                self._logger.error(
+                    "Triggered judge timeout and will get next waves, judge time: %s and timeout is %s",
+                    time.time() - trigger_judge_start_time,
+                    self.trigger_judge_timeout,
+                )
+            if self._dataset_writer is not None and self._last_wave is not None:
+                try:
+                    with self._perf_stats.measure(PerfStats.PHASE_DATASET_QUEUE):
+                        self._dataset_writer.put(trace_index, self._last_wave, data)
+                except DatasetWriterError as e:
+                    self._logger.error(f"Exit with dataset write error: {e}")
                     break
-
-                time.sleep(self.trigger_judge_wait_time)
-            if dataset is not None and self._last_wave is not None:
-                for k in self._last_wave.keys():
-                    dataset.set_trace(str(k), trace_index, self._last_wave[k], data)
-            self._post_do(trace_index, data)
+            if online_cpa is not None and triggered and self._last_wave is not None:
+                # On a trigger timeout the last wave belongs to the previous trace, it must not be paired with this
+                # trace's data.
+                online_cpa.add_trace(self._last_wave, data)
+            with self._perf_stats.measure(PerfStats.PHASE_POST_DO):
+                self._post_do(trace_index, data)
+            self._perf_stats.record(PerfStats.PHASE_TRACE, time.perf_counter() - trace_start_time)
+            self._perf_stats.trace_done(wire_bytes)
             trace_index += 1
             self._current_trace_count = trace_index
-            self._progress_changed(AcqProgress(trace_index, self.trace_count))
+            self._progress_changed(self._current_progress(trace_index))
+            if online_cpa is not None and online_cpa.should_stop:
+                self._logger.info(f"Key recovered by the online CPA after {online_cpa.result['trace_count']} traces.")
+                break
             # Reduce the execution frequency in test mode.
             if test:
                 if self.trace_fetch_interval is not None and self.trace_fetch_interval != 0:
                     time.sleep(self.trace_fetch_interval)
 
-        if dataset is not None:
-            dataset.dump()
+        if prepare_executor is not None:
+            prepare_executor.shutdown(wait=True, cancel_futures=True)
+        if online_cpa is not None:
+            online_cpa.close()
+        self._perf_stats.stop()
+        loop_time = time.time() - loop_start_time
+        if trace_index > 0 and loop_time > 0:
+            self._logger.info(
+                f"Acquired {trace_index} traces in {loop_time:.3f}s, {trace_index / loop_time:.2f} traces/s"
+                f"{' (pipelined)' if self.pipelined else ''}."
+            )
+        self._logger.info(f"Trigger stats: {self.get_trigger_stats()}")
+        # Persist the dataset before reporting the stop, so a new run can not start while the writer is draining.
+        dataset = self._dataset_writer.dataset if self._dataset_writer is not None else None
+        self._drain_dataset_writer()
+        if self.build_pyramid and isinstance(dataset, ZarrTraceDataset):
+            self._build_dataset_pyramid(dataset)
+        self._export_perf_stats()
         self._status = self.STATUS_STOPPED
         self._status_changed()
 
+    def _timed_prepare(self, count: int) -> typing.Any:
+        with self._perf_stats.measure(PerfStats.PHASE_PREPARE):
+            return self.prepare(count)
+
+    def _current_progress(self, finished: int) -> "AcqProgress":
+        if self._dataset_writer is None:
+            return AcqProgress(finished, self.trace_count)
+        return AcqProgress(finished, self.trace_count, self._dataset_writer.queue_depth, self._dataset_writer.lag)
+
     def _progress_changed(self, progress: "AcqProgress"):
         for listener in self._on_run_progress_changed_listeners:
-            listener({"finished": progress.finished, "total": progress.total})
+            listener(
+                {
+                    "finished": progress.finished,
+                    "total": progress.total,
+                    "writer_queue_depth": progress.writer_queue_depth,
+                    "writer_lag": progress.writer_lag,
+                }
+            )
 
     def _loop_without_log(self):
         ...
@@ -808,6 +979,23 @@ class Acquisition(abc.ABC):
 
     def transfer(self): ...
 
+    def prepare(self, count: int) -> typing.Any:
+        """
+        The ``prepare`` logic, which the user may implement in the subclass to compute the inputs of a trace, e.g.
+        generate the plaintext and the expected ciphertext. The returned value is available in ``do`` through the
+        ``prepared`` property.
+
+        In pipelined mode, ``prepare`` for the next trace runs on a worker thread while the waves of the current trace
+        are being fetched, so it should not depend on the result of the current ``do``. Commands sent to the device
+        from ``prepare`` are serialized with those of the acquisition thread.
+
+        :param count: The loop count of the trace to prepare, starting from 0.
+        :type count: int
+        :return: Any value needed by ``do``.
+        :rtype: typing.Any
+        """
+        return None
+
     def pre_do(self):
         self.cracker.osc_single()
 
@@ -888,6 +1076,35 @@ class Acquisition(abc.ABC):
 
     def _post_finish(self): ...
 
+    def _build_dataset_pyramid(self, dataset: ZarrTraceDataset):
+        try:
+            build_pyramid(dataset)
+            self._logger.debug(f"The min/max pyramid of {self._dataset_path} is built.")
+        except Exception as e:
+            self._logger.error(f"Build min/max pyramid error: {e}")
+
+    def _drain_dataset_writer(self):
+        if self._dataset_writer is None:
+            return
+        self._logger.debug(f"Wait for dataset writer, {self._dataset_writer.lag} traces pending.")
+        try:
+            self._dataset_writer.close()
+        except DatasetWriterError as e:
+            self._logger.error(f"Dataset writer error: {e}")
+        finally:
+            self._dataset_writer = None
+        self._progress_changed(AcqProgress(self._current_trace_count, self.trace_count))
+
+    def _export_perf_stats(self):
+        if self._dataset_path is None:
+            return
+        perf_stats_path = os.path.splitext(self._dataset_path.rstrip("/"))[0] + ".perf.json"
+        try:
+            self._perf_stats.dump_json(perf_stats_path)
+            self._logger.info(f"Performance statistics are exported to {perf_stats_path}.")
+        except OSError as e:
+            self._logger.error(f"Export performance statistics error: {e}")
+
     def _save_dataset(self): ...
 
     def finish(self):
@@ -982,6 +1199,7 @@ class AcquisitionBuilder:
         self._do_function = lambda cracker, count: ...
         self._init_function = lambda _: ...
         self._finish_function = lambda _: ...
+        self._prepare_function = None
 
     def cracker(self, cracker: CrackerBasic):
         """
@@ -1006,6 +1224,18 @@ class AcquisitionBuilder:
             self._init_function = init_function
         return self
 
+    def prepare(self, prepare_function: typing.Callable[[CrackerBasic, int], typing.Any]):
+        """
+        The prepare function of acquisition. When it is set, its return value is passed to the do function as
+        the third argument.
+
+        :param prepare_function: the prepare function
+        :type prepare_function: typing.Callable[[CrackerBasic, int], typing.Any]
+        :return: 'AcquisitionBuilder'
+        """
+        self._prepare_function = prepare_function
+        return self
+
     def do(self, do_function: typing.Callable[[CrackerBasic, int], dict[str, bytes]]):
         """
         The do function of acquisition.
@@ -1050,7 +1280,13 @@ class AcquisitionBuilder:
             def init(self):
                 builder_self._init_function(self.cracker)
 
+            def prepare(self, count: int):
+                if builder_self._prepare_function is not None:
+                    return builder_self._prepare_function(self.cracker, count)
+
             def do(self, count: int):
+                if builder_self._prepare_function is not None:
+                    return builder_self._do_function(self.cracker, count, self.prepared)
                 return builder_self._do_function(self.cracker, count)
 
             def finish(self):
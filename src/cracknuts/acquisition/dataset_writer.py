@@ -0,0 +1,145 @@
+# Copyright 2024 CrackNuts. All rights reserved.
+
+import queue
+import threading
+import time
+
+import numpy as np
+
+from cracknuts import logger
+from cracknuts.acquisition.perf_stats import PerfStats
+from cracknuts.trace.trace import TraceDataset
+
+
+class DatasetWriterError(Exception):
+    """
+    Raised in the acquisition thread when the background writer failed to persist a trace.
+    """
+
+
+class DatasetWriter:
+    """
+    Persist acquired traces to a trace dataset on a background thread.
+
+    Traces are handed over through a bounded queue, so the acquisition loop keeps cycling the device while
+    compression and disk I/O happen in parallel. When the queue is full, `put` blocks until the writer catches up
+    (backpressure). An error raised by the dataset stops the writer and is re-raised by the next `put` or `close`.
+    """
+
+    _STOP = object()
+
+    def __init__(self, dataset: TraceDataset, max_queue_size: int = 64, perf_stats: PerfStats | None = None):
+        """
+        :param dataset: The dataset the traces are written to.
+        :type dataset: TraceDataset
+        :param max_queue_size: The maximum number of traces waiting to be written.
+        :type max_queue_size: int
+        :param perf_stats: If given, the time spent writing each trace is recorded as the `dataset_write` phase.
+        :type perf_stats: PerfStats | None
+        """
+        self._perf_stats: PerfStats | None = perf_stats
+        self._logger = logger.get_logger(self)
+        self._dataset: TraceDataset = dataset
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_queue_size))
+        self._thread: threading.Thread | None = None
+        self._error: BaseException | None = None
+        self._put_count: int = 0
+        self._written_count: int = 0
+        self._oldest_pending_time: float | None = None
+
+    @property
+    def dataset(self) -> TraceDataset:
+        return self._dataset
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        The number of traces waiting in the queue.
+        """
+        return self._queue.qsize()
+
+    @property
+    def lag(self) -> int:
+        """
+        The number of traces acquired but not yet written, including the one being written.
+        """
+        return self._put_count - self._written_count
+
+    @property
+    def lag_time(self) -> float:
+        """
+        The time in seconds the oldest pending trace has been waiting to be written.
+        """
+        oldest_pending_time = self._oldest_pending_time
+        return 0.0 if oldest_pending_time is None or self.lag == 0 else time.time() - oldest_pending_time
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="dataset-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, trace_index: int, waves: dict[int, np.ndarray], data: dict[str, bytes] | None) -> None:
+        """
+        Queue the waves of one trace for writing, blocking while the queue is full.
+
+        :param trace_index: The trace index in the dataset.
+        :type trace_index: int
+        :param waves: The waves of the trace, keyed by channel.
+        :type waves: dict[int, np.ndarray]
+        :param data: The plaintext, ciphertext, key and extended data of the trace.
+        :type data: dict[str, bytes] | None
+        """
+        while True:
+            self._raise_if_failed()
+            try:
+                self._queue.put((time.time(), trace_index, waves, data), timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self._put_count += 1
+
+    def close(self, dump: bool = True) -> None:
+        """
+        Wait for all queued traces to be written and stop the writer thread. The dataset is dumped even if a write
+        failed, so the traces written before the failure are kept.
+
+        :param dump: Whether to dump the dataset after all traces are written.
+        :type dump: bool
+        """
+        if self._thread is not None:
+            while self._thread.is_alive():
+                try:
+                    self._queue.put(self._STOP, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            self._thread.join()
+            self._thread = None
+        try:
+            self._raise_if_failed()
+        finally:
+            # Keep the traces written before a failure.
+            if dump:
+                self._dataset.dump()
+
+    def _raise_if_failed(self):
+        if self._error is not None:
+            raise DatasetWriterError(f"Write trace dataset error: {self._error}") from self._error
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+            put_time, trace_index, waves, data = item
+            self._oldest_pending_time = put_time
+            write_start_time = time.perf_counter()
+            try:
+                for channel, wave in waves.items():
+                    self._dataset.set_trace(str(channel), trace_index, wave, data)
+            except Exception as e:
+                self._logger.error(f"Write trace {trace_index} error: {e}")
+                self._error = e
+                break
+            if self._perf_stats is not None:
+                self._perf_stats.record(PerfStats.PHASE_DATASET_WRITE, time.perf_counter() - write_start_time)
+            self._written_count += 1
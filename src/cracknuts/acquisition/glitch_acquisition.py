@@ -8,6 +8,7 @@ from abc import ABC
 
 from cracknuts.acquisition.acquisition import Acquisition
 from cracknuts.acquisition.acquisition import AcquisitionBuilder
+from cracknuts.acquisition.online_cpa import OnlineCPA
 from cracknuts.cracker.cracker_g1 import CrackerG1
 from cracknuts.glitch.param_generator import (
     AbstractGlitchParamGenerator,
@@ -111,6 +112,10 @@ class GlitchAcquisition(Acquisition, ABC):
         file_format: str = "zarr",
         file_path: str = "auto",
         trace_fetch_interval: float = 0,
+        dataset_writer_queue_size: int = 64,
+        pipelined: bool = False,
+        online_cpa: OnlineCPA | None = None,
+        build_pyramid: bool = False,
     ):
         super().__init__(
             cracker,
@@ -128,6 +133,10 @@ class GlitchAcquisition(Acquisition, ABC):
             file_format,
             file_path,
             trace_fetch_interval,
+            dataset_writer_queue_size,
+            pipelined,
+            online_cpa,
+            build_pyramid,
         )
         self._shadow_trace_count = shadow_trace_count
         self.cracker: CrackerG1 = cracker
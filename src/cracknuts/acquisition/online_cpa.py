@@ -0,0 +1,200 @@
+# Copyright 2024 CrackNuts. All rights reserved.
+
+import concurrent.futures
+import typing
+
+import numpy as np
+
+from cracknuts import logger
+from cracknuts.analysis.cpa import CPA
+from cracknuts.analysis.models import LeakageModel
+
+
+class OnlineCPA:
+    """
+    Correlation power analysis fed with the traces of a running acquisition.
+
+    Traces are buffered as they arrive and every `update_interval` traces the buffer is accumulated into a `CPA` on a
+    worker thread, so the acquisition loop is not slowed down by the analysis. If the worker is still busy, the buffer
+    keeps growing and is accumulated in one batch later. After each update, the best key guess and, when the correct
+    key is known, the key rank of each byte are published to the result listeners.
+    """
+
+    def __init__(
+        self,
+        model: LeakageModel | None = None,
+        byte_indexes: typing.Iterable[int] | None = None,
+        channel: int = 0,
+        update_interval: int = 100,
+        known_key: bytes | None = None,
+        stop_on_key_recovered: bool = False,
+        stable_update_count: int = 0,
+    ):
+        """
+        :param model: The leakage model, the Hamming weight of the AES S-box output by default.
+        :type model: LeakageModel | None
+        :param byte_indexes: The key bytes to attack, the 16 bytes of the AES key by default.
+        :type byte_indexes: typing.Iterable[int] | None
+        :param channel: The oscilloscope channel of the analysed waves.
+        :type channel: int
+        :param update_interval: The number of traces between two updates of the result.
+        :type update_interval: int
+        :param known_key: The correct key, used to compute the key ranks. If None, the key of the trace data is used
+                          when present.
+        :type known_key: bytes | None
+        :param stop_on_key_recovered: Whether to stop the acquisition once the key is recovered.
+        :type stop_on_key_recovered: bool
+        :param stable_update_count: When the correct key is unknown, the key is considered recovered once the best
+                                    guesses are unchanged for this number of updates, 0 disables it.
+        :type stable_update_count: int
+        """
+        self._logger = logger.get_logger(self)
+        self._cpa: CPA = CPA(model, byte_indexes)
+        self.channel: int = channel
+        self.update_interval: int = max(1, update_interval)
+        self.known_key: bytes | None = known_key
+        self.stop_on_key_recovered: bool = stop_on_key_recovered
+        self.stable_update_count: int = stable_update_count
+        self._on_result_changed_listeners: list[typing.Callable[[dict[str, typing.Any]], None]] = []
+        self._executor: concurrent.futures.ThreadPoolExecutor | None = None
+        self._pending: concurrent.futures.Future | None = None
+        self._waves: list[np.ndarray] = []
+        self._data: list[dict[str, bytes]] = []
+        self._key: bytes | None = None
+        self._result: dict[str, typing.Any] = {}
+        self._stable_updates: int = 0
+        self._key_recovered: bool = False
+
+    @property
+    def cpa(self) -> CPA:
+        return self._cpa
+
+    @property
+    def result(self) -> dict[str, typing.Any]:
+        """
+        The latest result: the number of traces analysed, the best guess, the correlation peak of the best guess and
+        the key rank (None if the key is unknown) of each key byte, whether the key is recovered, and the error of the
+        last update (None if it succeeded).
+        """
+        return self._result
+
+    @property
+    def key_recovered(self) -> bool:
+        return self._key_recovered
+
+    @property
+    def should_stop(self) -> bool:
+        """
+        Whether the acquisition should stop because the key is recovered.
+        """
+        return self.stop_on_key_recovered and self._key_recovered
+
+    def on_result_changed(self, callback: typing.Callable[[dict[str, typing.Any]], None]) -> None:
+        self._on_result_changed_listeners.append(callback)
+
+    def reset(self) -> None:
+        """
+        Drop the accumulated traces and start a new analysis, called at the start of each run.
+        """
+        self.close(flush=False)
+        self._cpa = CPA(self._cpa.model, self._cpa.byte_indexes)
+        self._waves, self._data = [], []
+        self._key = self.known_key
+        self._result = {}
+        self._stable_updates = 0
+        self._key_recovered = False
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="online-cpa")
+
+    def add_trace(self, waves: dict[int, np.ndarray], data: dict[str, bytes] | None) -> None:
+        """
+        Add the waves of an acquired trace.
+
+        :param waves: The waves of the trace, keyed by channel.
+        :type waves: dict[int, np.ndarray]
+        :param data: The plaintext, ciphertext, key and extended data of the trace.
+        :type data: dict[str, bytes] | None
+        """
+        wave = waves.get(self.channel)
+        if wave is None or data is None:
+            return
+        if self._key is None and data.get("key") is not None:
+            self._key = bytes(data["key"])
+        self._waves.append(wave.copy())
+        self._data.append(data)
+        if len(self._waves) >= self.update_interval and (self._pending is None or self._pending.done()):
+            self._submit()
+
+    def close(self, flush: bool = True) -> None:
+        """
+        Wait for the pending update, accumulate the remaining traces if `flush` and stop the worker thread.
+
+        :param flush: Whether to accumulate the buffered traces.
+        :type flush: bool
+        """
+        if self._executor is None:
+            return
+        if flush and self._waves:
+            self._submit()
+        if self._pending is not None:
+            try:
+                self._pending.result()
+            except Exception as e:
+                self._logger.error(f"Online CPA error: {e}")
+            self._pending = None
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    def _submit(self):
+        waves, data = self._waves, self._data
+        self._waves, self._data = [], []
+        self._pending = self._executor.submit(self._update, waves, data)
+
+    def _update(self, waves: list[np.ndarray], data: list[dict[str, bytes]]):
+        try:
+            self._accumulate(waves, data)
+        except Exception as e:
+            # Report the failure right away, the later updates keep being attempted.
+            self._logger.error(f"Online CPA update error: {e}")
+            self._result = {**self._result, "error": str(e)}
+            self._publish_result()
+
+    def _accumulate(self, waves: list[np.ndarray], data: list[dict[str, bytes]]):
+        data_arrays = {}
+        for name in ("plaintext", "ciphertext", "key", "extended"):
+            values = [d.get(name) for d in data]
+            if all(value is not None for value in values):
+                data_arrays[name] = np.frombuffer(b"".join(values), dtype=np.uint8).reshape(len(values), -1)
+        self._cpa.update(np.stack(waves), data_arrays)
+        peaks = self._cpa.peak_correlations()
+        best_guesses = peaks.argmax(axis=1)
+        key_ranks = self._cpa.key_ranks(self._key) if self._key is not None else None
+        previous_guesses = self._result.get("best_guesses")
+        if previous_guesses is not None and previous_guesses == best_guesses.tolist():
+            self._stable_updates += 1
+        else:
+            self._stable_updates = 0
+        key_recovered = False
+        if key_ranks is not None:
+            key_recovered = bool((key_ranks == 0).all())
+        elif self.stable_update_count > 0:
+            key_recovered = self._stable_updates >= self.stable_update_count
+        self._result = {
+            "trace_count": self._cpa.trace_count,
+            "byte_indexes": self._cpa.byte_indexes,
+            "best_guesses": best_guesses.tolist(),
+            "best_correlations": peaks[np.arange(len(best_guesses)), best_guesses].tolist(),
+            "key_ranks": key_ranks.tolist() if key_ranks is not None else None,
+            "key_recovered": key_recovered,
+            "error": None,
+        }
+        # Published after the result, so that the acquisition thread never sees the flag without the result.
+        self._key_recovered = key_recovered
+        self._logger.debug(f"Online CPA result: {self._result}")
+        self._publish_result()
+
+    def _publish_result(self):
+        for listener in self._on_result_changed_listeners:
+            try:
+                listener(self._result)
+            except Exception as e:
+                self._logger.error(f"Online CPA result listener error: {e}")
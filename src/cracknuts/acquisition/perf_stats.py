@@ -0,0 +1,169 @@
+# Copyright 2024 CrackNuts. All rights reserved.
+
+import collections
+import contextlib
+import json
+import threading
+import time
+import typing
+
+import numpy as np
+
+
+class PerfStats:
+    """
+    Per-phase timing of the acquisition loop.
+
+    Each phase keeps the durations of its most recent executions in a rolling window, from which the percentiles are
+    computed on demand. The throughput is reported both over the whole run and over the recent traces. Phases may be
+    recorded from several threads, e.g. the dataset writer thread.
+    """
+
+    PHASE_PREPARE = "prepare"
+    PHASE_PRE_DO = "pre_do"
+    PHASE_DO = "do"
+    PHASE_TRIGGER = "trigger"
+    PHASE_WAVE_TRANSFER = "wave_transfer"
+    PHASE_DATASET_QUEUE = "dataset_queue"
+    PHASE_DATASET_WRITE = "dataset_write"
+    PHASE_POST_DO = "post_do"
+    PHASE_TRACE = "trace"
+
+    def __init__(self, window_size: int = 1024):
+        """
+        :param window_size: The number of recent samples kept per phase.
+        :type window_size: int
+        """
+        self._window_size = window_size
+        self._lock = threading.Lock()
+        self._durations: dict[str, collections.deque[float]] = {}
+        self._totals: dict[str, float] = {}
+        self._counts: dict[str, int] = {}
+        self._trace_times: collections.deque[tuple[float, int]] = collections.deque(maxlen=window_size)
+        self._trace_count: int = 0
+        self._wire_bytes: int = 0
+        self._start_time: float | None = None
+        self._stop_time: float | None = None
+
+    def reset(self) -> None:
+        """
+        Clear all statistics and start timing a new run.
+        """
+        with self._lock:
+            self._durations.clear()
+            self._totals.clear()
+            self._counts.clear()
+            self._trace_times.clear()
+            self._trace_count = 0
+            self._wire_bytes = 0
+            self._start_time = time.perf_counter()
+            self._stop_time = None
+
+    def stop(self) -> None:
+        """
+        Stop the run clock, the throughput is computed up to this point afterward.
+        """
+        self._stop_time = time.perf_counter()
+
+    def record(self, phase: str, duration: float) -> None:
+        """
+        Record one execution of a phase.
+
+        :param phase: The phase name.
+        :type phase: str
+        :param duration: The duration in seconds.
+        :type duration: float
+        """
+        with self._lock:
+            durations = self._durations.get(phase)
+            if durations is None:
+                durations = self._durations[phase] = collections.deque(maxlen=self._window_size)
+                self._totals[phase] = 0.0
+                self._counts[phase] = 0
+            durations.append(duration)
+            self._totals[phase] += duration
+            self._counts[phase] += 1
+
+    @contextlib.contextmanager
+    def measure(self, phase: str) -> typing.Iterator[None]:
+        """
+        Time the enclosed block as one execution of a phase. Blocks exiting with an exception are not recorded.
+
+        :param phase: The phase name.
+        :type phase: str
+        """
+        start = time.perf_counter()
+        yield
+        self.record(phase, time.perf_counter() - start)
+
+    def trace_done(self, wire_bytes: int = 0) -> None:
+        """
+        Count one acquired trace.
+
+        :param wire_bytes: The number of wave bytes received from the device for the trace.
+        :type wire_bytes: int
+        """
+        with self._lock:
+            self._trace_count += 1
+            self._wire_bytes += wire_bytes
+            self._trace_times.append((time.perf_counter(), self._wire_bytes))
+
+    def get_stats(self) -> dict[str, typing.Any]:
+        """
+        Get the statistics of the current run. Durations are in seconds, the percentiles cover the most recent
+        executions of each phase.
+
+        :return: The statistics.
+        :rtype: dict[str, typing.Any]
+        """
+        with self._lock:
+            durations = {phase: np.array(values) for phase, values in self._durations.items()}
+            totals = dict(self._totals)
+            counts = dict(self._counts)
+            trace_times = list(self._trace_times)
+            trace_count = self._trace_count
+            wire_bytes = self._wire_bytes
+            start_time = self._start_time
+        end_time = self._stop_time if self._stop_time is not None else time.perf_counter()
+        elapsed = end_time - start_time if start_time is not None else 0.0
+
+        phases = {}
+        for phase, values in durations.items():
+            p50, p95, p99 = np.percentile(values, (50, 95, 99)) if len(values) else (0.0, 0.0, 0.0)
+            phases[phase] = {
+                "count": counts[phase],
+                "total": totals[phase],
+                "mean": totals[phase] / counts[phase],
+                "p50": float(p50),
+                "p95": float(p95),
+                "p99": float(p99),
+                "max": float(values.max()) if len(values) else 0.0,
+            }
+
+        if len(trace_times) > 1 and trace_times[-1][0] > trace_times[0][0]:
+            window_time = trace_times[-1][0] - trace_times[0][0]
+            recent_traces_per_second = (len(trace_times) - 1) / window_time
+            recent_bytes_per_second = (trace_times[-1][1] - trace_times[0][1]) / window_time
+        else:
+            recent_traces_per_second = recent_bytes_per_second = 0.0
+
+        return {
+            "traces": trace_count,
+            "elapsed": elapsed,
+            "traces_per_second": trace_count / elapsed if elapsed > 0 else 0.0,
+            "recent_traces_per_second": recent_traces_per_second,
+            "wire_bytes": wire_bytes,
+            "bytes_per_second": wire_bytes / elapsed if elapsed > 0 else 0.0,
+            "recent_bytes_per_second": recent_bytes_per_second,
+            "phases": phases,
+        }
+
+    def dump_json(self, path: str) -> None:
+        """
+        Write the statistics to a JSON file.
+
+        :param path: The file path.
+        :type path: str
+        """
+        with open(path, "w") as f:
+            json.dump(self.get_stats(), f, indent=2)
@@ -0,0 +1,124 @@
+# Copyright 2024 CrackNuts. All rights reserved.
+
+import collections
+import time
+import typing
+
+import numpy as np
+
+
+class TriggerWaiter:
+    """
+    Wait for the oscilloscope trigger with adaptive polling.
+
+    Every trigger status query is a full CNP round trip, so polling too often wastes link bandwidth and CPU while
+    polling too rarely adds latency to every trace. The waiter learns the trigger latency of the current run, sleeps
+    for most of the expected latency before the first poll, and then polls with an exponentially growing interval
+    capped by the maximum wait time.
+    """
+
+    _HISTORY_SIZE = 1024
+    _LEARN_PERCENTILE = 10  # Sleep up to this percentile of the recent latencies before the first poll.
+    _LEARN_RATIO = 0.9
+
+    def __init__(
+        self,
+        is_triggered: typing.Callable[[], bool],
+        max_wait_time: float = 0.01,
+        min_wait_time: float = 0.0001,
+        backoff_factor: float = 2.0,
+    ):
+        """
+        :param is_triggered: The function querying the trigger status of the device.
+        :type is_triggered: typing.Callable[[], bool]
+        :param max_wait_time: The maximum interval between two polls in seconds.
+        :type max_wait_time: float
+        :param min_wait_time: The first interval of the exponential backoff in seconds.
+        :type min_wait_time: float
+        :param backoff_factor: The growth factor of the polling interval.
+        :type backoff_factor: float
+        """
+        self._is_triggered = is_triggered
+        self.max_wait_time: float = max_wait_time
+        self.min_wait_time: float = min_wait_time
+        self.backoff_factor: float = backoff_factor
+        self._latencies: collections.deque[float] = collections.deque(maxlen=self._HISTORY_SIZE)
+        self._expected_latency: float = 0.0
+        self._trigger_count: int = 0
+        self._timeout_count: int = 0
+        self._poll_count: int = 0
+
+    def reset(self) -> None:
+        """
+        Clear the learned latency and the statistics, called at the start of each run.
+        """
+        self._latencies.clear()
+        self._expected_latency = 0.0
+        self._trigger_count = 0
+        self._timeout_count = 0
+        self._poll_count = 0
+
+    def wait(
+        self,
+        timeout: float,
+        max_wait_time: float | None = None,
+        is_running: typing.Callable[[], bool] = lambda: True,
+    ) -> bool:
+        """
+        Wait until the device is triggered.
+
+        :param timeout: The timeout in seconds.
+        :type timeout: float
+        :param max_wait_time: The maximum interval between two polls, the value given in `__init__` is used if None.
+        :type max_wait_time: float | None
+        :param is_running: Returns False when the wait should be abandoned, e.g. the acquisition is stopped.
+        :type is_running: typing.Callable[[], bool]
+        :return: True if triggered, False on timeout or when abandoned.
+        :rtype: bool
+        """
+        if max_wait_time is None:
+            max_wait_time = self.max_wait_time
+        start = time.perf_counter()
+        if self._expected_latency > 0:
+            time.sleep(min(self._expected_latency, timeout))
+        wait_time = min(self.min_wait_time, max_wait_time)
+        while is_running():
+            self._poll_count += 1
+            if self._is_triggered():
+                self._record_latency(time.perf_counter() - start)
+                return True
+            remaining = timeout - (time.perf_counter() - start)
+            if remaining <= 0:
+                self._timeout_count += 1
+                return False
+            time.sleep(min(wait_time, remaining))
+            wait_time = min(wait_time * self.backoff_factor, max_wait_time)
+        return False
+
+    def _record_latency(self, latency: float):
+        self._trigger_count += 1
+        self._latencies.append(latency)
+        self._expected_latency = float(np.percentile(self._latencies, self._LEARN_PERCENTILE)) * self._LEARN_RATIO
+
+    def get_stats(self) -> dict[str, typing.Any]:
+        """
+        Get the trigger statistics of the current run. Latency percentiles are in seconds and cover the most recent
+        triggers.
+
+        :return: The statistics.
+        :rtype: dict[str, typing.Any]
+        """
+        waits = self._trigger_count + self._timeout_count
+        stats = {
+            "triggered": self._trigger_count,
+            "timeouts": self._timeout_count,
+            "polls": self._poll_count,
+            "polls_per_wait": self._poll_count / waits if waits else 0.0,
+            "expected_latency": self._expected_latency,
+        }
+        if self._latencies:
+            p50, p95, p99 = np.percentile(self._latencies, (50, 95, 99))
+            stats |= {"latency_p50": float(p50), "latency_p95": float(p95), "latency_p99": float(p99)}
+        else:
+            stats |= {"latency_p50": None, "latency_p95": None, "latency_p99": None}
+        return stats
@@ -0,0 +1,19 @@
+# Copyright 2024 CrackNuts. All rights reserved.
+
+from cracknuts.analysis.models import LeakageModel, AesSboxOutput, AesLastRound, Sm4SboxOutput, DesSboxOutput
+from cracknuts.analysis.moments import CentralMoments
+from cracknuts.analysis.cpa import CPA
+from cracknuts.analysis.ttest import TTest
+from cracknuts.analysis.snr import SNR
+
+__all__ = [
+    "LeakageModel",
+    "AesSboxOutput",
+    "AesLastRound",
+    "Sm4SboxOutput",
+    "DesSboxOutput",
+    "CentralMoments",
+    "CPA",
+    "TTest",
+    "SNR",
+]
@@ -0,0 +1,67 @@
+# Copyright 2024 CrackNuts. All rights reserved.
+
+import typing
+
+import numpy as np
+import zarr
+
+from cracknuts.trace.trace import TraceDataset, ZarrTraceDataset
+
+
+def iter_trace_chunks(
+    dataset: TraceDataset,
+    channel_name: str | int,
+    chunk_size: int,
+    trace_slice: slice = slice(None),
+    with_data: bool = True,
+) -> typing.Iterator[tuple[np.ndarray, dict[str, np.ndarray | None] | None]]:
+    """
+    Iterate over the traces of one channel in chunks, so that only one chunk is held in memory at a time.
+
+    :param dataset: The trace dataset.
+    :type dataset: TraceDataset
+    :param channel_name: The channel name or index.
+    :type channel_name: str | int
+    :param chunk_size: The number of traces per chunk.
+    :type chunk_size: int
+    :param trace_slice: The traces to iterate over.
+    :type trace_slice: slice
+    :param with_data: Whether to read the data arrays of the traces.
+    :type with_data: bool
+    :return: The (n, sample_count) traces of each chunk and their data arrays, None if `with_data` is False.
+    :rtype: typing.Iterator[tuple[np.ndarray, dict[str, np.ndarray | None] | None]]
+    """
+    channel_index = channel_name if isinstance(channel_name, int) else dataset.channel_names.index(channel_name)
+    trace_indexes = range(dataset.trace_count)[trace_slice]
+    for start in range(0, len(trace_indexes), chunk_size):
+        chunk_indexes = trace_indexes[start : start + chunk_size]
+        if chunk_indexes.step > 0:
+            selection = slice(chunk_indexes.start, chunk_indexes.stop, chunk_indexes.step)
+        else:
+            selection = list(chunk_indexes)
+        traces = np.asarray(dataset.trace[channel_index, selection]).reshape(len(chunk_indexes), -1)
+        data = dataset.get_data_arrays(channel_index, selection) if with_data else None
+        yield traces, data
+
+
+def open_result_group(target: TraceDataset | zarr.hierarchy.Group | str, *paths: str) -> zarr.hierarchy.Group:
+    """
+    Open, creating it if needed, the group of an analysis result beside the origin traces of a zarr dataset.
+
+    :param target: The zarr trace dataset, zarr group or zarr path.
+    :type target: TraceDataset | zarr.hierarchy.Group | str
+    :param paths: The path of the result group under the root.
+    :type paths: str
+    :return: The writable result group.
+    :rtype: zarr.hierarchy.Group
+    """
+    if isinstance(target, ZarrTraceDataset):
+        # A loaded dataset is opened read only, reopen its store to write the results.
+        root = zarr.open_group(store=target.get_origin_data().store, mode="a")
+    elif isinstance(target, zarr.hierarchy.Group):
+        root = target
+    elif isinstance(target, str):
+        root = zarr.open_group(target, mode="a")
+    else:
+        raise ValueError(f"Analysis results can only be saved to a zarr dataset, got {type(target).__name__}.")
+    return root.require_group("/".join(paths))
@@ -0,0 +1,231 @@
+# Copyright 2024 CrackNuts. All rights reserved.
+
+import typing
+
+import numpy as np
+import zarr
+
+from cracknuts import logger
+from cracknuts.analysis._dataset import iter_trace_chunks
+from cracknuts.analysis.models import AesSboxOutput, LeakageModel
+from cracknuts.trace.trace import TraceDataset
+
+
+class CPA:
+    """
+    Streaming correlation power analysis.
+
+    Traces are consumed chunk by chunk and only the sums needed by the Pearson correlation are kept, in float64:
+    the sums of the traces, of the hypotheses, of their squares and of their products. Memory is therefore bounded by
+    the chunk size and the sample count, not by the trace count, and the state of two instances fed with different
+    traces can be merged, e.g. when the traces are processed in parallel.
+
+    The traces are centered on the mean of the first chunk before accumulating, which avoids the cancellation of
+    the raw sums on long runs without changing the correlation.
+    """
+
+    def __init__(self, model: LeakageModel | None = None, byte_indexes: typing.Iterable[int] | None = None):
+        """
+        :param model: The leakage model, the Hamming weight of the AES S-box output by default.
+        :type model: LeakageModel | None
+        :param byte_indexes: The key bytes to attack, the 16 bytes of the AES key by default.
+        :type byte_indexes: typing.Iterable[int] | None
+        """
+        self._logger = logger.get_logger(self)
+        self.model: LeakageModel = model if model is not None else AesSboxOutput()
+        self.byte_indexes: list[int] = list(byte_indexes) if byte_indexes is not None else list(range(16))
+        self._trace_count: int = 0
+        self._sample_count: int | None = None
+        self._trace_offset: np.ndarray | None = None
+        self._sum_t: np.ndarray | None = None
+        self._sum_tt: np.ndarray | None = None
+        self._sum_h: np.ndarray | None = None
+        self._sum_hh: np.ndarray | None = None
+        self._sum_ht: np.ndarray | None = None
+
+    @property
+    def trace_count(self) -> int:
+        """
+        The number of traces accumulated.
+        """
+        return self._trace_count
+
+    @property
+    def sample_count(self) -> int | None:
+        return self._sample_count
+
+    def _init_sums(self, sample_count: int, trace_offset: np.ndarray):
+        byte_count, guess_count = len(self.byte_indexes), self.model.guess_count
+        self._sample_count = sample_count
+        self._trace_offset = trace_offset
+        self._sum_t = np.zeros(sample_count, dtype=np.float64)
+        self._sum_tt = np.zeros(sample_count, dtype=np.float64)
+        self._sum_h = np.zeros((byte_count, guess_count), dtype=np.float64)
+        self._sum_hh = np.zeros((byte_count, guess_count), dtype=np.float64)
+        self._sum_ht = np.zeros((byte_count, guess_count, sample_count), dtype=np.float64)
+
+    def update(self, traces: np.ndarray, data: dict[str, np.ndarray | None]) -> None:
+        """
+        Accumulate a chunk of traces.
+
+        :param traces: The (n, sample_count) traces.
+        :type traces: np.ndarray
+        :param data: The data arrays of the traces as returned by `TraceDataset.get_data_arrays`.
+        :type data: dict[str, np.ndarray | None]
+        """
+        if len(traces) == 0:
+            return
+        traces = np.asarray(traces, dtype=np.float64)
+        if self._sample_count is None:
+            self._init_sums(traces.shape[1], traces.mean(axis=0))
+        elif traces.shape[1] != self._sample_count:
+            raise ValueError(f"The sample count {traces.shape[1]} differs from the previous {self._sample_count}.")
+        traces -= self._trace_offset
+
+        self._trace_count += len(traces)
+        self._sum_t += traces.sum(axis=0)
+        self._sum_tt += np.einsum("ij,ij->j", traces, traces)
+        for i, byte_index in enumerate(self.byte_indexes):
+            hypotheses = self.model.hypotheses(data, byte_index).astype(np.float64)
+            self._sum_h[i] += hypotheses.sum(axis=0)
+            self._sum_hh[i] += np.einsum("ij,ij->j", hypotheses, hypotheses)
+            self._sum_ht[i] += hypotheses.T @ traces
+
+    def merge(self, other: "CPA") -> None:
+        """
+        Merge the sums accumulated by another instance with the same model and key bytes.
+
+        :param other: The other instance.
+        :type other: CPA
+        """
+        if other.byte_indexes != self.byte_indexes or other.model.guess_count != self.model.guess_count:
+            raise ValueError("Only CPA instances attacking the same key bytes can be merged.")
+        if other._trace_count == 0:
+            return
+        if self._sample_count is None:
+            self._init_sums(other._sample_count, other._trace_offset.copy())
+        elif other._sample_count != self._sample_count:
+            raise ValueError(f"The sample count {other._sample_count} differs from {self._sample_count}.")
+        # Move the sums of the other instance to the trace offset of this one.
+        delta = other._trace_offset - self._trace_offset
+        self._sum_tt += other._sum_tt + 2 * delta * other._sum_t + other._trace_count * delta**2
+        self._sum_t += other._sum_t + other._trace_count * delta
+        self._sum_ht += other._sum_ht + other._sum_h[:, :, None] * delta
+        self._sum_h += other._sum_h
+        self._sum_hh += other._sum_hh
+        self._trace_count += other._trace_count
+
+    def run(
+        self,
+        dataset: TraceDataset,
+        channel_name: str | int = 0,
+        trace_slice: slice = slice(None),
+        chunk_size: int = 1000,
+    ) -> "CPA":
+        """
+        Accumulate the traces of one channel of a dataset, reading `chunk_size` traces at a time.
+
+        :param dataset: The trace dataset.
+        :type dataset: TraceDataset
+        :param channel_name: The channel name or index.
+        :type channel_name: str | int
+        :param trace_slice: The traces to use.
+        :type trace_slice: slice
+        :param chunk_size: The number of traces read at a time.
+        :type chunk_size: int
+        :return: This instance.
+        :rtype: CPA
+        """
+        for traces, data in iter_trace_chunks(dataset, channel_name, chunk_size, trace_slice):
+            self.update(traces, data)
+            self._logger.debug(f"CPA accumulated {self._trace_count} traces.")
+        return self
+
+    def correlation(self, byte_position: int | None = None) -> np.ndarray:
+        """
+        Compute the correlation of each key guess with each sample.
+
+        :param byte_position: The position in `byte_indexes` of the key byte, all key bytes if None.
+        :type byte_position: int | None
+        :return: A (guess_count, sample_count) array for one key byte, or a (guess_count, byte_count, sample_count)
+                 array for all key bytes.
+        :rtype: np.ndarray
+        """
+        if self._trace_count == 0:
+            raise ValueError("No trace has been accumulated.")
+        if byte_position is None:
+            return np.stack([self.correlation(i) for i in range(len(self.byte_indexes))], axis=1)
+        n = self._trace_count
+        sum_h, sum_hh = self._sum_h[byte_position], self._sum_hh[byte_position]
+        numerator = n * self._sum_ht[byte_position] - sum_h[:, None] * self._sum_t[None, :]
+        variance_h = n * sum_hh - sum_h**2
+        variance_t = n * self._sum_tt - self._sum_t**2
+        denominator = np.sqrt(np.maximum(variance_h, 0)[:, None] * np.maximum(variance_t, 0)[None, :])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(denominator > 0, numerator / denominator, 0.0)
+
+    def peak_correlations(self) -> np.ndarray:
+        """
+        The highest absolute correlation over the samples of each key guess.
+
+        :return: A (byte_count, guess_count) array.
+        :rtype: np.ndarray
+        """
+        return np.stack([np.abs(self.correlation(i)).max(axis=1) for i in range(len(self.byte_indexes))])
+
+    def best_guesses(self) -> np.ndarray:
+        """
+        The key guess with the highest absolute correlation peak for each key byte.
+
+        :return: A (byte_count,) array of the best key guesses.
+        :rtype: np.ndarray
+        """
+        return self.peak_correlations().argmax(axis=1)
+
+    def key_ranks(self, key: bytes | np.ndarray) -> np.ndarray:
+        """
+        The rank of the correct key byte among the guesses ordered by their correlation peak, 0 when the correct key
+        byte is the best guess.
+
+        :param key: The correct key, indexed by the key byte indexes.
+        :type key: bytes | np.ndarray
+        :return: A (byte_count,) array of the key ranks.
+        :rtype: np.ndarray
+        """
+        key = np.frombuffer(key, dtype=np.uint8) if isinstance(key, bytes | bytearray) else np.asarray(key)
+        peaks = self.peak_correlations()
+        correct_peaks = peaks[np.arange(len(self.byte_indexes)), key[self.byte_indexes]]
+        return (peaks > correct_peaks[:, None]).sum(axis=1)
+
+    def save(self, path: str, dtype: np.dtype = np.float32) -> zarr.hierarchy.Group:
+        """
+        Save the correlation to a zarr group at `/0/0/correlation`, with the (guess, byte, sample) layout displayed
+        by `TracePanelWidget.set_correlation_zarr`. The correlation is computed and written one key byte at a time.
+
+        :param path: The zarr path, it must not hold a zarr group or array yet.
+        :type path: str
+        :param dtype: The dtype of the saved correlation.
+        :type dtype: np.dtype
+        :return: The zarr group.
+        :rtype: zarr.hierarchy.Group
+        :raises ValueError: If nothing has been accumulated, or if `path` already holds a zarr group or array, such
+                            as a trace dataset, which is never overwritten.
+        """
+        if self._trace_count == 0:
+            raise ValueError("No trace has been accumulated.")
+        group = zarr.open_group(path, mode="w-")
+        byte_count = len(self.byte_indexes)
+        correlation = group.create_dataset(
+            "0/0/correlation",
+            shape=(self.model.guess_count, byte_count, self._sample_count),
+            chunks=(self.model.guess_count, 1, min(self._sample_count, 65536)),
+            dtype=dtype,
+        )
+        for i in range(byte_count):
+            correlation[:, i, :] = self.correlation(i)
+        group.attrs["metadata"] = {
+            "trace_count": self._trace_count,
+            "byte_indexes": self.byte_indexes,
+            "model": repr(self.model),
+        }
+        return group
@@ -0,0 +1,276 @@
+# Copyright 2024 CrackNuts. All rights reserved.
+
+import abc
+
+import numpy as np
+
+AES_SBOX = np.array(
+    [
+        0x63, 0x7C, 0x77, 0x7B, 0xF2, 0x6B, 0x6F, 0xC5, 0x30, 0x01, 0x67, 0x2B, 0xFE, 0xD7, 0xAB, 0x76,
+        0xCA, 0x82, 0xC9, 0x7D, 0xFA, 0x59, 0x47, 0xF0, 0xAD, 0xD4, 0xA2, 0xAF, 0x9C, 0xA4, 0x72, 0xC0,
+        0xB7, 0xFD, 0x93, 0x26, 0x36, 0x3F, 0xF7, 0xCC, 0x34, 0xA5, 0xE5, 0xF1, 0x71, 0xD8, 0x31, 0x15,
+        0x04, 0xC7, 0x23, 0xC3, 0x18, 0x96, 0x05, 0x9A, 0x07, 0x12, 0x80, 0xE2, 0xEB, 0x27, 0xB2, 0x75,
+        0x09, 0x83, 0x2C, 0x1A, 0x1B, 0x6E, 0x5A, 0xA0, 0x52, 0x3B, 0xD6, 0xB3, 0x29, 0xE3, 0x2F, 0x84,
+        0x53, 0xD1, 0x00, 0xED, 0x20, 0xFC, 0xB1, 0x5B, 0x6A, 0xCB, 0xBE, 0x39, 0x4A, 0x4C, 0x58, 0xCF,
+        0xD0, 0xEF, 0xAA, 0xFB, 0x43, 0x4D, 0x33, 0x85, 0x45, 0xF9, 0x02, 0x7F, 0x50, 0x3C, 0x9F, 0xA8,
+        0x51, 0xA3, 0x40, 0x8F, 0x92, 0x9D, 0x38, 0xF5, 0xBC, 0xB6, 0xDA, 0x21, 0x10, 0xFF, 0xF3, 0xD2,
+        0xCD, 0x0C, 0x13, 0xEC, 0x5F, 0x97, 0x44, 0x17, 0xC4, 0xA7, 0x7E, 0x3D, 0x64, 0x5D, 0x19, 0x73,
+        0x60, 0x81, 0x4F, 0xDC, 0x22, 0x2A, 0x90, 0x88, 0x46, 0xEE, 0xB8, 0x14, 0xDE, 0x5E, 0x0B, 0xDB,
+        0xE0, 0x32, 0x3A, 0x0A, 0x49, 0x06, 0x24, 0x5C, 0xC2, 0xD3, 0xAC, 0x62, 0x91, 0x95, 0xE4, 0x79,
+        0xE7, 0xC8, 0x37, 0x6D, 0x8D, 0xD5, 0x4E, 0xA9, 0x6C, 0x56, 0xF4, 0xEA, 0x65, 0x7A, 0xAE, 0x08,
+        0xBA, 0x78, 0x25, 0x2E, 0x1C, 0xA6, 0xB4, 0xC6, 0xE8, 0xDD, 0x74, 0x1F, 0x4B, 0xBD, 0x8B, 0x8A,
+        0x70, 0x3E, 0xB5, 0x66, 0x48, 0x03, 0xF6, 0x0E, 0x61, 0x35, 0x57, 0xB9, 0x86, 0xC1, 0x1D, 0x9E,
+        0xE1, 0xF8, 0x98, 0x11, 0x69, 0xD9, 0x8E, 0x94, 0x9B, 0x1E, 0x87, 0xE9, 0xCE, 0x55, 0x28, 0xDF,
+        0x8C, 0xA1, 0x89, 0x0D, 0xBF, 0xE6, 0x42, 0x68, 0x41, 0x99, 0x2D, 0x0F, 0xB0, 0x54, 0xBB, 0x16,
+    ],
+    dtype=np.uint8,
+)  # fmt: skip
+
+AES_INV_SBOX = np.argsort(AES_SBOX).astype(np.uint8)
+
+# The byte of the ciphertext holding, before the last round ShiftRows, the state byte overwritten by byte i.
+AES_INV_SHIFT_ROWS = np.array([0, 5, 10, 15, 4, 9, 14, 3, 8, 13, 2, 7, 12, 1, 6, 11], dtype=np.intp)
+
+SM4_SBOX = np.array(
+    [
+        0xD6, 0x90, 0xE9, 0xFE, 0xCC, 0xE1, 0x3D, 0xB7, 0x16, 0xB6, 0x14, 0xC2, 0x28, 0xFB, 0x2C, 0x05,
+        0x2B, 0x67, 0x9A, 0x76, 0x2A, 0xBE, 0x04, 0xC3, 0xAA, 0x44, 0x13, 0x26, 0x49, 0x86, 0x06, 0x99,
+        0x9C, 0x42, 0x50, 0xF4, 0x91, 0xEF, 0x98, 0x7A, 0x33, 0x54, 0x0B, 0x43, 0xED, 0xCF, 0xAC, 0x62,
+        0xE4, 0xB3, 0x1C, 0xA9, 0xC9, 0x08, 0xE8, 0x95, 0x80, 0xDF, 0x94, 0xFA, 0x75, 0x8F, 0x3F, 0xA6,
+        0x47, 0x07, 0xA7, 0xFC, 0xF3, 0x73, 0x17, 0xBA, 0x83, 0x59, 0x3C, 0x19, 0xE6, 0x85, 0x4F, 0xA8,
+        0x68, 0x6B, 0x81, 0xB2, 0x71, 0x64, 0xDA, 0x8B, 0xF8, 0xEB, 0x0F, 0x4B, 0x70, 0x56, 0x9D, 0x35,
+        0x1E, 0x24, 0x0E, 0x5E, 0x63, 0x58, 0xD1, 0xA2, 0x25, 0x22, 0x7C, 0x3B, 0x01, 0x21, 0x78, 0x87,
+        0xD4, 0x00, 0x46, 0x57, 0x9F, 0xD3, 0x27, 0x52, 0x4C, 0x36, 0x02, 0xE7, 0xA0, 0xC4, 0xC8, 0x9E,
+        0xEA, 0xBF, 0x8A, 0xD2, 0x40, 0xC7, 0x38, 0xB5, 0xA3, 0xF7, 0xF2, 0xCE, 0xF9, 0x61, 0x15, 0xA1,
+        0xE0, 0xAE, 0x5D, 0xA4, 0x9B, 0x34, 0x1A, 0x55, 0xAD, 0x93, 0x32, 0x30, 0xF5, 0x8C, 0xB1, 0xE3,
+        0x1D, 0xF6, 0xE2, 0x2E, 0x82, 0x66, 0xCA, 0x60, 0xC0, 0x29, 0x23, 0xAB, 0x0D, 0x53, 0x4E, 0x6F,
+        0xD5, 0xDB, 0x37, 0x45, 0xDE, 0xFD, 0x8E, 0x2F, 0x03, 0xFF, 0x6A, 0x72, 0x6D, 0x6C, 0x5B, 0x51,
+        0x8D, 0x1B, 0xAF, 0x92, 0xBB, 0xDD, 0xBC, 0x7F, 0x11, 0xD9, 0x5C, 0x41, 0x1F, 0x10, 0x5A, 0xD8,
+        0x0A, 0xC1, 0x31, 0x88, 0xA5, 0xCD, 0x7B, 0xBD, 0x2D, 0x74, 0xD0, 0x12, 0xB8, 0xE5, 0xB4, 0xB0,
+        0x89, 0x69, 0x97, 0x4A, 0x0C, 0x96, 0x77, 0x7E, 0x65, 0xB9, 0xF1, 0x09, 0xC5, 0x6E, 0xC6, 0x84,
+        0x18, 0xF0, 0x7D, 0xEC, 0x3A, 0xDC, 0x4D, 0x20, 0x79, 0xEE, 0x5F, 0x3E, 0xD7, 0xCB, 0x39, 0x48,
+    ],
+    dtype=np.uint8,
+)  # fmt: skip
+
+# The eight DES S-boxes in the standard 4 rows x 16 columns layout.
+_DES_SBOX_ROWS = np.array(
+    [
+        [
+            [14, 4, 13, 1, 2, 15, 11, 8, 3, 10, 6, 12, 5, 9, 0, 7],
+            [0, 15, 7, 4, 14, 2, 13, 1, 10, 6, 12, 11, 9, 5, 3, 8],
+            [4, 1, 14, 8, 13, 6, 2, 11, 15, 12, 9, 7, 3, 10, 5, 0],
+            [15, 12, 8, 2, 4, 9, 1, 7, 5, 11, 3, 14, 10, 0, 6, 13],
+        ],
+        [
+            [15, 1, 8, 14, 6, 11, 3, 4, 9, 7, 2, 13, 12, 0, 5, 10],
+            [3, 13, 4, 7, 15, 2, 8, 14, 12, 0, 1, 10, 6, 9, 11, 5],
+            [0, 14, 7, 11, 10, 4, 13, 1, 5, 8, 12, 6, 9, 3, 2, 15],
+            [13, 8, 10, 1, 3, 15, 4, 2, 11, 6, 7, 12, 0, 5, 14, 9],
+        ],
+        [
+            [10, 0, 9, 14, 6, 3, 15, 5, 1, 13, 12, 7, 11, 4, 2, 8],
+            [13, 7, 0, 9, 3, 4, 6, 10, 2, 8, 5, 14, 12, 11, 15, 1],
+            [13, 6, 4, 9, 8, 15, 3, 0, 11, 1, 2, 12, 5, 10, 14, 7],
+            [1, 10, 13, 0, 6, 9, 8, 7, 4, 15, 14, 3, 11, 5, 2, 12],
+        ],
+        [
+            [7, 13, 14, 3, 0, 6, 9, 10, 1, 2, 8, 5, 11, 12, 4, 15],
+            [13, 8, 11, 5, 6, 15, 0, 3, 4, 7, 2, 12, 1, 10, 14, 9],
+            [10, 6, 9, 0, 12, 11, 7, 13, 15, 1, 3, 14, 5, 2, 8, 4],
+            [3, 15, 0, 6, 10, 1, 13, 8, 9, 4, 5, 11, 12, 7, 2, 14],
+        ],
+        [
+            [2, 12, 4, 1, 7, 10, 11, 6, 8, 5, 3, 15, 13, 0, 14, 9],
+            [14, 11, 2, 12, 4, 7, 13, 1, 5, 0, 15, 10, 3, 9, 8, 6],
+            [4, 2, 1, 11, 10, 13, 7, 8, 15, 9, 12, 5, 6, 3, 0, 14],
+            [11, 8, 12, 7, 1, 14, 2, 13, 6, 15, 0, 9, 10, 4, 5, 3],
+        ],
+        [
+            [12, 1, 10, 15, 9, 2, 6, 8, 0, 13, 3, 4, 14, 7, 5, 11],
+            [10, 15, 4, 2, 7, 12, 9, 5, 6, 1, 13, 14, 0, 11, 3, 8],
+            [9, 14, 15, 5, 2, 8, 12, 3, 7, 0, 4, 10, 1, 13, 11, 6],
+            [4, 3, 2, 12, 9, 5, 15, 10, 11, 14, 1, 7, 6, 0, 8, 13],
+        ],
+        [
+            [4, 11, 2, 14, 15, 0, 8, 13, 3, 12, 9, 7, 5, 10, 6, 1],
+            [13, 0, 11, 7, 4, 9, 1, 10, 14, 3, 5, 12, 2, 15, 8, 6],
+            [1, 4, 11, 13, 12, 3, 7, 14, 10, 15, 6, 8, 0, 5, 9, 2],
+            [6, 11, 13, 8, 1, 4, 10, 7, 9, 5, 0, 15, 14, 2, 3, 12],
+        ],
+        [
+            [13, 2, 8, 4, 6, 15, 11, 1, 10, 9, 3, 14, 5, 0, 12, 7],
+            [1, 15, 13, 8, 10, 3, 7, 4, 12, 5, 6, 11, 0, 14, 9, 2],
+            [7, 11, 4, 1, 9, 12, 14, 2, 0, 6, 10, 13, 15, 3, 5, 8],
+            [2, 1, 14, 7, 4, 10, 8, 13, 15, 12, 9, 0, 3, 5, 6, 11],
+        ],
+    ],
+    dtype=np.uint8,
+)
+
+# The S-boxes indexed directly by their 6-bit input: the outer bits select the row and the inner bits the column.
+_DES_INPUTS = np.arange(64)
+DES_SBOX = _DES_SBOX_ROWS[:, ((_DES_INPUTS >> 4) & 0b10) | (_DES_INPUTS & 1), (_DES_INPUTS >> 1) & 0xF]
+
+# The initial permutation and the expansion, numbered from 1 as in FIPS 46-3.
+_DES_IP = np.array(
+    [
+        58, 50, 42, 34, 26, 18, 10, 2, 60, 52, 44, 36, 28, 20, 12, 4,
+        62, 54, 46, 38, 30, 22, 14, 6, 64, 56, 48, 40, 32, 24, 16, 8,
+        57, 49, 41, 33, 25, 17, 9, 1, 59, 51, 43, 35, 27, 19, 11, 3,
+        61, 53, 45, 37, 29, 21, 13, 5, 63, 55, 47, 39, 31, 23, 15, 7,
+    ]
+)  # fmt: skip
+_DES_E = np.array(
+    [
+        32, 1, 2, 3, 4, 5, 4, 5, 6, 7, 8, 9, 8, 9, 10, 11, 12, 13, 12, 13, 14, 15, 16, 17,
+        16, 17, 18, 19, 20, 21, 20, 21, 22, 23, 24, 25, 24, 25, 26, 27, 28, 29, 28, 29, 30, 31, 32, 1,
+    ]
+)  # fmt: skip
+
+# The plaintext bits, numbered from 0 at the most significant bit, forming the 6-bit input E(R0) of each S-box.
+DES_SBOX_INPUT_BITS = (_DES_IP[32 + _DES_E - 1] - 1).reshape(8, 6)
+
+HW = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+HD = HW[np.bitwise_xor.outer(np.arange(256, dtype=np.uint8), np.arange(256, dtype=np.uint8))]
+
+
+def _guess_table(sbox: np.ndarray, leakage: np.ndarray | None = None) -> np.ndarray:
+    # table[x, k] = leakage[sbox[x ^ k]], so the hypotheses of a chunk are a single lookup table[x]
+    inputs = np.arange(len(sbox), dtype=np.uint8)
+    values = sbox[np.bitwise_xor.outer(inputs, inputs)]
+    return leakage[values] if leakage is not None else values
+
+
+class LeakageModel(abc.ABC):
+    """
+    A leakage model maps the data of a trace and a guess of one key byte to the hypothetical leakage of the
+    device. Models are evaluated on whole chunks of traces at once.
+    """
+
+    guess_count: int = 256
+
+    @abc.abstractmethod
+    def hypotheses(self, data: dict[str, np.ndarray | None], byte_index: int) -> np.ndarray:
+        """
+        Compute the hypothetical leakage of one key byte for every trace and every key guess.
+
+        :param data: The data arrays of the traces as returned by `TraceDataset.get_data_arrays`, each value is an
+                     (n, length) uint8 array.
+        :type data: dict[str, np.ndarray | None]
+        :param byte_index: The index of the key byte.
+        :type byte_index: int
+        :return: An (n, guess_count) array of the hypothetical leakage.
+        :rtype: np.ndarray
+        """
+        ...
+
+    @staticmethod
+    def _get_data(data: dict[str, np.ndarray | None], name: str) -> np.ndarray:
+        array = data.get(name)
+        if array is None:
+            raise ValueError(f"The leakage model requires the {name} of the traces.")
+        return array
+
+
+class AesSboxOutput(LeakageModel):
+    """
+    The output of the AES S-box in the first round: `SBOX[plaintext[i] ^ key[i]]`, leaking either its Hamming
+    weight or its value.
+    """
+
+    def __init__(self, hamming_weight: bool = True):
+        """
+        :param hamming_weight: True for the Hamming weight model, False for the identity model.
+        :type hamming_weight: bool
+        """
+        self.hamming_weight: bool = hamming_weight
+        self._table = _guess_table(AES_SBOX, HW if hamming_weight else None)
+
+    def hypotheses(self, data: dict[str, np.ndarray | None], byte_index: int) -> np.ndarray:
+        return self._table[self._get_data(data, "plaintext")[:, byte_index]]
+
+    def __repr__(self):
+        return f"AesSboxOutput(hamming_weight={self.hamming_weight})"
+
+
+class AesLastRound(LeakageModel):
+    """
+    The input of the AES S-box in the last round, recovered from the ciphertext with a guess of the last round key
+    byte: `INV_SBOX[ciphertext[i] ^ key[i]]`. The key guessed is the last round key, not the cipher key.
+
+    With the Hamming distance model, the leakage is the distance between this value and the ciphertext byte that
+    replaces it in the state register, as in hardware implementations computing one round per clock cycle.
+    """
+
+    def __init__(self, hamming_distance: bool = True):
+        """
+        :param hamming_distance: True for the Hamming distance to the ciphertext, False for the Hamming weight.
+        :type hamming_distance: bool
+        """
+        self.hamming_distance: bool = hamming_distance
+        self._table = _guess_table(AES_INV_SBOX)
+
+    def hypotheses(self, data: dict[str, np.ndarray | None], byte_index: int) -> np.ndarray:
+        ciphertext = self._get_data(data, "ciphertext")
+        values = self._table[ciphertext[:, byte_index]]
+        if not self.hamming_distance:
+            return HW[values]
+        return HD[values, ciphertext[:, AES_INV_SHIFT_ROWS[byte_index], None]]
+
+    def __repr__(self):
+        return f"AesLastRound(hamming_distance={self.hamming_distance})"
+
+
+class Sm4SboxOutput(LeakageModel):
+    """
+    The output of the SM4 S-box in the first round: `SBOX[(X1 ^ X2 ^ X3)[i] ^ rk0[i]]`, where X1, X2 and X3 are the
+    last three words of the plaintext. The key guessed is one of the 4 bytes of the first round key rk0.
+    """
+
+    def __init__(self, hamming_weight: bool = True):
+        """
+        :param hamming_weight: True for the Hamming weight model, False for the identity model.
+        :type hamming_weight: bool
+        """
+        self.hamming_weight: bool = hamming_weight
+        self._table = _guess_table(SM4_SBOX, HW if hamming_weight else None)
+
+    def hypotheses(self, data: dict[str, np.ndarray | None], byte_index: int) -> np.ndarray:
+        if not 0 <= byte_index < 4:
+            raise ValueError(f"The SM4 round key byte index must be in [0, 4), got {byte_index}.")
+        plaintext = self._get_data(data, "plaintext")
+        inputs = plaintext[:, 4 + byte_index] ^ plaintext[:, 8 + byte_index] ^ plaintext[:, 12 + byte_index]
+        return self._table[inputs]
+
+    def __repr__(self):
+        return f"Sm4SboxOutput(hamming_weight={self.hamming_weight})"
+
+
+class DesSboxOutput(LeakageModel):
+    """
+    The output of one of the eight DES S-boxes in the first round: `S[E(R0) ^ K1]`, where R0 is the right half of
+    the initial permutation of the plaintext. The byte index selects the S-box and the key guessed is its 6-bit
+    chunk of the first round subkey K1, hence 64 guesses.
+    """
+
+    guess_count: int = 64
+
+    def __init__(self, hamming_weight: bool = True):
+        """
+        :param hamming_weight: True for the Hamming weight model, False for the identity model.
+        :type hamming_weight: bool
+        """
+        self.hamming_weight: bool = hamming_weight
+        self._tables = np.stack([_guess_table(sbox, HW if hamming_weight else None) for sbox in DES_SBOX])
+
+    def hypotheses(self, data: dict[str, np.ndarray | None], byte_index: int) -> np.ndarray:
+        if not 0 <= byte_index < 8:
+            raise ValueError(f"The DES S-box index must be in [0, 8), got {byte_index}.")
+        bits = np.unpackbits(self._get_data(data, "plaintext")[:, :8], axis=1)
+        inputs = bits[:, DES_SBOX_INPUT_BITS[byte_index]].astype(np.intp) @ (1 << np.arange(5, -1, -1))
+        return self._tables[byte_index][inputs]
+
+    def __repr__(self):
+        return f"DesSboxOutput(hamming_weight={self.hamming_weight})"
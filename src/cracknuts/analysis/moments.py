@@ -0,0 +1,89 @@
+# Copyright 2024 CrackNuts. All rights reserved.
+
+from math import comb
+
+import numpy as np
+
+
+class CentralMoments:
+    """
+    Per-sample central moments of a stream of traces, up to a given order.
+
+    The mean and the central moment sums `M_p = sum((x - mean) ** p)` are accumulated one chunk at a time with the
+    pairwise update of Pébay, which is numerically stable and lets two accumulators fed with different traces be
+    merged exactly.
+    """
+
+    def __init__(self, max_order: int):
+        """
+        :param max_order: The highest central moment to accumulate, at least 2.
+        :type max_order: int
+        """
+        if max_order < 2:
+            raise ValueError("The max order of the central moments must be at least 2.")
+        self.max_order: int = max_order
+        self.count: int = 0
+        self.mean: np.ndarray | None = None
+        # sums[p] is the p-th central moment sum, sums[0] and sums[1] are unused.
+        self.sums: np.ndarray | None = None
+
+    def update(self, traces: np.ndarray) -> None:
+        """
+        Accumulate a chunk of traces.
+
+        :param traces: The (n, sample_count) traces.
+        :type traces: np.ndarray
+        """
+        if len(traces) == 0:
+            return
+        traces = np.asarray(traces, dtype=np.float64)
+        chunk = CentralMoments(self.max_order)
+        chunk.count = len(traces)
+        chunk.mean = traces.mean(axis=0)
+        chunk.sums = np.zeros((self.max_order + 1, traces.shape[1]), dtype=np.float64)
+        centered = traces - chunk.mean
+        power = centered.copy()
+        for p in range(2, self.max_order + 1):
+            power *= centered
+            chunk.sums[p] = power.sum(axis=0)
+        self.merge(chunk)
+
+    def merge(self, other: "CentralMoments") -> None:
+        """
+        Merge the moments accumulated by another instance.
+
+        :param other: The other instance, with the same max order.
+        :type other: CentralMoments
+        """
+        if other.max_order != self.max_order:
+            raise ValueError(f"Cannot merge central moments of max order {other.max_order} into {self.max_order}.")
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.sums = other.count, other.mean.copy(), other.sums.copy()
+            return
+        n_a, n_b = self.count, other.count
+        n = n_a + n_b
+        delta = other.mean - self.mean
+        # Update the highest order first, the lower order sums on the right side are the ones before merging.
+        for p in range(self.max_order, 1, -1):
+            merged = self.sums[p] + other.sums[p]
+            for k in range(1, p - 1):
+                merged += (
+                    comb(p, k) * delta**k * ((-n_b / n) ** k * self.sums[p - k] + (n_a / n) ** k * other.sums[p - k])
+                )
+            merged += (n_a * n_b / n * delta) ** p * (1 / n_b ** (p - 1) - (-1 / n_a) ** (p - 1))
+            self.sums[p] = merged
+        self.mean = self.mean + delta * n_b / n
+        self.count = n
+
+    def central_moment(self, order: int) -> np.ndarray:
+        """
+        The central moment `M_p / n` of the given order, the variance for order 2.
+
+        :param order: The order, between 2 and `max_order`.
+        :type order: int
+        :return: The (sample_count,) central moment.
+        :rtype: np.ndarray
+        """
+        return self.sums[order] / self.count
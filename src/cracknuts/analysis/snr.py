@@ -0,0 +1,194 @@
+# Copyright 2024 CrackNuts. All rights reserved.
+
+import typing
+
+import numpy as np
+import zarr
+
+from cracknuts import logger
+from cracknuts.analysis._dataset import iter_trace_chunks, open_result_group
+from cracknuts.analysis.models import AES_SBOX, LeakageModel
+from cracknuts.trace.trace import TraceDataset
+
+
+class SNR:
+    """
+    Streaming signal-to-noise ratio per intermediate value class, used to find the points of interest.
+
+    For each targeted byte the traces are partitioned into 256 classes by the value of an intermediate, and the
+    per-class sums of the traces and their squares are accumulated in float64. The SNR of a sample is the variance of
+    the class means divided by the mean of the class variances, over the classes that received traces.
+    """
+
+    INTERMEDIATE_PLAINTEXT = "plaintext"
+    INTERMEDIATE_SBOX = "sbox"
+
+    _CLASS_COUNT = 256
+
+    def __init__(
+        self,
+        intermediate: str | typing.Callable[[dict[str, np.ndarray | None], int], np.ndarray] = INTERMEDIATE_SBOX,
+        byte_indexes: typing.Iterable[int] | None = None,
+    ):
+        """
+        :param intermediate: The intermediate defining the classes: "plaintext" for the plaintext byte, "sbox" for
+                             the AES S-box output `SBOX[plaintext ^ key]` using the stored key, or a function mapping
+                             the data arrays and a byte index to the (n,) uint8 class of each trace.
+        :type intermediate: str | typing.Callable[[dict[str, np.ndarray | None], int], np.ndarray]
+        :param byte_indexes: The targeted bytes, the 16 bytes of an AES block by default.
+        :type byte_indexes: typing.Iterable[int] | None
+        """
+        self._logger = logger.get_logger(self)
+        if isinstance(intermediate, str) and intermediate not in (
+            self.INTERMEDIATE_PLAINTEXT,
+            self.INTERMEDIATE_SBOX,
+        ):
+            raise ValueError(f"Unsupported intermediate: {intermediate}")
+        self.intermediate = intermediate
+        self.byte_indexes: list[int] = list(byte_indexes) if byte_indexes is not None else list(range(16))
+        self._sample_count: int | None = None
+        self._trace_offset: np.ndarray | None = None
+        self._class_counts: np.ndarray = np.zeros((len(self.byte_indexes), self._CLASS_COUNT), dtype=np.int64)
+        self._class_sums: np.ndarray | None = None
+        self._class_square_sums: np.ndarray | None = None
+
+    @property
+    def trace_count(self) -> int:
+        """
+        The number of traces accumulated.
+        """
+        return int(self._class_counts[0].sum()) if len(self.byte_indexes) else 0
+
+    def _init_sums(self, sample_count: int, trace_offset: np.ndarray):
+        shape = (len(self.byte_indexes), self._CLASS_COUNT, sample_count)
+        self._sample_count = sample_count
+        self._trace_offset = trace_offset
+        self._class_sums = np.zeros(shape, dtype=np.float64)
+        self._class_square_sums = np.zeros(shape, dtype=np.float64)
+
+    def _classes(self, data: dict[str, np.ndarray | None], byte_index: int) -> np.ndarray:
+        if callable(self.intermediate):
+            return np.asarray(self.intermediate(data, byte_index), dtype=np.uint8)
+        plaintext = LeakageModel._get_data(data, "plaintext")[:, byte_index]
+        if self.intermediate == self.INTERMEDIATE_PLAINTEXT:
+            return plaintext
+        return AES_SBOX[plaintext ^ LeakageModel._get_data(data, "key")[:, byte_index]]
+
+    def update(self, traces: np.ndarray, data: dict[str, np.ndarray | None]) -> None:
+        """
+        Accumulate a chunk of traces.
+
+        :param traces: The (n, sample_count) traces.
+        :type traces: np.ndarray
+        :param data: The data arrays of the traces as returned by `TraceDataset.get_data_arrays`.
+        :type data: dict[str, np.ndarray | None]
+        """
+        if len(traces) == 0:
+            return
+        traces = np.asarray(traces, dtype=np.float64)
+        if self._sample_count is None:
+            self._init_sums(traces.shape[1], traces.mean(axis=0))
+        elif traces.shape[1] != self._sample_count:
+            raise ValueError(f"The sample count {traces.shape[1]} differs from the previous {self._sample_count}.")
+        traces -= self._trace_offset
+        square_traces = traces * traces
+        one_hot = np.zeros((len(traces), self._CLASS_COUNT), dtype=np.float64)
+        rows = np.arange(len(traces))
+        for i, byte_index in enumerate(self.byte_indexes):
+            classes = self._classes(data, byte_index)
+            one_hot[rows, classes] = 1
+            self._class_counts[i] += np.bincount(classes, minlength=self._CLASS_COUNT)
+            self._class_sums[i] += one_hot.T @ traces
+            self._class_square_sums[i] += one_hot.T @ square_traces
+            one_hot[rows, classes] = 0
+
+    def merge(self, other: "SNR") -> None:
+        """
+        Merge the sums accumulated by another instance targeting the same bytes.
+
+        :param other: The other instance.
+        :type other: SNR
+        """
+        if other.byte_indexes != self.byte_indexes:
+            raise ValueError("Only SNR instances targeting the same bytes can be merged.")
+        if other._sample_count is None:
+            return
+        if self._sample_count is None:
+            self._init_sums(other._sample_count, other._trace_offset.copy())
+        elif other._sample_count != self._sample_count:
+            raise ValueError(f"The sample count {other._sample_count} differs from {self._sample_count}.")
+        # Move the sums of the other instance to the trace offset of this one.
+        delta = other._trace_offset - self._trace_offset
+        counts = other._class_counts[:, :, None]
+        self._class_square_sums += other._class_square_sums + 2 * delta * other._class_sums + counts * delta**2
+        self._class_sums += other._class_sums + counts * delta
+        self._class_counts += other._class_counts
+
+    def run(
+        self,
+        dataset: TraceDataset,
+        channel_name: str | int = 0,
+        trace_slice: slice = slice(None),
+        chunk_size: int = 1000,
+    ) -> "SNR":
+        """
+        Accumulate the traces of one channel of a dataset, reading `chunk_size` traces at a time.
+
+        :param dataset: The trace dataset.
+        :type dataset: TraceDataset
+        :param channel_name: The channel name or index.
+        :type channel_name: str | int
+        :param trace_slice: The traces to use.
+        :type trace_slice: slice
+        :param chunk_size: The number of traces read at a time.
+        :type chunk_size: int
+        :return: This instance.
+        :rtype: SNR
+        """
+        for traces, data in iter_trace_chunks(dataset, channel_name, chunk_size, trace_slice):
+            self.update(traces, data)
+            self._logger.debug(f"SNR accumulated {self.trace_count} traces.")
+        return self
+
+    def snr(self) -> np.ndarray:
+        """
+        Compute the SNR of each targeted byte.
+
+        :return: The (byte_count, sample_count) SNR.
+        :rtype: np.ndarray
+        """
+        if self._sample_count is None:
+            raise ValueError("No trace has been accumulated.")
+        result = np.zeros((len(self.byte_indexes), self._sample_count), dtype=np.float64)
+        for i in range(len(self.byte_indexes)):
+            present = self._class_counts[i] > 0
+            counts = self._class_counts[i, present][:, None]
+            means = self._class_sums[i, present] / counts
+            variances = np.maximum(self._class_square_sums[i, present] / counts - means**2, 0)
+            noise = variances.mean(axis=0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                result[i] = np.where(noise > 0, means.var(axis=0) / noise, 0.0)
+        return result
+
+    def save(
+        self, target: TraceDataset | zarr.hierarchy.Group | str, channel_name: str | int = 0
+    ) -> zarr.hierarchy.Group:
+        """
+        Save the SNR to the `snr/<channel_name>` group beside the origin traces of a zarr dataset, as a
+        (byte_count, sample_count) `snr` array.
+
+        :param target: The zarr trace dataset, zarr group or zarr path.
+        :type target: TraceDataset | zarr.hierarchy.Group | str
+        :param channel_name: The channel the SNR was computed on.
+        :type channel_name: str | int
+        :return: The result group.
+        :rtype: zarr.hierarchy.Group
+        """
+        group = open_result_group(target, "snr", str(channel_name))
+        group.array("snr", self.snr(), overwrite=True)
+        group.attrs["metadata"] = {
+            "trace_count": self.trace_count,
+            "byte_indexes": self.byte_indexes,
+            "intermediate": self.intermediate if isinstance(self.intermediate, str) else repr(self.intermediate),
+        }
+        return group
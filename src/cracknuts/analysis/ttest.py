@@ -0,0 +1,179 @@
+# Copyright 2024 CrackNuts. All rights reserved.
+
+import numpy as np
+import zarr
+
+from cracknuts import logger
+from cracknuts.analysis._dataset import iter_trace_chunks, open_result_group
+from cracknuts.analysis.moments import CentralMoments
+from cracknuts.trace.trace import TraceDataset
+
+
+class TTest:
+    """
+    Streaming Welch t-test for test vector leakage assessment (TVLA), fixed versus random.
+
+    The traces of the two groups are accumulated in one pass into `CentralMoments` of order `2 * max_order`, from
+    which the t-statistics of order 1 to `max_order` are derived following Schneider and Moradi: the order 1 test
+    compares the means, the order 2 test the variances and the higher orders the standardized moments. Instances can
+    be merged, so a campaign can be split across chunks and processes.
+    """
+
+    THRESHOLD = 4.5
+
+    def __init__(self, max_order: int = 2):
+        """
+        :param max_order: The highest order of the t-test.
+        :type max_order: int
+        """
+        self._logger = logger.get_logger(self)
+        self.max_order: int = max_order
+        self._moments: tuple[CentralMoments, CentralMoments] = (
+            CentralMoments(max(2, 2 * max_order)),
+            CentralMoments(max(2, 2 * max_order)),
+        )
+
+    @property
+    def trace_counts(self) -> tuple[int, int]:
+        """
+        The number of traces accumulated in the fixed (0) and random (1) groups.
+        """
+        return self._moments[0].count, self._moments[1].count
+
+    def update(self, traces: np.ndarray, labels: np.ndarray) -> None:
+        """
+        Accumulate a chunk of traces.
+
+        :param traces: The (n, sample_count) traces.
+        :type traces: np.ndarray
+        :param labels: The (n,) group of each trace, zero for the fixed group and non-zero for the random group.
+        :type labels: np.ndarray
+        """
+        labels = np.asarray(labels).reshape(-1) != 0
+        if len(labels) != len(traces):
+            raise ValueError(f"Got {len(labels)} labels for {len(traces)} traces.")
+        self._moments[0].update(traces[~labels])
+        self._moments[1].update(traces[labels])
+
+    def update_with_data(
+        self,
+        traces: np.ndarray,
+        data: dict[str, np.ndarray | None],
+        label_data: str = "extended",
+        label_byte: int = 0,
+    ) -> None:
+        """
+        Accumulate a chunk of traces whose groups are stored in their data.
+
+        :param traces: The (n, sample_count) traces.
+        :type traces: np.ndarray
+        :param data: The data arrays of the traces as returned by `TraceDataset.get_data_arrays`.
+        :type data: dict[str, np.ndarray | None]
+        :param label_data: The data holding the labels: plaintext, ciphertext, key or extended.
+        :type label_data: str
+        :param label_byte: The byte of the data holding the label, zero for the fixed group.
+        :type label_byte: int
+        """
+        labels = data.get(label_data)
+        if labels is None:
+            raise ValueError(f"The dataset does not contain the {label_data} data holding the t-test labels.")
+        self.update(traces, labels[:, label_byte])
+
+    def merge(self, other: "TTest") -> None:
+        """
+        Merge the moments accumulated by another instance with the same max order.
+
+        :param other: The other instance.
+        :type other: TTest
+        """
+        if other.max_order != self.max_order:
+            raise ValueError(f"Cannot merge a t-test of max order {other.max_order} into {self.max_order}.")
+        for moments, other_moments in zip(self._moments, other._moments):
+            moments.merge(other_moments)
+
+    def run(
+        self,
+        dataset: TraceDataset,
+        channel_name: str | int = 0,
+        trace_slice: slice = slice(None),
+        chunk_size: int = 1000,
+        label_data: str = "extended",
+        label_byte: int = 0,
+    ) -> "TTest":
+        """
+        Accumulate the traces of one channel of a dataset, reading `chunk_size` traces at a time. The group of each
+        trace is read from its stored data, by default the first byte of the extended data.
+
+        :param dataset: The trace dataset.
+        :type dataset: TraceDataset
+        :param channel_name: The channel name or index.
+        :type channel_name: str | int
+        :param trace_slice: The traces to use.
+        :type trace_slice: slice
+        :param chunk_size: The number of traces read at a time.
+        :type chunk_size: int
+        :param label_data: The data holding the labels: plaintext, ciphertext, key or extended.
+        :type label_data: str
+        :param label_byte: The byte of the data holding the label, zero for the fixed group.
+        :type label_byte: int
+        :return: This instance.
+        :rtype: TTest
+        """
+        for traces, data in iter_trace_chunks(dataset, channel_name, chunk_size, trace_slice):
+            self.update_with_data(traces, data, label_data, label_byte)
+            self._logger.debug(f"T-test accumulated {self.trace_counts} traces.")
+        return self
+
+    def t(self, order: int = 1) -> np.ndarray:
+        """
+        Compute the Welch t-statistic of the given order.
+
+        :param order: The order, between 1 and `max_order`.
+        :type order: int
+        :return: The (sample_count,) t-statistics.
+        :rtype: np.ndarray
+        """
+        if not 1 <= order <= self.max_order:
+            raise ValueError(f"The order must be between 1 and {self.max_order}.")
+        if min(self.trace_counts) < 2:
+            raise ValueError("Both groups need at least two traces.")
+        means, variances = [], []
+        for moments in self._moments:
+            if order == 1:
+                mean, variance = moments.mean, moments.central_moment(2)
+            elif order == 2:
+                mean = moments.central_moment(2)
+                variance = moments.central_moment(4) - mean**2
+            else:
+                standard = moments.central_moment(2)
+                mean = moments.central_moment(order) / standard ** (order / 2)
+                variance = (moments.central_moment(2 * order) - moments.central_moment(order) ** 2) / standard**order
+            means.append(mean)
+            variances.append(variance)
+        n_0, n_1 = self.trace_counts
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = (means[0] - means[1]) / np.sqrt(variances[0] / n_0 + variances[1] / n_1)
+        return np.nan_to_num(t, nan=0.0, posinf=0.0, neginf=0.0)
+
+    def save(
+        self, target: TraceDataset | zarr.hierarchy.Group | str, channel_name: str | int = 0
+    ) -> zarr.hierarchy.Group:
+        """
+        Save the t-statistics to the `ttest/<channel_name>` group beside the origin traces of a zarr dataset, as a
+        (max_order, sample_count) `t` array.
+
+        :param target: The zarr trace dataset, zarr group or zarr path.
+        :type target: TraceDataset | zarr.hierarchy.Group | str
+        :param channel_name: The channel the t-test was computed on.
+        :type channel_name: str | int
+        :return: The result group.
+        :rtype: zarr.hierarchy.Group
+        """
+        group = open_result_group(target, "ttest", str(channel_name))
+        group.array("t", np.stack([self.t(order) for order in range(1, self.max_order + 1)]), overwrite=True)
+        group.attrs["metadata"] = {
+            "max_order": self.max_order,
+            "trace_counts": list(self.trace_counts),
+            "threshold": self.THRESHOLD,
+        }
+        return group
@@ -8,6 +8,7 @@ import logging
 import os
 import socket
 import struct
+import sys
 import threading
 from abc import ABC
 from dataclasses import dataclass
@@ -144,6 +145,9 @@ class CrackerBasic[T: ConfigBasic](ABC):
         self._command_lock = threading.Lock()
         self._logger = logger.get_logger(self)
         self._socket: socket.socket | None = None
+        # Reusable receive buffers, only accessed while holding `_command_lock`.
+        self._recv_header_buffer = bytearray(protocol.RES_HEADER_SIZE)
+        self._recv_buffer = bytearray()
         self._connection_status = False
         self._bin_server_path = bin_server_path
         self._bin_bitstream_path = bin_bitstream_path
@@ -689,14 +693,20 @@ class CrackerBasic[T: ConfigBasic](ABC):
         """
         return self._connection_status
 
-    def send_and_receive(self, message: bytes) -> tuple[int, bytes | None]:
+    def send_and_receive(
+        self, message: bytes, payload_buffer: memoryview | None = None
+    ) -> tuple[int, bytes | memoryview | None]:
         """
         Send message to cracker device.
 
         :param message: The byte message to send.
         :type message: bytes
+        :param payload_buffer: A writable byte buffer to receive the response payload into directly.
+                               If the payload fits, the returned payload is a memoryview on this buffer
+                               instead of a new bytes object.
+        :type payload_buffer: memoryview | None
         :return: Received message in format: (status, message).
-        :rtype: tuple[int, bytes | None]
+        :rtype: tuple[int, bytes | memoryview | None]
         """
         if self._socket is None:
             self._logger.error("Cracker not connected")
@@ -713,7 +723,8 @@ class CrackerBasic[T: ConfigBasic](ABC):
                     }"
                 )
             self._socket.sendall(message)
-            resp_header = self._socket.recv(protocol.RES_HEADER_SIZE)
+            resp_header = self._recv_header_buffer
+            self._recv_into(memoryview(resp_header))
             if self._logger.isEnabledFor(logging.DEBUG):
                 self._logger.debug(
                     "Get response header from %s: \n%s",
@@ -738,11 +749,14 @@ class CrackerBasic[T: ConfigBasic](ABC):
                 )
             if length == 0:
                 resp_payload = None
+            elif payload_buffer is not None and length <= len(payload_buffer):
+                resp_payload = payload_buffer[:length]
+                self._recv_into(resp_payload)
             else:
                 resp_payload = self._recv(length)
             if status != protocol.STATUS_OK:
                 try:
-                    resp_payload_str = resp_payload.decode("utf-8") if resp_payload is not None else ""
+                    resp_payload_str = bytes(resp_payload).decode("utf-8") if resp_payload is not None else ""
                 except UnicodeDecodeError:
                     resp_payload_str = hex_util.get_hex(resp_payload, max_len=len(resp_payload))
                 req_command, req_payload = protocol.unpack_send_message(message)
@@ -774,17 +788,29 @@ class CrackerBasic[T: ConfigBasic](ABC):
         finally:
             self._command_lock.release()
 
-    def _recv(self, length):
-        resp_payload = b""
-        while (received_len := len(resp_payload)) < length:
-            for_receive_len = length - received_len
-            resp_payload += self._socket.recv(for_receive_len)
-
-        return resp_payload
+    def _recv(self, length: int) -> bytes:
+        if len(self._recv_buffer) < length:
+            self._recv_buffer = bytearray(length)
+        view = memoryview(self._recv_buffer)[:length]
+        self._recv_into(view)
+        return bytes(view)
+
+    def _recv_into(self, view: memoryview) -> None:
+        length = len(view)
+        received = 0
+        while received < length:
+            received_len = self._socket.recv_into(view[received:], length - received)
+            if received_len == 0:
+                raise ConnectionError(f"Connection closed while receiving, got {received} of {length} bytes.")
+            received += received_len
 
     def send_with_command(
-        self, command: int, rfu: int = 0, payload: str | bytes | None = None
-    ) -> tuple[int, bytes | None]:
+        self,
+        command: int,
+        rfu: int = 0,
+        payload: str | bytes | None = None,
+        response_buffer: memoryview | None = None,
+    ) -> tuple[int, bytes | memoryview | None]:
         if isinstance(payload, str):
             payload = bytes.fromhex(payload)
         if self._logger.isEnabledFor(logging.INFO):
@@ -793,7 +819,7 @@ class CrackerBasic[T: ConfigBasic](ABC):
                 f"{None if payload is None else hex_util.get_hex(payload, self._logger_info_payload_max_length)}] "
                 f"to {self._server_address}"
             )
-        status, payload = self.send_and_receive(protocol.build_send_message(command, rfu, payload))
+        status, payload = self.send_and_receive(protocol.build_send_message(command, rfu, payload), response_buffer)
         if self._logger.isEnabledFor(logging.INFO):
             self._logger.info(
                 f"Receive response for command: [0x{command:04x}] from {self._server_address}, "
@@ -965,11 +991,15 @@ class CrackerBasic[T: ConfigBasic](ABC):
                 res_code = int.from_bytes(res, "big")
                 return status, res_code == 4
 
-    def osc_get_wave(self, channel: int | str, offset: int, sample_count: int) -> tuple[int, np.ndarray | None]:
-        return self.osc_get_analog_wave(channel, offset, sample_count)
+    def osc_get_wave(
+        self, channel: int | str, offset: int, sample_count: int, out: np.ndarray | None = None
+    ) -> tuple[int, np.ndarray | None]:
+        return self.osc_get_analog_wave(channel, offset, sample_count, out)
 
     @connection_status_check
-    def osc_get_analog_wave(self, channel: int, offset: int, sample_count: int) -> tuple[int, np.ndarray | None]:
+    def osc_get_analog_wave(
+        self, channel: int, offset: int, sample_count: int, out: np.ndarray | None = None
+    ) -> tuple[int, np.ndarray | None]:
         """
         Get the analog wave.
 
@@ -979,6 +1009,10 @@ class CrackerBasic[T: ConfigBasic](ABC):
         :type offset: int
         :param sample_count: the sample count of the analog wave.
         :type sample_count: int
+        :param out: A contiguous int16 array with at least `sample_count` elements to receive the wave into.
+                    The returned wave is then a view on it, so reusing the same array for repeated fetches
+                    allocates nothing. If it is None, a new array is allocated for each fetch.
+        :type out: np.ndarray | None
         :return: the analog wave.
         :rtype: tuple[int, np.ndarray]
         """
@@ -990,40 +1024,48 @@ class CrackerBasic[T: ConfigBasic](ABC):
             channel = channels.index(channel)
         payload = struct.pack(">BII", channel, offset, sample_count)
         self._logger.debug(f"scrat_get_analog_wave payload: {payload.hex()}")
-        status, wave_bytes = self.send_with_command(protocol.Command.OSC_GET_ANALOG_WAVES, payload=payload)
-        if status != protocol.STATUS_OK:
-            return status, np.array([])
-        else:
-            if wave_bytes is None:
-                return status, np.array([])
-            else:
-                wbl = len(wave_bytes)
-                expect_wbl = sample_count * 2
-                if wbl != expect_wbl:
-                    self._logger.error(
-                        f"Wave bytes length error: require {expect_wbl} but get {wbl}:\n{hex_util.get_hex(wave_bytes)}"
-                    )
-                    if wbl != 0:
-                        self._logger.error("Wave bytes length is not expected, will get actually length wave.")
-                        if wbl % 2 != 0:
-                            self._logger.error("Wave bytes length is a odd number, will get a even length wave.")
-                        wave = struct.unpack(f"{wbl // 2}h", wave_bytes)
-                        return status, np.array(wave, dtype=np.int16)
-                    else:
-                        return status, np.array([])
-                else:
-                    wave = struct.unpack(f"{sample_count}h", wave_bytes)
-                    return status, np.array(wave, dtype=np.int16)
-
-    def osc_get_digital_wave(self, channel: int, offset: int, sample_count: int) -> tuple[int, np.ndarray]:
+        return self._get_wave(protocol.Command.OSC_GET_ANALOG_WAVES, payload, sample_count, out)
+
+    def osc_get_digital_wave(
+        self, channel: int, offset: int, sample_count: int, out: np.ndarray | None = None
+    ) -> tuple[int, np.ndarray]:
         payload = struct.pack(">BII", channel, offset, sample_count)
         self._logger.debug(f"scrat_get_digital_wave payload: {payload.hex()}")
-        status, wave_bytes = self.send_with_command(protocol.Command.OSC_GET_ANALOG_WAVES, payload=payload)
-        if status != protocol.STATUS_OK:
+        return self._get_wave(protocol.Command.OSC_GET_ANALOG_WAVES, payload, sample_count, out)
+
+    def _get_wave(
+        self, command: int, payload: bytes, sample_count: int, out: np.ndarray | None
+    ) -> tuple[int, np.ndarray | None]:
+        if out is None:
+            out = np.empty(sample_count, dtype=np.int16)
+        elif out.dtype != np.int16 or not out.flags.c_contiguous or not out.flags.writeable or out.size < sample_count:
+            self._logger.error(
+                f"The out array must be a writable contiguous int16 array with at least {sample_count} elements."
+            )
+            return self.NON_PROTOCOL_ERROR, None
+        # The wave is received into the memory of `out` directly, without any intermediate bytes object.
+        status, wave_bytes = self.send_with_command(
+            command, payload=payload, response_buffer=memoryview(out.reshape(-1)).cast("B")
+        )
+        if status != protocol.STATUS_OK or wave_bytes is None:
             return status, np.array([])
+        wbl = len(wave_bytes)
+        if isinstance(wave_bytes, memoryview):
+            wave = out.reshape(-1)[: wbl // 2]
+            if sys.byteorder != "little":
+                # The device sends little-endian samples.
+                wave.byteswap(inplace=True)
         else:
-            if wave_bytes is None:
+            # The payload is larger than `out`.
+            wave = np.frombuffer(wave_bytes, dtype="<i2", count=wbl // 2).astype(np.int16)
+        expect_wbl = sample_count * 2
+        if wbl != expect_wbl:
+            self._logger.error(
+                f"Wave bytes length error: require {expect_wbl} but get {wbl}:\n{hex_util.get_hex(wave_bytes)}"
+            )
+            if wbl == 0:
                 return status, np.array([])
-            else:
-                wave = struct.unpack(f"{sample_count}h", wave_bytes)
-                return status, np.array(wave, dtype=np.int16)
+            self._logger.error("Wave bytes length is not expected, will get actually length wave.")
+            if wbl % 2 != 0:
+                self._logger.error("Wave bytes length is a odd number, will get a even length wave.")
+        return status, wave
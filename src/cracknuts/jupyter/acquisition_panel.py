@@ -2,6 +2,7 @@
 
 import os
 import pathlib
+import time
 import typing
 from dataclasses import dataclass
 from typing import Any
@@ -20,6 +21,8 @@ class AcquisitionPanelWidget(MsgHandlerPanelWidget):
 
     acq_status = traitlets.Int(0).tag(sync=True)
     acq_run_progress = traitlets.Dict({"finished": 0, "total": -1}).tag(sync=True)
+    acq_perf_stats = traitlets.Dict({}).tag(sync=True)
+    acq_online_cpa = traitlets.Dict({}).tag(sync=True)
 
     trace_count = traitlets.Int(1000).tag(sync=True)
     sample_offset = traitlets.Int(0).tag(sync=True)
@@ -31,9 +34,12 @@ class AcquisitionPanelWidget(MsgHandlerPanelWidget):
     file_path = traitlets.Unicode("").tag(sync=True)
     trace_fetch_interval = traitlets.Float(2.0).tag(sync=True)
 
+    _PERF_STATS_UPDATE_INTERVAL = 1.0  # second
+
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
         self._logger = logger.get_logger(self)
+        self._perf_stats_update_time = 0.0
         if not hasattr(self, "acquisition"):
             self.acquisition: Acquisition | None = None
             if "acquisition" in kwargs and isinstance(kwargs["acquisition"], Acquisition):
@@ -46,6 +52,7 @@ class AcquisitionPanelWidget(MsgHandlerPanelWidget):
         self.reg_msg_handler("fileSelector", "getDirectoryList", self.msg_get_directory_list)
         self.acquisition.on_status_changed(self.update_acq_status)
         self.acquisition.on_run_progress_changed(self.update_acq_run_progress)
+        self.acquisition.on_online_cpa_result_changed(self.update_acq_online_cpa)
         self.acq_status = self.acquisition.get_status()
         self.sync_config_from_acquisition()
         self.acquisition.on_config_changed(self.on_acq_config_changed)
@@ -111,9 +118,19 @@ class AcquisitionPanelWidget(MsgHandlerPanelWidget):
 
     def update_acq_status(self, status) -> None:
         self.acq_status = status
+        self.update_acq_perf_stats()
 
     def update_acq_run_progress(self, progress: dict[str, int]):
         self.acq_run_progress = progress
+        if time.monotonic() - self._perf_stats_update_time >= self._PERF_STATS_UPDATE_INTERVAL:
+            self.update_acq_perf_stats()
+
+    def update_acq_perf_stats(self) -> None:
+        self._perf_stats_update_time = time.monotonic()
+        self.acq_perf_stats = self.acquisition.get_perf_stats()
+
+    def update_acq_online_cpa(self, result: dict[str, typing.Any]) -> None:
+        self.acq_online_cpa = result
 
     def msg_acq_status_changed(self, changed: dict[str, typing.Any]):
         status = changed.get("status")
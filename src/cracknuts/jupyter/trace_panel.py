@@ -4,6 +4,8 @@ import colorsys
 import functools
 import os
 import pathlib
+import threading
+import time
 import typing
 from dataclasses import dataclass, field
 from numbers import Number
@@ -13,18 +15,42 @@ import zarr
 
 from cracknuts import logger
 from cracknuts.jupyter.panel import MsgHandlerPanelWidget
-from cracknuts.trace.trace import TraceDataset, NumpyTraceDataset, TraceIndexFilter
+from cracknuts.trace.trace import TraceDataset, NumpyTraceDataset, TraceIndexFilter, ZarrTraceDataset
+from cracknuts.trace.pyramid import MinMaxPyramid
 from cracknuts.utils import user_config
 from numpy import ndarray
 from traitlets import traitlets
-from cracknuts.trace.downsample import minmax
+from cracknuts.trace.downsample import envelope, lttb, m4, minmax, minmax_2d
 from numpy.typing import NDArray
 
 
+_SERIES_BUFFER_DTYPES = {
+    np.dtype(t) for t in ("int8", "uint8", "int16", "uint16", "int32", "uint32", "float32", "float64")
+}
+
+
+def _to_series_buffer(data: np.ndarray) -> dict:
+    """
+    将曲线数据编码为二进制缓冲区，通过 comm 的 buffers 通道发送，前端按 dtype 解码为 TypedArray，
+    避免大量曲线数据点以 JSON 列表形式编解码。前端没有对应 TypedArray 的类型（如 int64）转换为 float64。
+
+    :param data: 一维数据
+    :type data: np.ndarray
+    :return: 包含 dtype、length 及 buffer 的字典
+    :rtype: dict
+    """
+    dtype = np.asarray(data).dtype.newbyteorder("=")
+    if dtype not in _SERIES_BUFFER_DTYPES:
+        dtype = np.dtype(np.float64)
+    data = np.ascontiguousarray(data, dtype=dtype)
+    return {"dtype": dtype.name, "length": len(data), "buffer": memoryview(data)}
+
+
 @dataclass
 class _TraceSeriesData:
     name: str
-    data: NDArray[np.int32]
+    x_data: NDArray[np.int32]
+    y_data: NDArray
     color: None | str
     channel_index: int | str
     trace_index: int
@@ -34,7 +60,7 @@ class _TraceSeriesData:
     def to_dict(self) -> dict:
         return {
             "name": self.name,
-            "data": self.data,
+            "data": {"x": _to_series_buffer(self.x_data), "y": _to_series_buffer(self.y_data)},
             "color": self.color,
             "channel_index": self.channel_index,
             "trace_index": self.trace_index,
@@ -61,12 +87,28 @@ def correlation_zarr_substitute(substitute_func_name: str):
     return decorator
 
 
+def selection_change(func):
+    """
+    在内核线程中修改展示的曲线：持有状态锁，使后台线程不会读取到修改了一半的曲线缓存，
+    并增加区间请求序号，使前端丢弃修改前计算的曲线。
+    """
+
+    @functools.wraps(func)
+    def wrapper(self: "TracePanelWidget", *args, **kwargs):
+        with self._state_lock:
+            self._bump_selection_seq()
+            return func(self, *args, **kwargs)
+
+    return wrapper
+
+
 @dataclass
 class _TraceSeries:
     series_data_list: list[_TraceSeriesData] = field(default_factory=list)
     # x_data: ndarray = field(default_factory=lambda: np.empty(0))
     percent_range: list = field(default_factory=lambda: [0, 100])
     range: list = field(default_factory=lambda: [0, 0])
+    seq: int | None = None
 
     def to_dict(self) -> dict:
         return {
@@ -74,9 +116,164 @@ class _TraceSeries:
             # "xData": self.x_data,
             "percentRange": self.percent_range,
             "range": self.range,
+            "seq": self.seq,
         }
 
 
+class _RangeWorker:
+    """
+    在后台线程中处理曲线展示区间的变化。
+
+    拖动滑块时前端会连续发送大量区间请求，这里只保留最新的一个：请求到达后等待 debounce 秒以合并后续请求，
+    尚未开始的请求被新请求替换，正在计算的请求通过传入的 is_stale 检查到有新请求后提前结束。
+    """
+
+    def __init__(self, debounce: float = 0.02, on_error: typing.Callable[[Exception], None] | None = None):
+        """
+        :param debounce: 合并连续请求的等待时间（秒）
+        :type debounce: float
+        :param on_error: 处理函数出错时的回调，用于通知用户
+        :type on_error: typing.Callable[[Exception], None] | None
+        """
+        self._logger = logger.get_logger(self)
+        self._debounce = debounce
+        self._on_error = on_error
+        self._condition = threading.Condition()
+        self._generation = 0
+        self._pending: typing.Callable[[], None] | None = None
+        self._thread: threading.Thread | None = None
+
+    def submit(self, task: typing.Callable[[typing.Callable[[], bool]], None]) -> None:
+        """
+        提交一个区间请求，替换尚未开始的请求并使正在计算的请求过期
+
+        :param task: 处理函数，其参数 is_stale 返回 True 时表示已有更新的请求，应放弃计算
+        :type task: typing.Callable[[typing.Callable[[], bool]], None]
+        """
+        with self._condition:
+            self._generation += 1
+            generation = self._generation
+            self._pending = lambda: task(lambda: self._generation != generation)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None:
+                    self._condition.wait()
+            time.sleep(self._debounce)
+            with self._condition:
+                task, self._pending = self._pending, None
+            try:
+                task()
+            except Exception as e:
+                self._logger.error(f"Change range error: {e}")
+                if self._on_error is not None:
+                    self._on_error(e)
+
+
+class _LazyTraces:
+    """
+    选中曲线的惰性句柄，只保存数据集及通道、曲线索引，不读取曲线。
+    展示时按当前区间分批读取 [start, end) 内的数据点并降采样，面板占用的内存与选中曲线的条数及长度无关。
+    """
+
+    _BATCH_SAMPLES = 16_777_216  # 单批读取的最大数据点数量: 16M
+
+    def __init__(
+        self,
+        dataset: TraceDataset,
+        channel_indices: list[int | str],
+        trace_indices: list[int],
+        arrays: list[zarr.core.Array] | None = None,
+    ):
+        """
+        :param dataset: 曲线数据集
+        :type dataset: TraceDataset
+        :param channel_indices: 选中的通道索引
+        :type channel_indices: list[int | str]
+        :param trace_indices: 选中的曲线索引
+        :type trace_indices: list[int]
+        :param arrays: 各通道的曲线数组，用于 show_trace2 的过滤器（可能是原始分组之外的分组），
+                       为 None 时通过数据集的 get_trace_window 读取
+        :type arrays: list[zarr.core.Array] | None
+        """
+        self.dataset = dataset
+        self.channel_indices = channel_indices
+        self.trace_indices = trace_indices
+        self._arrays = arrays
+        # 平移过的曲线 (通道序号, 曲线序号) -> 平移量，读取时按平移量偏移区间
+        self._shifts: dict[tuple[int, int], int] = {}
+
+    def set_shift(self, c: int, t: int, shift: int) -> None:
+        if shift == 0:
+            self._shifts.pop((c, t), None)
+        else:
+            self._shifts[(c, t)] = shift
+
+    def is_shifted(self, c: int, t: int) -> bool:
+        return (c, t) in self._shifts
+
+    def batches(self, positions: list[int], start: int, end: int) -> typing.Iterator[list[int]]:
+        """
+        将曲线序号按单批数据点数量上限分批
+        """
+        size = max(1, self._BATCH_SAMPLES // max(1, end - start))
+        for i in range(0, len(positions), size):
+            yield positions[i : i + size]
+
+    def read(self, c: int, positions: list[int], start: int, end: int) -> np.ndarray:
+        """
+        读取通道序号 c 中曲线序号为 positions 的曲线在 [start, end) 区间内的数据点
+
+        :return: (len(positions), end - start) 的曲线
+        :rtype: np.ndarray
+        """
+        trace_indices = [self.trace_indices[t] for t in positions]
+        if trace_indices and trace_indices == list(range(trace_indices[0], trace_indices[-1] + 1)):
+            selection = slice(trace_indices[0], trace_indices[-1] + 1)
+        else:
+            selection = trace_indices
+        window = self._read_window(c, selection, start, end)
+        if window.shape[1] < end - start:
+            # 曲线长度不同的分组，较短的曲线补 0
+            window = np.pad(window, ((0, 0), (0, end - start - window.shape[1])))
+        for k, t in enumerate(positions):
+            shift = self._shifts.get((c, t), 0)
+            if shift != 0:
+                if not window.flags.writeable:
+                    window = window.copy()
+                window[k] = self._read_shifted(c, t, start, end, shift, window.dtype)
+        return window
+
+    def _read_window(self, c: int, selection: slice | list[int], start: int, end: int) -> np.ndarray:
+        if self._arrays is None:
+            return self.dataset.get_trace_window(self.channel_indices[c], selection, start, end)
+        array = self._arrays[c]
+        end = min(max(start, end), array.shape[1])
+        if isinstance(selection, slice):
+            return array[selection, start:end]
+        elif len(selection) == 0:
+            return np.empty((0, end - start), dtype=array.dtype)
+        else:
+            return array.oindex[selection, start:end]
+
+    def _sample_count(self, c: int) -> int:
+        return self.dataset.sample_count if self._arrays is None else self._arrays[c].shape[1]
+
+    def _read_shifted(self, c: int, t: int, start: int, end: int, shift: int, dtype) -> np.ndarray:
+        # 平移后区间 [start, end) 对应原始曲线的 [start - shift, end - shift)，超出曲线的部分补 0
+        result = np.zeros(end - start, dtype=dtype)
+        source_start, source_end = start - shift, end - shift
+        lo, hi = max(source_start, 0), min(source_end, self._sample_count(c))
+        if lo < hi:
+            result[lo - source_start : hi - source_start] = self._read_window(c, [self.trace_indices[t]], lo, hi)[0]
+        return result
+
+
 class TracePanelWidget(MsgHandlerPanelWidget):
     _esm = pathlib.Path(__file__).parent / "static" / "TracePanelWidget.js"
     _css = pathlib.Path(__file__).parent / "static" / "TracePanelWidget.css"
@@ -95,6 +292,8 @@ class TracePanelWidget(MsgHandlerPanelWidget):
     overview_select_range = traitlets.Tuple((0, 0)).tag(sync=True)
 
     overview_trace_series = traitlets.Dict(_TraceSeries().to_dict()).tag(sync=True)
+    # 前端每次请求改变区间时递增，随区间一起发送，返回的 trace_series 带有该序号，前端据此丢弃过期的结果
+    range_request_seq = traitlets.Int(0).tag(sync=True)
 
     _f_trace_index_filters = traitlets.List([]).tag(sync=True)
     _f_dataset_info_channels = traitlets.List([]).tag(sync=True)
@@ -106,6 +305,12 @@ class TracePanelWidget(MsgHandlerPanelWidget):
 
     _DEFAULT_SERIES_Z = 2
 
+    _DEFAULT_ENVELOPE_THRESHOLD = 64
+
+    _ENVELOPE_MODES = ("auto", "on", "off")
+
+    _DOWNSAMPLE_FUNCTIONS = {"minmax": minmax, "m4": m4, "lttb": lttb}
+
     def __init__(self, *args: typing.Any, **kwargs: typing.Any) -> None:
         super().__init__(*args, **kwargs)
         self._logger = logger.get_logger(self)
@@ -117,12 +322,29 @@ class TracePanelWidget(MsgHandlerPanelWidget):
         self._trace_series: _TraceSeries | None = None
         self._trace_cache_channel_indices: list | None = None
         self._trace_cache_trace_indices: list | None = None
-        self._trace_cache_traces: ndarray | None = None
+        # show_trace 展示的曲线为惰性句柄，show_trace2 为各过滤器的惰性句柄列表（统计量曲线为 ndarray），
+        # 相关性曲线为 ndarray
+        self._trace_cache_traces: _LazyTraces | list[_LazyTraces | ndarray] | ndarray | None = None
         self.trace_index_filters: list[ndarray] | None = None
         # self._trace_cache_x_indices: ndarray | None = None
         self._trace_cache_x_range_start: int | None = None
         self._trace_cache_x_range_end: int | None = None
         self._trace_cache_trace_highlight_indices: dict[int, list[int]] | None = None
+        self._trace_index_filters: list[TraceIndexFilter] | None = None
+        # 各通道的最小/最大值金字塔，key 为通道路径，值为 None 表示数据集没有该通道的金字塔
+        self._pyramids: dict[str, MinMaxPyramid | None] = {}
+        # 后台线程计算区间变化时与内核线程修改展示的曲线互斥
+        self._state_lock = threading.RLock()
+        # 最近一次在 Python 端修改展示曲线时的区间请求序号，之后计算的曲线不早于该序号
+        self._selection_seq: int = 0
+        self._range_worker = _RangeWorker(on_error=self._range_change_error)
+        # 包络模式：曲线数量较多时按像素列计算所有曲线的最小/最大值包络（及均值），只发送 2～3 条曲线
+        self._envelope_mode: str = "auto"
+        self._envelope_threshold: int = self._DEFAULT_ENVELOPE_THRESHOLD
+        self._envelope_with_mean: bool = True
+        # 以包络展示的曲线 (通道索引, 曲线索引)，高亮时需要单独绘制
+        self._trace_cache_envelope_indices: set[tuple[int | str, int]] = set()
+        self._downsample_mode: str = "minmax"
 
         self._correlation_traces = None
         self._is_correlation_traces_setting = False
@@ -151,14 +373,15 @@ class TracePanelWidget(MsgHandlerPanelWidget):
         ds = NumpyTraceDataset.load_from_numpy_array(trace)
         self.set_trace_dataset(ds)
 
+    @selection_change
     @correlation_zarr_substitute("_correlation_zarr_show_trace")
     def _show_trace(self, channel_slice, trace_slice, display_range: tuple[int, int] = None):
-        channel_indexes, trace_indices, traces, data = self._trace_dataset.trace_data_with_indices[
-            channel_slice, trace_slice
-        ]
+        # 只保存选中曲线的惰性句柄，每次展示时只读取当前区间（或金字塔层级）的数据
+        channel_indexes = TraceDataset._parse_slice(self._trace_dataset.channel_count, channel_slice)
+        trace_indices = TraceDataset._parse_slice(self._trace_dataset.trace_count, trace_slice)
         self._trace_cache_channel_indices = channel_indexes
         self._trace_cache_trace_indices = trace_indices
-        self._trace_cache_traces = traces
+        self._trace_cache_traces = _LazyTraces(self._trace_dataset, channel_indexes, trace_indices)
 
         if display_range is None:
             if self._trace_cache_x_range_start is None:
@@ -183,17 +406,16 @@ class TracePanelWidget(MsgHandlerPanelWidget):
             self._trace_series_send_state()
 
     def _update_overview_trace(self):
-        x_idx, y_data = self._get_by_range(
-            self._trace_cache_traces[0][0, :],
-            0,
-            self._trace_dataset.sample_count,
-        )
-        data = np.column_stack((x_idx, y_data))
+        if self._trace_index_filters is not None and isinstance(self._trace_cache_traces, list):
+            x_idx, y_data = self._get_filter_traces_by_range(0, 0, self._trace_dataset.sample_count, [0])[0]
+        else:
+            x_idx, y_data = self._get_channel_traces_by_range(0, 0, self._trace_dataset.sample_count, [0])[0]
         self._overview_trace_series = _TraceSeries(
             series_data_list=[
                 _TraceSeriesData(
                     name="",
-                    data=data,
+                    x_data=x_idx,
+                    y_data=y_data,
                     trace_index=0,
                     channel_index=0,
                     z=self._DEFAULT_SERIES_Z,
@@ -207,8 +429,8 @@ class TracePanelWidget(MsgHandlerPanelWidget):
         percent_end = self._trace_cache_x_range_end / (self._trace_dataset.sample_count - 1) * 100
 
         self._overview_trace_series.range = [
-            round(self._overview_trace_series.series_data_list[0].data[-1][0] * percent_start / 100),
-            round(self._overview_trace_series.series_data_list[0].data[-1][0] * percent_end / 100),
+            round(self._overview_trace_series.series_data_list[0].x_data[-1] * percent_start / 100),
+            round(self._overview_trace_series.series_data_list[0].x_data[-1] * percent_end / 100),
         ]
 
         if self._auto_sync:
@@ -217,21 +439,160 @@ class TracePanelWidget(MsgHandlerPanelWidget):
     def _trace_series_send_state(self):
         if self._trace_series is None:
             return
-        self.trace_series = self._trace_series.to_dict()
+        trace_series = self._trace_series.to_dict()
+        if trace_series["seq"] is None:
+            # 不是由前端区间请求产生的曲线（如 reset、show_trace）总是最新的
+            trace_series["seq"] = self.range_request_seq
+        self.trace_series = trace_series
         self.overview_trace_series = self._overview_trace_series.to_dict()
 
-    def _get_by_range(self, trace: np.ndarray, start, end):
+    def _get_chart_pixel(self) -> int:
         pixel = self.chart_size["width"]
         if pixel is None or pixel == 0:
             pixel = 1920
+        return pixel
 
-        x_idx, y_data = minmax(trace, start, end, pixel)
+    def _get_by_range(self, trace: np.ndarray, start, end):
+        x_idx, y_data = self._DOWNSAMPLE_FUNCTIONS[self._downsample_mode](trace, start, end, self._get_chart_pixel())
         return x_idx, y_data
 
-    def _change_range(self, start: int, end: int):
+    def _get_by_range_2d(self, traces: np.ndarray, start, end) -> list[tuple[np.ndarray, np.ndarray]]:
+        # minmax 模式一次降采样所有曲线，其他模式各曲线的横坐标不同，逐条降采样
+        if self._downsample_mode != "minmax":
+            return [self._get_by_range(trace, start, end) for trace in traces]
+        x_idx, y_data = minmax_2d(traces, start, end, self._get_chart_pixel())
+        return [(x_idx, row) for row in y_data]
+
+    def _get_channel_traces_by_range(
+        self, c: int, start: int, end: int, positions: list[int] | None = None
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        # 降采样第 c 个通道中曲线序号为 positions（默认全部）的曲线，返回顺序与 positions 一致
+        traces = self._trace_cache_traces
+        if positions is None:
+            positions = list(range(len(self._trace_cache_trace_indices)))
+        if not isinstance(traces, _LazyTraces):
+            return self._get_by_range_2d(traces[c][positions], start, end)
+        pyramid = self._get_pyramid(str(traces.channel_indices[c])) if self._downsample_mode == "minmax" else None
+        return self._get_lazy_traces_by_range(traces, c, start, end, positions, pyramid)
+
+    def _get_lazy_traces_by_range(
+        self,
+        traces: _LazyTraces,
+        c: int,
+        start: int,
+        end: int,
+        positions: list[int],
+        pyramid: MinMaxPyramid | None,
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        result: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+        # 未平移的曲线优先一次性从金字塔中读取
+        pyramid_positions = [t for t in positions if not traces.is_shifted(c, t)]
+        if pyramid is not None and pyramid_positions:
+            pyramid_data = pyramid.minmax_2d(
+                [traces.trace_indices[t] for t in pyramid_positions], start, end, self._get_chart_pixel()
+            )
+            if pyramid_data is not None:
+                x_idx, y_data = pyramid_data
+                result.update((t, (x_idx, row)) for t, row in zip(pyramid_positions, y_data))
+
+        # 其余曲线分批读取区间内的数据点，降采样后即释放
+        for batch in traces.batches([t for t in positions if t not in result], start, end):
+            window = traces.read(c, batch, start, end)
+            for t, (x_idx, y_data) in zip(batch, self._get_by_range_2d(window, 0, end - start)):
+                result[t] = x_idx + start, y_data
+        return [result[t] for t in positions]
+
+    def _get_channel_envelope(self, c: int, start: int, end: int) -> tuple[np.ndarray, ...]:
+        # 计算第 c 个通道所有曲线的包络
+        traces = self._trace_cache_traces
+        if not isinstance(traces, _LazyTraces):
+            return envelope(traces[c], start, end, self._get_chart_pixel())
+        return self._get_lazy_envelope(traces, c, start, end)
+
+    def _get_lazy_envelope(self, traces: _LazyTraces, c: int, start: int, end: int) -> tuple[np.ndarray, ...]:
+        # 惰性句柄分批读取，按批合并最大值、最小值及按曲线条数加权的均值
+        pixel = self._get_chart_pixel()
+        x_idx, upper, lower, mean, count = None, None, None, None, 0
+        for batch in traces.batches(list(range(len(traces.trace_indices))), start, end):
+            batch_x, batch_upper, batch_lower, batch_mean = envelope(
+                traces.read(c, batch, start, end), 0, end - start, pixel
+            )
+            if x_idx is None:
+                x_idx, upper, lower, mean = batch_x + start, batch_upper, batch_lower, batch_mean * len(batch)
+            else:
+                np.maximum(upper, batch_upper, out=upper)
+                np.minimum(lower, batch_lower, out=lower)
+                mean += batch_mean * len(batch)
+            count += len(batch)
+        if x_idx is None:
+            return envelope(np.empty((0, end - start)), 0, end - start, pixel)
+        return x_idx, upper, lower, mean / count
+
+    @selection_change
+    def set_downsample_mode(self, mode: str = "minmax") -> None:
+        """
+        设置曲线展示的降采样方式：
+
+        - minmax：每个像素列保留最小值与最大值，可使用数据集的最小/最大值金字塔；
+        - m4：每个像素列保留第一个点、最小值点、最大值点及最后一个点，绘制结果与原始曲线一致；
+        - lttb：每个像素列只保留一个点，数据量为 minmax 的一半，且能保留曲线的形状。
+
+        :param mode: 降采样方式，"minmax"、"m4" 或 "lttb"
+        :type mode: str
+        """
+        if mode not in self._DOWNSAMPLE_FUNCTIONS:
+            raise ValueError(
+                f"The downsample mode {mode} is not supported, it should be one of {tuple(self._DOWNSAMPLE_FUNCTIONS)}."
+            )
+        self._downsample_mode = mode
+        self._refresh_trace_series()
+        if self._overview_trace_series is not None:
+            self._update_overview_trace()
+
+    def _get_filter_traces_by_range(
+        self, filter_index: int, start: int, end: int, positions: list[int] | None = None
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        # 降采样第 filter_index 个过滤器中曲线序号为 positions（默认全部）的曲线，返回顺序与 positions 一致
+        traces = self._trace_cache_traces[filter_index]
+        if positions is None:
+            positions = list(range(len(self._trace_cache_trace_indices[filter_index])))
+        if not isinstance(traces, _LazyTraces):
+            return self._get_by_range_2d(traces[positions], start, end)
+        return self._get_lazy_traces_by_range(traces, 0, start, end, positions, self._get_filter_pyramid(filter_index))
+
+    def _get_filter_envelope(self, filter_index: int, start: int, end: int) -> tuple[np.ndarray, ...]:
+        traces = self._trace_cache_traces[filter_index]
+        if not isinstance(traces, _LazyTraces):
+            return envelope(traces, start, end, self._get_chart_pixel())
+        return self._get_lazy_envelope(traces, 0, start, end)
+
+    def _get_filter_pyramid(self, filter_index: int) -> MinMaxPyramid | None:
+        # 原始分组的曲线优先从最小/最大值金字塔中读取，读取量只与屏幕宽度有关
+        # 金字塔只保存最小/最大值，仅用于 minmax 降采样
+        trace_index_filter = self._trace_index_filters[filter_index]
+        if self._downsample_mode != "minmax" or trace_index_filter.group_path != ZarrTraceDataset._GROUP_ROOT_PATH:
+            return None
+        return self._get_pyramid(trace_index_filter.channel_path)
+
+    def _get_pyramid(self, channel_path: str) -> MinMaxPyramid | None:
+        if channel_path not in self._pyramids:
+            self._pyramids[channel_path] = (
+                MinMaxPyramid.open(self._trace_dataset, int(channel_path)) if channel_path.isdigit() else None
+            )
+        return self._pyramids[channel_path]
+
+    def _change_range(
+        self, start: int, end: int, is_stale: typing.Callable[[], bool] | None = None, seq: int | None = None
+    ):
         # if self._trace_cache_x_indices is not None:
         #     start, end = self._trace_cache_x_indices[start], self._trace_cache_x_indices[end]
-        self.change_range(start, end)
+        percent_start = start / (self._trace_dataset.sample_count - 1) * 100
+        percent_end = end / (self._trace_dataset.sample_count - 1) * 100
+        if not self._update_range(start, end, percent_start, percent_end, is_stale, seq):
+            return
+        self.show_range = (start, end)
+        if self._auto_sync:
+            self._trace_series_send_state()
 
     def change_range(self, start: int, end: int):
         """
@@ -242,33 +603,18 @@ class TracePanelWidget(MsgHandlerPanelWidget):
         :param end: 结束索引
         :type end: int
         """
-        self._trace_cache_x_range_start = start
-        self._trace_cache_x_range_end = end
-        self._trace_series = self._get_trace_series_by_index_range2(start, end)
+        with self._state_lock:
+            self._change_range(start, end)
 
-        percent_start = start / (self._trace_dataset.sample_count - 1) * 100
-        percent_end = end / (self._trace_dataset.sample_count - 1) * 100
-        self._trace_series.percent_range = [percent_start, percent_end]
-        self.show_range = (start, end)
-        if self._overview_trace_series is not None:
-            self._overview_trace_series.range = [
-                round((self._overview_trace_series.series_data_list[0].data[-1][0]) * percent_start / 100),
-                round((self._overview_trace_series.series_data_list[0].data[-1][0]) * percent_end / 100),
-            ]
-        if self._auto_sync:
-            self._trace_series_send_state()
-
-    def _overview_selected_range_changed(self, start: int, end: int):
+    def _overview_selected_range_changed(
+        self, start: int, end: int, is_stale: typing.Callable[[], bool] | None = None, seq: int | None = None
+    ):
         # start = int(self._overview_trace_series.x_data[start])
         # end = int(self._overview_trace_series.x_data[end])
-        self._trace_cache_x_range_start = start
-        self._trace_cache_x_range_end = end
-        self._trace_series = self._get_trace_series_by_index_range2(start, end)
-
-        self._trace_series.percent_range = [
-            start / (self._trace_dataset.sample_count - 1) * 100,
-            end / (self._trace_dataset.sample_count - 1) * 100,
-        ]
+        percent_start = start / (self._trace_dataset.sample_count - 1) * 100
+        percent_end = end / (self._trace_dataset.sample_count - 1) * 100
+        if not self._update_range(start, end, percent_start, percent_end, is_stale, seq, update_overview=False):
+            return
 
         self.show_range = (start, end)
         self.selected_range = (start, end)
@@ -285,23 +631,62 @@ class TracePanelWidget(MsgHandlerPanelWidget):
         :param percent_end: 结束
         :type percent_end: float
         """
+        with self._state_lock:
+            self._change_percent_range(percent_start, percent_end)
+
+    def _change_percent_range(
+        self,
+        percent_start: float,
+        percent_end: float,
+        is_stale: typing.Callable[[], bool] | None = None,
+        seq: int | None = None,
+    ):
         start = round((self._trace_dataset.sample_count - 1) * percent_start / 100)
         end = round((self._trace_dataset.sample_count - 1) * percent_end / 100)
-
-        self._trace_cache_x_range_start = start
-        self._trace_cache_x_range_end = end
-        self._trace_series = self._get_trace_series_by_index_range2(start, end)
-        self._trace_series.percent_range = [percent_start, percent_end]
-        self._overview_trace_series.range = [
-            round(self._overview_trace_series.series_data_list[0].data[-1][0] / 100 * percent_start),
-            round(self._overview_trace_series.series_data_list[0].data[-1][0] / 100 * percent_end),
-        ]
+        if not self._update_range(start, end, percent_start, percent_end, is_stale, seq):
+            return
         self.show_range = (start, end)
         self.selected_range = (start, end)
         if self._auto_sync:
             self._trace_series_send_state()
 
-    def _get_trace_series_by_index_range(self, start: int, end: int) -> _TraceSeries:
+    def _update_range(
+        self,
+        start: int,
+        end: int,
+        percent_start: float,
+        percent_end: float,
+        is_stale: typing.Callable[[], bool] | None,
+        seq: int | None,
+        update_overview: bool = True,
+    ) -> bool:
+        # 计算区间内的曲线，计算过程中有新的区间请求时放弃结果，返回 False
+        trace_series = self._get_trace_series(start, end, is_stale)
+        if trace_series is None:
+            return False
+        trace_series.percent_range = [percent_start, percent_end]
+        # 在 Python 端修改展示曲线之后计算的曲线不应被前端当作过期结果丢弃
+        trace_series.seq = None if seq is None else max(seq, self._selection_seq)
+        self._trace_cache_x_range_start = start
+        self._trace_cache_x_range_end = end
+        self._trace_series = trace_series
+        if update_overview and self._overview_trace_series is not None:
+            self._overview_trace_series.range = [
+                round(self._overview_trace_series.series_data_list[0].x_data[-1] * percent_start / 100),
+                round(self._overview_trace_series.series_data_list[0].x_data[-1] * percent_end / 100),
+            ]
+        return True
+
+    def _get_trace_series(
+        self, start: int, end: int, is_stale: typing.Callable[[], bool] | None = None
+    ) -> _TraceSeries | None:
+        if isinstance(self._trace_cache_traces, list):
+            return self._get_trace_series_by_index_range2(start, end, is_stale)
+        return self._get_trace_series_by_index_range(start, end, is_stale)
+
+    def _get_trace_series_by_index_range(
+        self, start: int, end: int, is_stale: typing.Callable[[], bool] | None = None
+    ) -> _TraceSeries | None:
         series_data_list = []
 
         if self._trace_cache_trace_highlight_indices is not None:
@@ -315,10 +700,42 @@ class TracePanelWidget(MsgHandlerPanelWidget):
             color_i = 0
 
         # x_idx = None
+        self._trace_cache_envelope_indices = set()
         for c, channel_index in enumerate(self._trace_cache_channel_indices):
+            if is_stale is not None and is_stale():
+                return None
+            if self._use_envelope(len(self._trace_cache_trace_indices)):
+                series_data_list.extend(
+                    self._get_envelope_series(
+                        str(channel_index), self._get_channel_envelope(c, start, end), channel_index
+                    )
+                )
+                self._trace_cache_envelope_indices.update((channel_index, t) for t in self._trace_cache_trace_indices)
+                highlight_indices = self._get_highlight_trace_indices(channel_index)
+                highlight_positions = [
+                    t
+                    for t, trace_index in enumerate(self._trace_cache_trace_indices)
+                    if trace_index in highlight_indices
+                ]
+                highlight_data = self._get_channel_traces_by_range(c, start, end, highlight_positions)
+                for t, (x_idx, y_data) in zip(highlight_positions, highlight_data):
+                    trace_index = self._trace_cache_trace_indices[t]
+                    series_data_list.append(
+                        _TraceSeriesData(
+                            name=str(channel_index) + "-" + str(trace_index),
+                            x_data=x_idx,
+                            y_data=y_data,
+                            color=highlight_colors[color_i],
+                            trace_index=trace_index,
+                            channel_index=channel_index,
+                            z=self._DEFAULT_SERIES_Z + 1 + c * len(self._trace_cache_trace_indices) + t,
+                        )
+                    )
+                    color_i += 1
+                continue
+            channel_data = self._get_channel_traces_by_range(c, start, end)
             for t, trace_index in enumerate(self._trace_cache_trace_indices):
-                x_idx, y_data = self._get_by_range(self._trace_cache_traces[c, t, :], start, end)
-                data = np.column_stack([x_idx, y_data])
+                x_idx, y_data = channel_data[t]
                 color, z_increase = self._get_highlight_color(
                     channel_index, trace_index, None if highlight_colors is None else highlight_colors[color_i]
                 )
@@ -327,7 +744,8 @@ class TracePanelWidget(MsgHandlerPanelWidget):
                 series_data_list.append(
                     _TraceSeriesData(
                         name=str(channel_index) + "-" + str(trace_index),
-                        data=data,
+                        x_data=x_idx,
+                        y_data=y_data,
                         color=color,
                         trace_index=trace_index,
                         channel_index=channel_index,
@@ -341,24 +759,122 @@ class TracePanelWidget(MsgHandlerPanelWidget):
 
         return _TraceSeries(series_data_list=series_data_list)
 
-    def _get_trace_series_by_index_range2(self, start: int, end: int) -> _TraceSeries:
+    def _get_trace_series_by_index_range2(
+        self, start: int, end: int, is_stale: typing.Callable[[], bool] | None = None
+    ) -> _TraceSeries | None:
         series_data_list = []
+        envelope_indices = set()
         for i, f in enumerate(self._trace_index_filters):
-            for j, trace_index in enumerate(self._trace_cache_trace_indices[i]):
-                x_idx, y_data = self._get_by_range(self._trace_cache_traces[i][j, :], start, end)
-                data = np.column_stack([x_idx, y_data])
+            if self._use_envelope(len(self._trace_cache_trace_indices[i])):
+                if is_stale is not None and is_stale():
+                    return None
+                channel_index = int(f.channel_path) if f.channel_path.isdigit() else f.channel_path
+                series_data_list.extend(
+                    self._get_envelope_series(
+                        f"{f.group}/{f.channel}", self._get_filter_envelope(i, start, end), f.channel_path
+                    )
+                )
+                envelope_indices.update((channel_index, t) for t in self._trace_cache_trace_indices[i])
+                highlight_indices = self._get_highlight_trace_indices(channel_index)
+                highlight_colors = self._generate_colors(len(highlight_indices))
+                highlight_positions = [
+                    j
+                    for j, trace_index in enumerate(self._trace_cache_trace_indices[i])
+                    if trace_index in highlight_indices
+                ]
+                highlight_data = self._get_filter_traces_by_range(i, start, end, highlight_positions)
+                for j, (x_idx, y_data) in zip(highlight_positions, highlight_data):
+                    trace_index = self._trace_cache_trace_indices[i][j]
+                    series_data_list.append(
+                        _TraceSeriesData(
+                            name=f"{f.group}/{f.channel}/{trace_index}",
+                            x_data=x_idx,
+                            y_data=y_data,
+                            trace_index=trace_index,
+                            channel_index=f.channel_path,
+                            z=self._DEFAULT_SERIES_Z + 1 + j,
+                            color=highlight_colors[highlight_indices.index(trace_index)],
+                        )
+                    )
+                continue
+            if is_stale is not None and is_stale():
+                return None
+            filter_data = self._get_filter_traces_by_range(i, start, end)
+            for trace_index, (x_idx, y_data) in zip(self._trace_cache_trace_indices[i], filter_data):
                 series_data_list.append(
                     _TraceSeriesData(
                         name=f"{f.group}/{f.channel}/{trace_index}",
-                        data=data,
+                        x_data=x_idx,
+                        y_data=y_data,
                         trace_index=trace_index,
                         channel_index=f.channel_path,
                         z=1,
                         color=None,
                     )
                 )
+        self._trace_cache_envelope_indices = envelope_indices
         return _TraceSeries(series_data_list=series_data_list)
 
+    def _use_envelope(self, trace_count: int) -> bool:
+        if self._envelope_mode == "auto":
+            return trace_count > self._envelope_threshold
+        return self._envelope_mode == "on"
+
+    def _get_envelope_series(
+        self, name: str, envelope_data: tuple[np.ndarray, ...], channel_index: int | str
+    ) -> list[_TraceSeriesData]:
+        # 高亮时包络以背景色展示，高亮的曲线单独绘制在包络之上
+        color = "#5470c6" if self._trace_cache_trace_highlight_indices is None else self._trace_series_color_background
+        x_idx, upper, lower, mean = envelope_data
+        rows = [("max", upper), ("min", lower)]
+        if self._envelope_with_mean:
+            rows.append(("mean", mean))
+        return [
+            _TraceSeriesData(
+                name=f"{name}/{row_name}",
+                x_data=x_idx,
+                y_data=y_data,
+                color=color,
+                channel_index=channel_index,
+                trace_index=-1,
+                z=self._DEFAULT_SERIES_Z,
+            )
+            for row_name, y_data in rows
+        ]
+
+    def _get_highlight_trace_indices(self, channel_index: int | str) -> list[int]:
+        if self._trace_cache_trace_highlight_indices is None:
+            return []
+        return self._trace_cache_trace_highlight_indices.get(channel_index, [])
+
+    @selection_change
+    def set_envelope_mode(self, mode: str = "auto", with_mean: bool = True, threshold: int | None = None) -> None:
+        """
+        设置包络展示模式。
+        包络模式下，同一通道选中的所有曲线按屏幕像素列计算最小/最大值包络及可选的均值曲线，只发送 2～3 条曲线，
+        展示开销与曲线条数无关；高亮的曲线仍单独绘制在包络之上。
+
+        :param mode: "auto" 通道中的曲线条数超过 threshold 时使用包络模式，"on" 总是使用，"off" 不使用
+        :type mode: str
+        :param with_mean: 是否同时展示均值曲线
+        :type with_mean: bool
+        :param threshold: auto 模式下使用包络模式的曲线条数阈值，为 None 时不改变，默认为 64
+        :type threshold: int | None
+        """
+        if mode not in self._ENVELOPE_MODES:
+            raise ValueError(f"The envelope mode {mode} is not supported, it should be one of {self._ENVELOPE_MODES}.")
+        self._envelope_mode = mode
+        self._envelope_with_mean = with_mean
+        if threshold is not None:
+            self._envelope_threshold = threshold
+        self._refresh_trace_series()
+
+    def _refresh_trace_series(self):
+        # 按当前展示区间重新计算曲线
+        if self._trace_series is None or self._trace_cache_traces is None:
+            return
+        self._change_range(self._trace_cache_x_range_start, self._trace_cache_x_range_end)
+
     def _get_highlight_color(
         self, channel_index: int, trace_index: int, highlight_color: str
     ) -> tuple[None, int] | tuple[str, int]:
@@ -413,6 +929,7 @@ class TracePanelWidget(MsgHandlerPanelWidget):
         """
         self._show_trace(slice(0, self._trace_dataset.channel_count), slice(0, self._trace_dataset.trace_count))
 
+    @selection_change
     def highlight(self, indices: dict[int, list[int] | int] | list[int] | int | None) -> None:
         """
         高亮曲线
@@ -433,6 +950,9 @@ class TracePanelWidget(MsgHandlerPanelWidget):
 
         if indices is None or len(indices) == 0:
             self._trace_cache_trace_highlight_indices = None
+            if self._trace_cache_envelope_indices:
+                self._refresh_trace_series()
+                return
             for series in self._trace_series.series_data_list:
                 series.color = None
                 series.z = self._trace_cache_trace_highlight_indices
@@ -441,6 +961,7 @@ class TracePanelWidget(MsgHandlerPanelWidget):
             return
 
         series_indices = [(series.channel_index, series.trace_index) for series in self._trace_series.series_data_list]
+        series_indices.extend(self._trace_cache_envelope_indices)
 
         for channel_index in indices.keys():
             for trace_index in indices[channel_index]:
@@ -453,6 +974,12 @@ class TracePanelWidget(MsgHandlerPanelWidget):
 
         self._trace_cache_trace_highlight_indices = indices
 
+        if self._trace_cache_envelope_indices:
+            # 包络中的曲线没有单独的 series，重新计算以单独绘制高亮的曲线
+            self._refresh_trace_series()
+            self._update_overview_trace()
+            return
+
         highlight_colors = self._generate_colors(sum(len(v) for v in indices.values()))
         highlight_colors.append(self._trace_series_color_background)
         color_i = 0
@@ -479,6 +1006,7 @@ class TracePanelWidget(MsgHandlerPanelWidget):
 
         self._update_overview_trace()
 
+    @selection_change
     def reset(self, args):
         """
         重置曲线展示
@@ -486,9 +1014,7 @@ class TracePanelWidget(MsgHandlerPanelWidget):
         self._trace_cache_trace_highlight_indices = None
         self._trace_cache_x_range_start = 0
         self._trace_cache_x_range_end = self._trace_dataset.sample_count - 1
-        self._trace_series = self._get_trace_series_by_index_range2(
-            self._trace_cache_x_range_start, self._trace_cache_x_range_end
-        )
+        self._trace_series = self._get_trace_series(self._trace_cache_x_range_start, self._trace_cache_x_range_end)
         self._trace_series.percent_range = [
             self._trace_cache_x_range_start / (self._trace_dataset.sample_count - 1) * 100,
             self._trace_cache_x_range_end / (self._trace_dataset.sample_count - 1) * 100,
@@ -502,6 +1028,7 @@ class TracePanelWidget(MsgHandlerPanelWidget):
 
         self._update_overview_trace()
 
+    @selection_change
     def set_trace_dataset(
         self, trace_dataset: TraceDataset, show_all_trace=False, channel_slice=None, trace_slice=None
     ) -> None:
@@ -520,6 +1047,7 @@ class TracePanelWidget(MsgHandlerPanelWidget):
         if not self._is_correlation_traces_setting:
             self._correlation_traces = None
         self._trace_dataset = trace_dataset
+        self._pyramids = {}
         self._update_group_channel_info()
         self.max_range = (0, self._trace_dataset.sample_count - 1)
         if self._auto_sync:
@@ -543,11 +1071,18 @@ class TracePanelWidget(MsgHandlerPanelWidget):
 
     def _update_group_channel_info(self):
         zd: zarr.hierarchy.Group = self._trace_dataset.get_origin_data()
-        self._f_dataset_info_groups = [{"name": "origin" if g == "0" else g, "path": g} for g in zd.group_keys()]
+        # 只列出包含曲线的分组及通道，统计量、金字塔、分析结果等分组不可作为曲线展示
+        group_channels = {
+            g: [c for c in zd[g].group_keys() if ZarrTraceDataset._ARRAY_TRACES_PATH in zd[g][c]]
+            for g in zd.group_keys()
+        }
+        self._f_dataset_info_groups = [
+            {"name": "origin" if g == "0" else g, "path": g} for g, c in group_channels.items() if len(c) > 0
+        ]
         channels = []
         for group in self._f_dataset_info_groups:
             channel_info = {"name": group["name"], "path": group["path"], "children": []}
-            for channel in zd[group["path"]].group_keys():
+            for channel in group_channels[group["path"]]:
                 channel_info["children"].append(
                     {"name": f"{channel_info["name"]}/{channel}", "path": f"{channel_info["path"]}/{channel}"}
                 )
@@ -678,6 +1213,7 @@ class TracePanelWidget(MsgHandlerPanelWidget):
         else:
             raise ValueError("The trace parameter type is not supported.")
 
+    @selection_change
     def shift(self, ch_idx: int, trace_idx: int, shift: int):
         """
         曲线偏移，执行后如果果当前展示的曲线包含该通道和曲线索引，则会自动更新展示
@@ -689,8 +1225,17 @@ class TracePanelWidget(MsgHandlerPanelWidget):
         :param shift: 偏移量，正数表示向右偏移，负数表示向左偏移
         :type shift: int
         """
-        _, _, origin_trace, _ = self._trace_dataset.trace_data_with_indices[ch_idx, trace_idx]
-        self._trace_cache_traces[ch_idx, trace_idx, :] = self._do_shift(origin_trace[ch_idx, trace_idx, :], shift)
+        if isinstance(self._trace_cache_traces, _LazyTraces):
+            # 只记录平移量，展示时按平移量读取区间
+            if ch_idx in self._trace_cache_channel_indices and trace_idx in self._trace_cache_trace_indices:
+                self._trace_cache_traces.set_shift(
+                    self._trace_cache_channel_indices.index(ch_idx),
+                    self._trace_cache_trace_indices.index(trace_idx),
+                    shift,
+                )
+        else:
+            _, _, origin_trace, _ = self._trace_dataset.trace_data_with_indices[ch_idx, trace_idx]
+            self._trace_cache_traces[ch_idx, trace_idx, :] = self._do_shift(origin_trace[ch_idx, trace_idx, :], shift)
 
         self._trace_series = self._get_trace_series_by_index_range(
             self._trace_cache_x_range_start, self._trace_cache_x_range_end
@@ -705,16 +1250,22 @@ class TracePanelWidget(MsgHandlerPanelWidget):
         if self._auto_sync:
             self._trace_series_send_state()
 
+    @selection_change
     def shift2(self, group: str, channel: str, trace: int, shift: int):
-        origin_trace = self._trace_dataset.get_traces_by_filters([TraceIndexFilter(group, channel, str(trace))])[1][0][
-            0
-        ]
-
         for i, f in enumerate(self._trace_index_filters):
             if f.group == group and f.channel == channel:
+                traces = self._trace_cache_traces[i]
                 for j, trace_index in enumerate(self._trace_cache_trace_indices[i]):
-                    if trace_index == trace:
-                        self._trace_cache_traces[i][j, :] = self._do_shift(origin_trace, shift)
+                    if trace_index != trace:
+                        continue
+                    if isinstance(traces, _LazyTraces):
+                        # 只记录平移量，展示时按平移量读取区间
+                        traces.set_shift(0, j, shift)
+                    else:
+                        origin_trace = self._trace_dataset.get_traces_by_filters(
+                            [TraceIndexFilter(group, channel, str(trace))]
+                        )[1][0][0]
+                        traces[j, :] = self._do_shift(origin_trace, shift)
 
         self._trace_series = self._get_trace_series_by_index_range2(
             self._trace_cache_x_range_start, self._trace_cache_x_range_end
@@ -742,26 +1293,49 @@ class TracePanelWidget(MsgHandlerPanelWidget):
 
     @traitlets.observe("selected_range")
     def selected_range_changed(self, change) -> None:
-        if change.get("new") is not None:
+        # 展示区间已更新后同步 selected_range 时不需要重新计算
+        if change.get("new") is not None and tuple(change.get("new")) != tuple(self.show_range):
             s, e = change.get("new")
-            self._change_range(s, e)
+            self._submit_range_change(self._change_range, s, e)
 
     @traitlets.observe("overview_select_range")
     def overview_select_range_changed(self, change) -> None:
         if change.get("new") is not None:
             s, e = change.get("new")
-            self._overview_selected_range_changed(s, e)
+            self._submit_range_change(self._overview_selected_range_changed, s, e)
 
     @traitlets.observe("percent_range")
     def percent_range_changed(self, change) -> None:
         if change.get("new") is not None:
             s, e = change.get("new")
-            self.change_percent_range(s, e)
+            self._submit_range_change(self._change_percent_range, s, e)
+
+    def _submit_range_change(self, func: typing.Callable[..., None], start: Number, end: Number) -> None:
+        # 前端的区间请求交由后台线程处理，只计算最新的请求
+        seq = self.range_request_seq
+
+        def task(is_stale: typing.Callable[[], bool]):
+            with self._state_lock:
+                func(start, end, is_stale=is_stale, seq=seq)
+
+        self._range_worker.submit(task)
+
+    def _bump_selection_seq(self):
+        self.range_request_seq += 1
+        self._selection_seq = self.range_request_seq
+
+    def _range_change_error(self, e: Exception):
+        self.send({"errorMessage": f"Change range error: {e}"})
 
     @traitlets.observe("_f_trace_index_filters")
     def _f_trace_index_filters_changed(self, change) -> None:
         if change.get("new") is not None:
             filters_map = change.get("new")
+            # Python 端展示曲线后同步给前端的过滤器不需要重新读取，统计量等缓存曲线也无法从数据集中读取
+            if self._trace_index_filters is not None and filters_map == [
+                f.to_dict() for f in self._trace_index_filters
+            ]:
+                return
             filters = []
             for f in filters_map:
                 trace_index_filter_map = {
@@ -795,10 +1369,61 @@ class TracePanelWidget(MsgHandlerPanelWidget):
                 f.count = self._trace_dataset.trace_count
             self._show_traces2(filters)
 
+    @selection_change
     def _show_traces2(self, trace_index_filters: list[TraceIndexFilter], display_range=None):
-        self._trace_cache_trace_indices, self._trace_cache_traces = self._trace_dataset.get_traces_by_filters(
-            trace_index_filters
+        # 只保存各过滤器选中曲线的惰性句柄，每次展示时只读取当前区间（或金字塔层级）的数据
+        filters, trace_indices_list, traces_list = [], [], []
+        for trace_index_filter in trace_index_filters:
+            try:
+                trace_indices, traces = self._trace_dataset.get_trace_array_by_filter(trace_index_filter)
+            except Exception as e:
+                self._logger.error(f"Error getting traces for filter {trace_index_filter}: {e}")
+                continue
+            filters.append(trace_index_filter)
+            trace_indices_list.append(trace_indices)
+            traces_list.append(
+                _LazyTraces(self._trace_dataset, [trace_index_filter.channel_path], trace_indices, [traces])
+            )
+        self._trace_cache_trace_indices = trace_indices_list
+        self._trace_cache_traces = traces_list
+        self._show_cached_traces2(filters, display_range)
+
+    @selection_change
+    def show_sample_stats(self, channel_name: str | int = 0, with_range: bool = False) -> None:
+        """
+        展示数据集保存的逐数据点统计量：索引 0 为均值曲线，索引 1 为标准差（噪声）曲线，
+        with_range 为 True 时索引 2、3 依次为最小值、最大值曲线。统计量由数据集在写入时（开启 sample_stats）累计，
+        或由 compute_sample_stats 计算后保存，展示时不需要扫描曲线。
+
+        :param channel_name: 通道名称或通道索引
+        :type channel_name: str | int
+        :param with_range: 是否同时展示最小值、最大值曲线
+        :type with_range: bool
+        """
+        stats = self._trace_dataset.get_sample_stats(channel_name)
+        if stats is None:
+            raise ValueError(
+                "The dataset does not contain sample statistics, "
+                "call compute_sample_stats on the dataset to compute them."
+            )
+        channel_index = (
+            channel_name if isinstance(channel_name, int) else self._trace_dataset.channel_names.index(channel_name)
+        )
+        rows = [stats["mean"], np.sqrt(stats["variance"])]
+        if with_range:
+            rows += [stats["min"], stats["max"]]
+        self._trace_cache_trace_indices = [list(range(len(rows)))]
+        self._trace_cache_traces = [np.vstack(rows)]
+        self._show_cached_traces2(
+            [
+                TraceIndexFilter(
+                    group="stats", channel=str(channel_index), index_filter=slice(0, len(rows)), count=len(rows)
+                )
+            ]
         )
+
+    @selection_change
+    def _show_cached_traces2(self, trace_index_filters: list[TraceIndexFilter], display_range=None):
         self._trace_index_filters = trace_index_filters
         if display_range is None:
             if self._trace_cache_x_range_start is None:
@@ -6,6 +6,7 @@ import typing
 
 import numpy as np
 
+from cracknuts.acquisition.trigger_waiter import TriggerWaiter
 from cracknuts.cracker.cracker_basic import CrackerBasic
 from cracknuts import logger
 from cracknuts.cracker import protocol
@@ -30,6 +31,7 @@ class ScopeAcquisition:
         self._repeat_interval: float = repeat_interval
         self.trace_fetch_interval = trace_fetch_interval
         self._status_change_listener: list[typing.Callable[[int], None]] = []
+        self._trigger_waiter: TriggerWaiter = TriggerWaiter(self._is_triggered, self._trigger_judge_wait_time)
 
     def on_status_changed(self, callback: typing.Callable[[int], None]) -> None:
         self._status_change_listener.append(callback)
@@ -82,7 +84,14 @@ class ScopeAcquisition:
     def start_repeat(self):
         self.run(3)
 
+    def get_trigger_stats(self) -> dict[str, typing.Any]:
+        """
+        Get the trigger statistics of the current or last run, see `TriggerWaiter.get_stats`.
+        """
+        return self._trigger_waiter.get_stats()
+
     def _acquisition(self, model: int):
+        self._trigger_waiter.reset()
         while self._status != 0:
             if self._status < 0:
                 if self._status == -2:
@@ -97,22 +106,18 @@ class ScopeAcquisition:
                 time.sleep(self._interval)
             elif self._status == 2:
                 self._cracker.osc_single()
-                while self._status == 2:
-                    if self._is_triggered():
-                        self._last_waves = self._get_waves()
-                        self.stop()
-                    time.sleep(self._trigger_judge_wait_time)
+                if self._trigger_waiter.wait(float("inf"), self._trigger_judge_wait_time, lambda: self._status == 2):
+                    self._last_waves = self._get_waves()
+                    self.stop()
             elif self._status == 3:
                 self._cracker.osc_single()
-                trigger_jude_start_time = time.time()
-                while self._status == 3:
-                    if time.time() - trigger_jude_start_time > self._repeat_interval:
-                        self._cracker.osc_force()
-                    else:
-                        if self._is_triggered():
-                            self._last_waves = self._get_waves()
-                            break
-                        time.sleep(self._trigger_judge_wait_time)
+                if not self._trigger_waiter.wait(
+                    self._repeat_interval, self._trigger_judge_wait_time, lambda: self._status == 3
+                ):
+                    if self._status != 3:
+                        continue
+                    # Not triggered within the repeat interval, force a trigger to refresh the waves.
+                    self._cracker.osc_force()
                 self._last_waves = self._get_waves()
             else:
                 self._logger.error(f"scope_acquisition error: {self._status}")
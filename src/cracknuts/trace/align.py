@@ -0,0 +1,181 @@
+# Copyright 2024 CrackNuts. All rights reserved.
+
+import concurrent.futures
+import multiprocessing
+import os
+
+import numpy as np
+import zarr
+
+from cracknuts import logger
+from cracknuts.trace.trace import ZarrTraceDataset
+
+_logger = logger.get_logger(__name__)
+
+ALIGNED_GROUP_PATH = "aligned"
+ARRAY_SHIFTS_PATH = "shifts"
+
+
+def align_traces(
+    dataset: ZarrTraceDataset,
+    channel_name: str | int,
+    reference_window: tuple[int, int],
+    max_shift: int,
+    reference: np.ndarray | int = 0,
+    chunk_size: int | None = None,
+    max_workers: int | None = None,
+) -> np.ndarray:
+    """
+    基于 FFT 互相关的静态对齐：将每条曲线在参考窗口附近与参考波形做互相关，按相关峰值位置平移整条曲线，
+    平移后的曲线写入 aligned/<通道>/traces，每条曲线的偏移量写入 aligned/<通道>/shifts。
+
+    曲线按 chunk 分批读取，每批使用一次批量 FFT 计算，多个批次在进程池中并行执行，
+    各进程直接写入 zarr 中互不重叠的 chunk，因此整个过程不会将数据集整体加载到内存。
+    偏移量的符号与 TracePanelWidget.shift 一致：正数表示向右偏移，移出的位置填 0。
+
+    :param dataset: zarr 格式的曲线数据集
+    :type dataset: ZarrTraceDataset
+    :param channel_name: 通道名称或通道索引
+    :type channel_name: str | int
+    :param reference_window: 参考窗口的起止数据点 (start, end)，通常选择包含明显特征的区间
+    :type reference_window: tuple[int, int]
+    :param max_shift: 最大偏移量（数据点数量），在参考窗口前后各扩展该长度搜索
+    :type max_shift: int
+    :param reference: 参考曲线，为整数时表示使用该索引的曲线，也可以传入完整的参考曲线数组
+    :type reference: np.ndarray | int
+    :param chunk_size: 每批处理的曲线条数，为 None 时按曲线长度计算，使每批约 4M 个数据点
+    :type chunk_size: int | None
+    :param max_workers: 进程数量，为 None 时使用 CPU 核心数，为 1 时在当前进程中执行
+    :type max_workers: int | None
+    :return: 每条曲线的偏移量
+    :rtype: np.ndarray
+    """
+    if not isinstance(dataset, ZarrTraceDataset):
+        raise ValueError("Only ZarrTraceDataset can be aligned.")
+    channel_index = channel_name if isinstance(channel_name, int) else dataset.channel_names.index(channel_name)
+    start, end = reference_window
+    sample_count = dataset.sample_count
+    if not 0 <= start < end <= sample_count:
+        raise ValueError(f"Invalid reference window {reference_window} for {sample_count} samples.")
+
+    root = zarr.open_group(store=dataset.get_origin_data().store, mode="a")
+    origin_traces = root[f"{ZarrTraceDataset._GROUP_ROOT_PATH}/{channel_index}/{ZarrTraceDataset._ARRAY_TRACES_PATH}"]
+    if isinstance(reference, int):
+        reference = origin_traces[reference]
+    reference = np.asarray(reference, dtype=np.float64)[start:end]
+
+    trace_count = dataset.trace_count
+    if chunk_size is None:
+        # 与数据集的 chunk 大小计算方式一致，避免长曲线的单个 chunk 过大
+        chunk_size = max(1, ZarrTraceDataset._ZARR_TRACE_CHUNK_SAMPLES // sample_count)
+    aligned_group = root.require_group(f"{ALIGNED_GROUP_PATH}/{channel_index}")
+    # 输出数组的 chunk 与批次一致，保证各进程写入的区域互不重叠
+    aligned_group.create(
+        ZarrTraceDataset._ARRAY_TRACES_PATH,
+        shape=(trace_count, sample_count),
+        chunks=(chunk_size, sample_count),
+        dtype=origin_traces.dtype,
+        overwrite=True,
+    )
+    aligned_group.create(ARRAY_SHIFTS_PATH, shape=(trace_count,), chunks=(chunk_size,), dtype=np.int32, overwrite=True)
+    aligned_group.attrs["metadata"] = {
+        "reference_window": [start, end],
+        "max_shift": max_shift,
+        "channel_name": dataset.channel_names[channel_index],
+    }
+
+    tasks = [
+        (
+            root.store,
+            channel_index,
+            chunk_start,
+            min(chunk_start + chunk_size, trace_count),
+            reference,
+            start,
+            max_shift,
+        )
+        for chunk_start in range(0, trace_count, chunk_size)
+    ]
+    shifts = np.zeros(trace_count, dtype=np.int32)
+    if max_workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            shifts[task[2] : task[3]] = _align_chunk(*task)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers or os.cpu_count(), mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            futures = {executor.submit(_align_chunk, *task): task for task in tasks}
+            for future in concurrent.futures.as_completed(futures):
+                task = futures[future]
+                shifts[task[2] : task[3]] = future.result()
+    _logger.debug(f"Aligned {trace_count} traces, shift range [{shifts.min()}, {shifts.max()}].")
+    return shifts
+
+
+def _align_chunk(
+    store,
+    channel_index: int,
+    chunk_start: int,
+    chunk_end: int,
+    reference: np.ndarray,
+    window_start: int,
+    max_shift: int,
+) -> np.ndarray:
+    root = zarr.open_group(store=store, mode="r+")
+    traces = root[f"{ZarrTraceDataset._GROUP_ROOT_PATH}/{channel_index}/{ZarrTraceDataset._ARRAY_TRACES_PATH}"][
+        chunk_start:chunk_end
+    ]
+    shifts = find_shifts(traces, reference, window_start, max_shift)
+    aligned_group = root[f"{ALIGNED_GROUP_PATH}/{channel_index}"]
+    aligned_group[ZarrTraceDataset._ARRAY_TRACES_PATH][chunk_start:chunk_end] = shift_traces(traces, shifts)
+    aligned_group[ARRAY_SHIFTS_PATH][chunk_start:chunk_end] = shifts
+    return shifts
+
+
+def find_shifts(traces: np.ndarray, reference: np.ndarray, window_start: int, max_shift: int) -> np.ndarray:
+    """
+    批量计算曲线相对参考窗口的偏移量
+
+    :param traces: (n, sample_count) 曲线
+    :type traces: np.ndarray
+    :param reference: 参考窗口内的参考波形
+    :type reference: np.ndarray
+    :param window_start: 参考窗口在曲线中的起始数据点
+    :type window_start: int
+    :param max_shift: 最大偏移量
+    :type max_shift: int
+    :return: 每条曲线的偏移量，将曲线按该偏移量平移后与参考对齐
+    :rtype: np.ndarray
+    """
+    window_length = len(reference)
+    search_start = max(0, window_start - max_shift)
+    search_end = min(traces.shape[1], window_start + window_length + max_shift)
+    segments = np.asarray(traces[:, search_start:search_end], dtype=np.float64)
+    segments -= segments.mean(axis=1, keepdims=True)
+    reference = reference - reference.mean()
+
+    fft_length = 1 << int(np.ceil(np.log2(segments.shape[1] + window_length)))
+    spectrum = np.fft.rfft(segments, fft_length, axis=1) * np.conj(np.fft.rfft(reference, fft_length))
+    # 只保留参考波形完整落在搜索区间内的滞后位置
+    correlation = np.fft.irfft(spectrum, fft_length, axis=1)[:, : segments.shape[1] - window_length + 1]
+    lags = correlation.argmax(axis=1)
+    return (window_start - (search_start + lags)).astype(np.int32)
+
+
+def shift_traces(traces: np.ndarray, shifts: np.ndarray) -> np.ndarray:
+    """
+    批量平移曲线，正数表示向右偏移，移出的位置填 0
+
+    :param traces: (n, sample_count) 曲线
+    :type traces: np.ndarray
+    :param shifts: 每条曲线的偏移量
+    :type shifts: np.ndarray
+    :return: 平移后的曲线
+    :rtype: np.ndarray
+    """
+    sample_count = traces.shape[1]
+    indexes = np.arange(sample_count)[None, :] - np.asarray(shifts)[:, None]
+    valid = (indexes >= 0) & (indexes < sample_count)
+    shifted = np.take_along_axis(traces, np.clip(indexes, 0, sample_count - 1), axis=1)
+    shifted[~valid] = 0
+    return shifted
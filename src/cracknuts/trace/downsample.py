@@ -28,3 +28,233 @@ def minmax(value: NDArray[np.int16], mn: int, mx: int, down_count: int) -> tuple
         down_value[2 * i] = block.max()
         down_value[2 * i + 1] = block.min()
     return down_index, down_value
+
+
+_MINMAX_2D_PARALLEL_THRESHOLD = 1 << 20  # 并行计算的最小数据点数量: 1M
+
+
+def minmax_2d(
+    values: np.ndarray, mn: int, mx: int, down_count: int, parallel: bool | None = None
+) -> tuple[NDArray[np.int32], np.ndarray]:
+    """
+    一次降采样多条曲线，结果格式与 minmax 一致，所有曲线共用同一组横坐标。
+
+    并行计算按 曲线 × 分段 划分任务，数据量较小时并行调度的开销大于计算本身，改用串行计算。
+
+    :param values: (曲线条数, 数据点数) 曲线
+    :type values: np.ndarray
+    :param mn: 起始数据点
+    :type mn: int
+    :param mx: 结束数据点（不包含）
+    :type mx: int
+    :param down_count: 分段数量（像素列数）
+    :type down_count: int
+    :param parallel: 是否并行计算，为 None 时按区间内的数据点数量自动选择
+    :type parallel: bool | None
+    :return: 横坐标及 (曲线条数, 点数) 纵坐标，纵坐标的类型与曲线一致
+    :rtype: tuple[NDArray[np.int32], np.ndarray]
+    """
+    mn = max(0, mn)
+    mx = max(mn, min(values.shape[1], mx))
+    ds = max(1, (mx - mn) // max(1, down_count))
+    if ds == 1:
+        return np.arange(mn, mx, dtype=np.int32), values[:, mn:mx]
+    bin_count = (mx - mn) // ds
+    down_index = np.arange(mn, mn + bin_count * ds, ds, dtype=np.int32).repeat(2)
+    down_value = np.empty((values.shape[0], bin_count * 2), dtype=values.dtype)
+    if parallel is None:
+        parallel = values.shape[0] * (mx - mn) >= _MINMAX_2D_PARALLEL_THRESHOLD
+    if parallel:
+        _minmax_2d_parallel(values, mn, ds, down_value)
+    else:
+        _minmax_2d_serial(values, mn, ds, down_value)
+    return down_index, down_value
+
+
+@njit(parallel=True, cache=True)
+def _minmax_2d_parallel(values, mn, ds, down_value):
+    bin_count = down_value.shape[1] // 2
+    for k in prange(values.shape[0] * bin_count):
+        t = k // bin_count
+        i = k - t * bin_count
+        block = values[t][mn + i * ds : mn + i * ds + ds]
+        down_value[t, 2 * i] = block.max()
+        down_value[t, 2 * i + 1] = block.min()
+
+
+@njit(cache=True)
+def _minmax_2d_serial(values, mn, ds, down_value):
+    bin_count = down_value.shape[1] // 2
+    for t in range(values.shape[0]):
+        row = values[t]
+        for i in range(bin_count):
+            start = mn + i * ds
+            block_max = row[start]
+            block_min = row[start]
+            for j in range(start + 1, start + ds):
+                v = row[j]
+                if v > block_max:
+                    block_max = v
+                if v < block_min:
+                    block_min = v
+            down_value[t, 2 * i] = block_max
+            down_value[t, 2 * i + 1] = block_min
+
+
+def envelope(
+    values: np.ndarray, mn: int, mx: int, down_count: int
+) -> tuple[NDArray[np.int32], np.ndarray, np.ndarray, NDArray[np.float64]]:
+    """
+    计算多条曲线在 [mn, mx) 区间内的最小/最大值包络及均值曲线。
+    区间按 down_count 个像素列分段，每段对所有曲线的全部数据点计算一次最大值、最小值及均值，
+    结果数量只与 down_count 有关，与曲线条数无关。
+
+    :param values: (曲线条数, 数据点数) 曲线
+    :type values: np.ndarray
+    :param mn: 起始数据点
+    :type mn: int
+    :param mx: 结束数据点（不包含）
+    :type mx: int
+    :param down_count: 分段数量（像素列数）
+    :type down_count: int
+    :return: 各段起点、最大值、最小值及均值，最大值与最小值的类型与曲线一致
+    :rtype: tuple[NDArray[np.int32], np.ndarray, np.ndarray, NDArray[np.float64]]
+    """
+    mn = max(0, mn)
+    mx = min(values.shape[1], mx)
+    ds = max(1, (mx - mn) // max(1, down_count))
+    bin_count = -(-(mx - mn) // ds) if mx > mn and values.shape[0] > 0 else 0
+    upper = np.empty(bin_count, dtype=values.dtype)
+    lower = np.empty(bin_count, dtype=values.dtype)
+    mean = np.empty(bin_count, dtype=np.float64)
+    if bin_count > 0:
+        _envelope(values, mn, mx, ds, upper, lower, mean)
+    return np.arange(mn, mn + bin_count * ds, ds, dtype=np.int32), upper, lower, mean
+
+
+@njit(parallel=True, cache=True)
+def _envelope(values, mn, mx, ds, upper, lower, mean):
+    for i in prange(upper.shape[0]):
+        start = mn + i * ds
+        end = min(start + ds, mx)
+        block_max = values[0, start]
+        block_min = values[0, start]
+        total = 0.0
+        for t in range(values.shape[0]):
+            for j in range(start, end):
+                v = values[t, j]
+                if v > block_max:
+                    block_max = v
+                if v < block_min:
+                    block_min = v
+                total += v
+        upper[i] = block_max
+        lower[i] = block_min
+        mean[i] = total / ((end - start) * values.shape[0])
+
+
+def m4(value: np.ndarray, mn: int, mx: int, down_count: int) -> tuple[NDArray[np.int32], np.ndarray]:
+    """
+    M4 降采样：区间按 down_count 个像素列分段，每段保留第一个点、最小值点、最大值点及最后一个点，
+    各点使用其真实的横坐标并按横坐标排序。按像素列绘制折线时与原始曲线的绘制结果一致。
+
+    :param value: 曲线
+    :type value: np.ndarray
+    :param mn: 起始数据点
+    :type mn: int
+    :param mx: 结束数据点（不包含）
+    :type mx: int
+    :param down_count: 分段数量（像素列数）
+    :type down_count: int
+    :return: 横坐标及纵坐标，纵坐标的类型与曲线一致
+    :rtype: tuple[NDArray[np.int32], np.ndarray]
+    """
+    mn = max(0, mn)
+    mx = max(mn, min(value.shape[0], mx))
+    ds = max(1, (mx - mn) // max(1, down_count))
+    if ds <= 4:
+        return np.arange(mn, mx, dtype=np.int32), value[mn:mx]
+    bin_count = -(-(mx - mn) // ds)
+    down_index = np.empty(bin_count * 4, dtype=np.int32)
+    down_value = np.empty(bin_count * 4, dtype=value.dtype)
+    _m4(value, mn, mx, ds, down_index, down_value)
+    return down_index, down_value
+
+
+@njit(parallel=True, cache=True)
+def _m4(value, mn, mx, ds, down_index, down_value):
+    for i in prange(down_index.shape[0] // 4):
+        start = mn + i * ds
+        end = min(start + ds, mx)
+        min_index = start
+        max_index = start
+        for j in range(start + 1, end):
+            if value[j] < value[min_index]:
+                min_index = j
+            if value[j] > value[max_index]:
+                max_index = j
+        down_index[4 * i] = start
+        down_index[4 * i + 1] = min(min_index, max_index)
+        down_index[4 * i + 2] = max(min_index, max_index)
+        down_index[4 * i + 3] = end - 1
+        for k in range(4 * i, 4 * i + 4):
+            down_value[k] = value[down_index[k]]
+
+
+def lttb(value: np.ndarray, mn: int, mx: int, down_count: int) -> tuple[NDArray[np.int32], np.ndarray]:
+    """
+    LTTB（Largest-Triangle-Three-Buckets）降采样：保留首尾两点，其余数据点均分为 down_count - 2 个桶，
+    每个桶选择与上一个选中点及下一个桶均值点构成三角形面积最大的点，每个像素列只保留一个点，
+    数据量为 minmax 的一半，且能保留曲线的形状。
+
+    :param value: 曲线
+    :type value: np.ndarray
+    :param mn: 起始数据点
+    :type mn: int
+    :param mx: 结束数据点（不包含）
+    :type mx: int
+    :param down_count: 保留的数据点数量（像素列数）
+    :type down_count: int
+    :return: 横坐标及纵坐标，纵坐标的类型与曲线一致
+    :rtype: tuple[NDArray[np.int32], np.ndarray]
+    """
+    mn = max(0, mn)
+    mx = max(mn, min(value.shape[0], mx))
+    if down_count < 3 or mx - mn <= down_count:
+        return np.arange(mn, mx, dtype=np.int32), value[mn:mx]
+    down_index = np.empty(down_count, dtype=np.int32)
+    _lttb(value, mn, mx, down_index)
+    return down_index, value[down_index]
+
+
+@njit(cache=True)
+def _lttb(value, mn, mx, down_index):
+    # 每个桶依赖上一个桶选中的点，只能串行计算
+    count = mx - mn
+    threshold = down_index.shape[0]
+    every = (count - 2) / (threshold - 2)
+    selected = 0
+    down_index[0] = mn
+    for i in range(threshold - 2):
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, count)
+        avg_x = 0.0
+        avg_y = 0.0
+        for j in range(avg_start, avg_end):
+            avg_x += j
+            avg_y += value[mn + j]
+        avg_x /= avg_end - avg_start
+        avg_y /= avg_end - avg_start
+
+        selected_x = float(selected)
+        selected_y = float(value[mn + selected])
+        max_area = -1.0
+        next_selected = int(i * every) + 1
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            area = abs((selected_x - avg_x) * (value[mn + j] - selected_y) - (selected_x - j) * (avg_y - selected_y))
+            if area > max_area:
+                max_area = area
+                next_selected = j
+        selected = next_selected
+        down_index[i + 1] = mn + selected
+    down_index[threshold - 1] = mx - 1
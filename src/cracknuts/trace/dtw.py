@@ -0,0 +1,263 @@
+# Copyright 2024 CrackNuts. All rights reserved.
+
+import numpy as np
+import zarr
+from numba import njit, prange
+
+from cracknuts import logger
+from cracknuts.trace.align import ALIGNED_GROUP_PATH
+from cracknuts.trace.trace import ZarrTraceDataset
+
+_logger = logger.get_logger(__name__)
+
+ARRAY_WARP_SUMMARY_PATH = "warp_summary"
+WARP_SUMMARY_COLUMNS = ["distance", "mean_offset", "max_offset"]
+
+
+def dtw_align_traces(
+    dataset: ZarrTraceDataset,
+    channel_name: str | int,
+    band: int,
+    reference: np.ndarray | int = 0,
+    downsample_factor: int = 4,
+    refine_radius: int = 2,
+    chunk_size: int = 256,
+) -> np.ndarray:
+    """
+    基于带约束动态时间规整（DTW）的弹性对齐，用于存在随机延时、时钟抖动等静态对齐无法处理的曲线。
+    每条曲线按 DTW 路径映射到参考曲线的时间轴上，对齐后的曲线写入 aligned/<通道>/traces，
+    每条曲线的规整路径摘要写入 aligned/<通道>/warp_summary，各列依次为：平均每步距离、路径平均偏移、路径最大偏移。
+
+    先在降采样的曲线上计算 DTW 路径，再在原始分辨率下沿该路径附近的窄窗口细化，
+    曲线按 chunk 分批读取，批内各曲线使用 numba prange 并行计算。
+
+    :param dataset: zarr 格式的曲线数据集
+    :type dataset: ZarrTraceDataset
+    :param channel_name: 通道名称或通道索引
+    :type channel_name: str | int
+    :param band: Sakoe-Chiba 带宽，即路径偏离对角线的最大数据点数量
+    :type band: int
+    :param reference: 参考曲线，为整数时表示使用该索引的曲线，也可以传入参考曲线数组
+    :type reference: np.ndarray | int
+    :param downsample_factor: 粗对齐阶段的降采样倍数，为 1 时直接在原始分辨率下计算
+    :type downsample_factor: int
+    :param refine_radius: 细化阶段在粗路径投影周围扩展的数据点数量
+    :type refine_radius: int
+    :param chunk_size: 每批处理的曲线条数
+    :type chunk_size: int
+    :return: (trace_count, 3) 的规整路径摘要
+    :rtype: np.ndarray
+    """
+    if not isinstance(dataset, ZarrTraceDataset):
+        raise ValueError("Only ZarrTraceDataset can be aligned.")
+    channel_index = channel_name if isinstance(channel_name, int) else dataset.channel_names.index(channel_name)
+    root = zarr.open_group(store=dataset.get_origin_data().store, mode="a")
+    origin_traces = root[f"{ZarrTraceDataset._GROUP_ROOT_PATH}/{channel_index}/{ZarrTraceDataset._ARRAY_TRACES_PATH}"]
+    if isinstance(reference, int):
+        reference = origin_traces[reference]
+    reference = np.ascontiguousarray(reference, dtype=np.float64)
+
+    trace_count = dataset.trace_count
+    aligned_group = root.require_group(f"{ALIGNED_GROUP_PATH}/{channel_index}")
+    aligned_traces = aligned_group.create(
+        ZarrTraceDataset._ARRAY_TRACES_PATH,
+        shape=(trace_count, len(reference)),
+        chunks=(chunk_size, len(reference)),
+        dtype=origin_traces.dtype,
+        overwrite=True,
+    )
+    warp_summary = aligned_group.create(
+        ARRAY_WARP_SUMMARY_PATH, shape=(trace_count, len(WARP_SUMMARY_COLUMNS)), dtype=np.float64, overwrite=True
+    )
+    warp_summary.attrs["columns"] = WARP_SUMMARY_COLUMNS
+    aligned_group.attrs["metadata"] = {
+        "method": "dtw",
+        "band": band,
+        "downsample_factor": downsample_factor,
+        "refine_radius": refine_radius,
+        "channel_name": dataset.channel_names[channel_index],
+    }
+
+    summaries = np.empty((trace_count, len(WARP_SUMMARY_COLUMNS)), dtype=np.float64)
+    for start in range(0, trace_count, chunk_size):
+        end = min(start + chunk_size, trace_count)
+        warped, summaries[start:end] = dtw_align(
+            origin_traces[start:end], reference, band, downsample_factor, refine_radius
+        )
+        if np.issubdtype(origin_traces.dtype, np.integer):
+            warped = np.rint(warped)
+        aligned_traces[start:end] = warped.astype(origin_traces.dtype)
+        _logger.debug(f"DTW aligned {end} traces.")
+    warp_summary[:] = summaries
+    return summaries
+
+
+def dtw_align(
+    traces: np.ndarray, reference: np.ndarray, band: int, downsample_factor: int = 4, refine_radius: int = 2
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    批量计算曲线与参考曲线的 DTW 路径，并将曲线映射到参考曲线的时间轴上
+
+    :param traces: (n, sample_count) 曲线
+    :type traces: np.ndarray
+    :param reference: 参考曲线
+    :type reference: np.ndarray
+    :param band: Sakoe-Chiba 带宽
+    :type band: int
+    :param downsample_factor: 粗对齐阶段的降采样倍数
+    :type downsample_factor: int
+    :param refine_radius: 细化阶段在粗路径投影周围扩展的数据点数量
+    :type refine_radius: int
+    :return: (n, len(reference)) 对齐后的曲线及 (n, 3) 规整路径摘要
+    :rtype: tuple[np.ndarray, np.ndarray]
+    """
+    return _dtw_align_batch(
+        np.ascontiguousarray(reference, dtype=np.float64),
+        np.ascontiguousarray(traces, dtype=np.float64),
+        max(0, band),
+        max(1, downsample_factor),
+        max(0, refine_radius),
+    )
+
+
+@njit(parallel=True, cache=True)
+def _dtw_align_batch(reference, traces, band, factor, radius):
+    trace_count = traces.shape[0]
+    n = reference.shape[0]
+    m = traces.shape[1]
+    warped = np.empty((trace_count, n), dtype=np.float64)
+    summary = np.empty((trace_count, 3), dtype=np.float64)
+    coarse = factor > 1 and n // factor >= 2 and m // factor >= 2
+    coarse_reference = _decimate(reference, factor) if coarse else reference
+    for t in prange(trace_count):
+        trace = traces[t]
+        if coarse:
+            coarse_trace = _decimate(trace, factor)
+            coarse_lo, coarse_hi = _band_window(coarse_reference.shape[0], coarse_trace.shape[0], band // factor + 1)
+            coarse_i, coarse_j, _ = _dtw_path(coarse_reference, coarse_trace, coarse_lo, coarse_hi)
+            lo, hi = _project_window(coarse_i, coarse_j, factor, radius, n, m)
+        else:
+            lo, hi = _band_window(n, m, band)
+        path_i, path_j, distance = _dtw_path(reference, trace, lo, hi)
+        _warp(trace, path_i, path_j, distance, warped[t], summary[t])
+    return warped, summary
+
+
+@njit(cache=True)
+def _decimate(value, factor):
+    count = value.shape[0] // factor
+    result = np.empty(count, dtype=np.float64)
+    for i in range(count):
+        result[i] = value[i * factor : (i + 1) * factor].mean()
+    return result
+
+
+@njit(cache=True)
+def _band_window(n, m, band):
+    lo = np.empty(n, dtype=np.int64)
+    hi = np.empty(n, dtype=np.int64)
+    scale = (m - 1) / (n - 1) if n > 1 else 0.0
+    for i in range(n):
+        center = int(round(i * scale))
+        lo[i] = max(0, center - band)
+        hi[i] = min(m - 1, center + band)
+    lo[0] = 0
+    hi[n - 1] = m - 1
+    return lo, hi
+
+
+@njit(cache=True)
+def _project_window(coarse_i, coarse_j, factor, radius, n, m):
+    # 将粗路径上的每个点投影为原始分辨率下的方块，并向四周扩展 radius
+    lo = np.full(n, m, dtype=np.int64)
+    hi = np.full(n, -1, dtype=np.int64)
+    for p in range(coarse_i.shape[0]):
+        row_start = max(0, coarse_i[p] * factor - radius)
+        row_end = min(n - 1, (coarse_i[p] + 1) * factor - 1 + radius)
+        col_start = max(0, coarse_j[p] * factor - radius)
+        col_end = min(m - 1, (coarse_j[p] + 1) * factor - 1 + radius)
+        for i in range(row_start, row_end + 1):
+            lo[i] = min(lo[i], col_start)
+            hi[i] = max(hi[i], col_end)
+    # 降采样截断的尾部数据点延续最后的窗口直到终点
+    for i in range(n):
+        if hi[i] < 0:
+            lo[i] = lo[i - 1]
+            hi[i] = m - 1
+    lo[0] = 0
+    hi[n - 1] = m - 1
+    # 保证窗口单调，路径可以连续通过
+    for i in range(1, n):
+        hi[i] = max(hi[i], hi[i - 1])
+    for i in range(n - 2, -1, -1):
+        lo[i] = min(lo[i], lo[i + 1])
+    return lo, hi
+
+
+@njit(cache=True)
+def _cell(cost, lo, hi, i, j):
+    if i < 0 or j < lo[i] or j > hi[i]:
+        return np.inf
+    return cost[i, j - lo[i]]
+
+
+@njit(cache=True)
+def _dtw_path(reference, trace, lo, hi):
+    n = reference.shape[0]
+    m = trace.shape[0]
+    width = 0
+    for i in range(n):
+        width = max(width, hi[i] - lo[i] + 1)
+    cost = np.full((n, width), np.inf)
+    for i in range(n):
+        for j in range(lo[i], hi[i] + 1):
+            if i == 0 and j == 0:
+                best = 0.0
+            else:
+                best = min(
+                    _cell(cost, lo, hi, i - 1, j),
+                    _cell(cost, lo, hi, i - 1, j - 1),
+                    _cell(cost, lo, hi, i, j - 1),
+                )
+            cost[i, j - lo[i]] = abs(reference[i] - trace[j]) + best
+
+    path_i = np.empty(n + m, dtype=np.int64)
+    path_j = np.empty(n + m, dtype=np.int64)
+    i, j = n - 1, m - 1
+    length = 0
+    while True:
+        path_i[length] = i
+        path_j[length] = j
+        length += 1
+        if i == 0 and j == 0:
+            break
+        diagonal = _cell(cost, lo, hi, i - 1, j - 1) if j > 0 else np.inf
+        up = _cell(cost, lo, hi, i - 1, j)
+        left = _cell(cost, lo, hi, i, j - 1) if j > 0 else np.inf
+        if diagonal <= up and diagonal <= left:
+            i, j = i - 1, j - 1
+        elif up <= left:
+            i -= 1
+        else:
+            j -= 1
+    return path_i[:length][::-1], path_j[:length][::-1], cost[n - 1, m - 1 - lo[n - 1]]
+
+
+@njit(cache=True)
+def _warp(trace, path_i, path_j, distance, warped, summary):
+    # 参考曲线的每个数据点取路径上与之匹配的曲线数据点的均值
+    counts = np.zeros(warped.shape[0], dtype=np.int64)
+    warped[:] = 0.0
+    offset_sum = 0.0
+    offset_max = 0
+    for p in range(path_i.shape[0]):
+        warped[path_i[p]] += trace[path_j[p]]
+        counts[path_i[p]] += 1
+        offset = abs(path_j[p] - path_i[p])
+        offset_sum += offset
+        offset_max = max(offset_max, offset)
+    for i in range(warped.shape[0]):
+        warped[i] /= counts[i]
+    summary[0] = distance / path_i.shape[0]
+    summary[1] = offset_sum / path_i.shape[0]
+    summary[2] = offset_max
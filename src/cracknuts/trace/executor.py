@@ -0,0 +1,237 @@
+# Copyright 2024 CrackNuts. All rights reserved.
+
+import concurrent.futures
+import multiprocessing
+import math
+import os
+import pickle
+import typing
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from cracknuts import logger
+from cracknuts.trace.trace import ZarrTraceDataset
+
+_logger = logger.get_logger(__name__)
+
+
+class TileExecutor:
+    """
+    分块并行分析执行器：将 ZarrTraceDataset 的一个通道按 (曲线块 x 数据点窗口) 切分为多个 tile，在进程池中并行处理。
+
+    每个 tile 由工作进程直接从 zarr 存储读取并解压，计算得到一个可合并的累加器（如 CPA、TTest、SNR、CentralMoments），
+    累加器中的数组通过共享内存传回主进程（pickle 协议 5 的带外缓冲区），避免大数组的序列化及复制。
+    主进程将同一数据点窗口的各 tile 累加器依次合并，返回每个窗口的累加器。
+
+    累加器需要实现 merge 方法，以及接受 (traces, data) 或 (traces) 参数的更新方法。
+
+    多进程执行使用 spawn 方式启动工作进程，工作进程会重新导入主模块，因此在脚本中调用时需要将调用代码放在
+    if __name__ == "__main__": 中，否则每个工作进程都会再次执行脚本。在 Jupyter 中使用时不受影响。
+    """
+
+    _TILE_SAMPLES = 16_777_216  # 单个 tile 的目标数据点数量: 16M
+
+    def __init__(
+        self,
+        dataset: ZarrTraceDataset,
+        channel_name: str | int = 0,
+        trace_slice: slice = slice(None),
+        trace_chunk_size: int | None = None,
+        sample_window_size: int | None = None,
+        max_workers: int | None = None,
+    ):
+        """
+        :param dataset: zarr 格式的曲线数据集
+        :type dataset: ZarrTraceDataset
+        :param channel_name: 通道名称或通道索引
+        :type channel_name: str | int
+        :param trace_slice: 参与计算的曲线范围，仅支持步长为 1 的切片
+        :type trace_slice: slice
+        :param trace_chunk_size: 每个 tile 的曲线条数，为 None 时取不小于 1024 的 zarr chunk 整数倍，
+                                 曲线较长时减少为 zarr chunk 的整数倍，使单个 tile 约 16M 个数据点
+        :type trace_chunk_size: int | None
+        :param sample_window_size: 每个 tile 的数据点数量，为 None 时按曲线条数计算，使单个 tile 不超过约 16M 个数据点，
+                                   曲线较短时不按数据点切分
+        :type sample_window_size: int | None
+        :param max_workers: 进程数量，为 None 时使用 CPU 核心数，为 1 时在当前进程中执行
+        :type max_workers: int | None
+        """
+        if not isinstance(dataset, ZarrTraceDataset):
+            raise ValueError("Only ZarrTraceDataset can be processed by the tile executor.")
+        self._dataset = dataset
+        self._channel_index = (
+            channel_name if isinstance(channel_name, int) else dataset.channel_names.index(channel_name)
+        )
+        trace_start, trace_stop, step = trace_slice.indices(dataset.trace_count)
+        if step != 1:
+            raise ValueError("Only trace slices with a step of 1 are supported.")
+        self._trace_range = (trace_start, trace_stop)
+        if trace_chunk_size is None:
+            zarr_chunk = self._origin_traces(dataset).chunks[0]
+            # 优先减少曲线条数（按 zarr chunk 对齐，不会重复解压），仍然过大时再按数据点切分
+            max_chunk_count = max(1, self._TILE_SAMPLES // (zarr_chunk * max(1, dataset.sample_count)))
+            trace_chunk_size = zarr_chunk * min(math.ceil(1024 / zarr_chunk), max_chunk_count)
+        self.trace_chunk_size: int = trace_chunk_size
+        if sample_window_size is None:
+            sample_window_size = max(1, self._TILE_SAMPLES // trace_chunk_size)
+        self.sample_window_size: int = min(sample_window_size, dataset.sample_count)
+        self.max_workers: int = max_workers or os.cpu_count()
+
+    def _origin_traces(self, dataset: ZarrTraceDataset):
+        return dataset.get_origin_data()[
+            f"{ZarrTraceDataset._GROUP_ROOT_PATH}/{self._channel_index}/{ZarrTraceDataset._ARRAY_TRACES_PATH}"
+        ]
+
+    @property
+    def sample_windows(self) -> list[slice]:
+        return [
+            slice(start, min(start + self.sample_window_size, self._dataset.sample_count))
+            for start in range(0, self._dataset.sample_count, self.sample_window_size)
+        ]
+
+    @property
+    def tiles(self) -> list[tuple[slice, slice]]:
+        """
+        全部 tile 的 (曲线范围, 数据点范围)
+        """
+        trace_start, trace_stop = self._trace_range
+        return [
+            (slice(start, min(start + self.trace_chunk_size, trace_stop)), sample_window)
+            for start in range(trace_start, trace_stop, self.trace_chunk_size)
+            for sample_window in self.sample_windows
+        ]
+
+    def run(
+        self,
+        accumulator_factory: typing.Callable[[], typing.Any],
+        update: str | typing.Callable[..., None] = "update",
+        with_data: bool = True,
+    ) -> list[tuple[slice, typing.Any]]:
+        """
+        执行分析
+
+        :param accumulator_factory: 创建空累加器的函数，多进程执行时需要可被 pickle，如类或 functools.partial
+        :type accumulator_factory: typing.Callable[[], typing.Any]
+        :param update: 累加器的更新方法名称，或以 (accumulator, traces, data) 为参数的函数，
+                       如 functools.partial(TTest.update_with_data, label_byte=0)
+        :type update: str | typing.Callable[..., None]
+        :param with_data: 是否将曲线的明文、密文等数据传给更新方法
+        :type with_data: bool
+        :return: 每个数据点窗口及其合并后的累加器
+        :rtype: list[tuple[slice, typing.Any]]
+        """
+        windows = self.sample_windows
+        results = {window.start: accumulator_factory() for window in windows}
+        tasks = [
+            (
+                self._dataset.get_origin_data().store,
+                self._channel_index,
+                trace_range,
+                sample_window,
+                accumulator_factory,
+                update,
+                with_data,
+            )
+            for trace_range, sample_window in self.tiles
+        ]
+        if self.max_workers == 1 or len(tasks) <= 1:
+            for task in tasks:
+                results[task[3].start].merge(_process_tile(*task))
+        else:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                futures = {executor.submit(_process_tile_shared, *task): task for task in tasks}
+                for future in concurrent.futures.as_completed(futures):
+                    _merge_shared(results[futures[future][3].start], *future.result())
+        _logger.debug(f"Processed {len(tasks)} tiles of channel {self._channel_index}.")
+        return [(window, results[window.start]) for window in windows]
+
+
+def concatenate_windows(
+    results: list[tuple[slice, typing.Any]], result_function: typing.Callable[[typing.Any], np.ndarray]
+) -> np.ndarray:
+    """
+    将各数据点窗口的计算结果沿最后一维（数据点）拼接
+
+    :param results: TileExecutor.run 的返回值
+    :type results: list[tuple[slice, typing.Any]]
+    :param result_function: 从累加器计算结果的函数，如 lambda cpa: cpa.correlation()
+    :type result_function: typing.Callable[[typing.Any], np.ndarray]
+    :return: 拼接后的结果
+    :rtype: np.ndarray
+    """
+    return np.concatenate([result_function(accumulator) for _, accumulator in results], axis=-1)
+
+
+def _process_tile(
+    store,
+    channel_index: int,
+    trace_range: slice,
+    sample_window: slice,
+    accumulator_factory: typing.Callable[[], typing.Any],
+    update: str | typing.Callable[..., None],
+    with_data: bool,
+) -> typing.Any:
+    import zarr
+
+    root = zarr.open_group(store=store, mode="r")
+    channel_group = root[f"{ZarrTraceDataset._GROUP_ROOT_PATH}/{channel_index}"]
+    traces = channel_group[ZarrTraceDataset._ARRAY_TRACES_PATH][trace_range, sample_window]
+    accumulator = accumulator_factory()
+    if isinstance(update, str):
+        update = getattr(type(accumulator), update)
+    if with_data:
+        data = {}
+        for key, path in (
+            ("plaintext", ZarrTraceDataset._ARRAY_DATA_PLAINTEXT_PATH),
+            ("ciphertext", ZarrTraceDataset._ARRAY_DATA_CIPHERTEXT_PATH),
+            ("key", ZarrTraceDataset._ARRAY_DATA_KEY_PATH),
+            ("extended", ZarrTraceDataset._ARRAY_DATA_EXTENDED_PATH),
+        ):
+            data[key] = channel_group[path][trace_range] if path in channel_group else None
+        update(accumulator, traces, data)
+    else:
+        update(accumulator, traces)
+    return accumulator
+
+
+def _process_tile_shared(*args) -> tuple[bytes, str | None, list[tuple[int, int]]]:
+    # 累加器的数组作为带外缓冲区写入共享内存，只有对象结构本身被 pickle 传回主进程
+    buffers: list[pickle.PickleBuffer] = []
+    skeleton = pickle.dumps(_process_tile(*args), protocol=5, buffer_callback=buffers.append)
+    raws = [buffer.raw() for buffer in buffers]
+    total = sum(raw.nbytes for raw in raws)
+    if total == 0:
+        return skeleton, None, [(0, raw.nbytes) for raw in raws]
+    shm = shared_memory.SharedMemory(create=True, size=total)
+    layout = []
+    offset = 0
+    for raw in raws:
+        shm.buf[offset : offset + raw.nbytes] = raw
+        layout.append((offset, raw.nbytes))
+        offset += raw.nbytes
+        raw.release()
+    shm.close()
+    # 共享内存由主进程合并后释放，不再由工作进程的 resource_tracker 跟踪
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return skeleton, shm.name, layout
+
+
+def _merge_shared(target: typing.Any, skeleton: bytes, shm_name: str | None, layout: list[tuple[int, int]]):
+    if shm_name is None:
+        target.merge(pickle.loads(skeleton, buffers=[b"" for _ in layout]))
+        return
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        views = [shm.buf[offset : offset + length] for offset, length in layout]
+        accumulator = pickle.loads(skeleton, buffers=views)
+        # merge 将数据累加到目标累加器中，之后共享内存即可释放
+        target.merge(accumulator)
+        del accumulator
+        for view in views:
+            view.release()
+    finally:
+        shm.close()
+        shm.unlink()
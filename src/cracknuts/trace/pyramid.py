@@ -0,0 +1,204 @@
+# Copyright 2024 CrackNuts. All rights reserved.
+
+import numpy as np
+import zarr
+from numpy.typing import NDArray
+
+from cracknuts import logger
+from cracknuts.trace.trace import TraceDataset, ZarrTraceDataset
+
+_logger = logger.get_logger(__name__)
+
+PYRAMID_GROUP_PATH = "pyramid"
+
+
+def build_pyramid(
+    dataset: ZarrTraceDataset,
+    channel_name: str | int | None = None,
+    factor: int = 4,
+    min_bin_size: int = 16,
+    chunk_size: int | None = None,
+) -> None:
+    """
+    构建曲线的多分辨率最小/最大值金字塔，写入 pyramid/<通道>/<层级>。
+    第 level 层将曲线按 factor ** level 个数据点分段，每段保存最小值与最大值，数组形状为 (曲线条数, 段数, 2)，
+    展示时按屏幕宽度选择合适的层级读取，缩放的开销只与屏幕宽度有关，与曲线长度无关。
+
+    最细层级由原始曲线计算，之后每层由上一层合并得到，曲线按 chunk 分批读取，只扫描一次原始数据。
+
+    :param dataset: zarr 格式的曲线数据集
+    :type dataset: ZarrTraceDataset
+    :param channel_name: 通道名称或通道索引，为 None 时构建所有通道
+    :type channel_name: str | int | None
+    :param factor: 相邻层级的分段长度倍数
+    :type factor: int
+    :param min_bin_size: 最细层级的最小分段长度，更细的层级占用空间大且收益小，不保存
+    :type min_bin_size: int
+    :param chunk_size: 每批读取的曲线条数，为 None 时使用 zarr chunk 大小，各层级的分段维度同样分块，
+                       使单个 chunk 约 4M 个值
+    :type chunk_size: int | None
+    """
+    if not isinstance(dataset, ZarrTraceDataset):
+        raise ValueError("Only ZarrTraceDataset can hold a min/max pyramid.")
+    if channel_name is None:
+        channel_indexes = range(dataset.channel_count)
+    elif isinstance(channel_name, int):
+        channel_indexes = [channel_name]
+    else:
+        channel_indexes = [dataset.channel_names.index(channel_name)]
+    levels = _pyramid_levels(dataset.sample_count, factor, min_bin_size)
+    if not levels:
+        _logger.info(f"The traces of {dataset.sample_count} samples are too short to build a min/max pyramid.")
+        return
+
+    root = zarr.open_group(store=dataset.get_origin_data().store, mode="a")
+    trace_count = dataset.trace_count
+    for channel_index in channel_indexes:
+        traces = root[f"{ZarrTraceDataset._GROUP_ROOT_PATH}/{channel_index}/{ZarrTraceDataset._ARRAY_TRACES_PATH}"]
+        step = chunk_size or traces.chunks[0]
+        # 分段维度同样分块，细层级的单个 chunk 不会过大，局部缩放时只读取区间所在的 chunk
+        bin_chunk = max(1, ZarrTraceDataset._ZARR_TRACE_CHUNK_SAMPLES // (2 * step))
+        group = root.require_group(f"{PYRAMID_GROUP_PATH}/{channel_index}")
+        arrays = []
+        for level, bin_size in levels:
+            bin_count = -(-dataset.sample_count // bin_size)
+            arrays.append(
+                group.create(
+                    str(level),
+                    shape=(trace_count, bin_count, 2),
+                    chunks=(step, min(bin_chunk, bin_count), 2),
+                    dtype=traces.dtype,
+                    overwrite=True,
+                )
+            )
+        group.attrs["metadata"] = {"factor": factor, "levels": [[level, bin_size] for level, bin_size in levels]}
+        for start in range(0, trace_count, step):
+            end = min(start + step, trace_count)
+            block = traces[start:end]
+            current = _reduce(block, block, levels[0][1])
+            arrays[0][start:end] = current
+            for array in arrays[1:]:
+                current = _reduce(current[:, :, 0], current[:, :, 1], factor)
+                array[start:end] = current
+        _logger.debug(f"Built the min/max pyramid of channel {channel_index}, levels: {levels}.")
+
+
+def _pyramid_levels(sample_count: int, factor: int, min_bin_size: int) -> list[tuple[int, int]]:
+    levels = []
+    level, bin_size = 1, factor
+    while bin_size < sample_count:
+        if bin_size >= min_bin_size:
+            levels.append((level, bin_size))
+        level, bin_size = level + 1, bin_size * factor
+    return levels
+
+
+def _reduce(min_values: np.ndarray, max_values: np.ndarray, size: int) -> np.ndarray:
+    # 每 size 个最小/最大值合并为一个，末尾不足 size 个的同样合并，返回 (n, count, 2)
+    indexes = np.arange(0, min_values.shape[1], size)
+    result = np.empty((min_values.shape[0], len(indexes), 2), dtype=min_values.dtype)
+    result[:, :, 0] = np.minimum.reduceat(min_values, indexes, axis=1)
+    result[:, :, 1] = np.maximum.reduceat(max_values, indexes, axis=1)
+    return result
+
+
+class MinMaxPyramid:
+    """
+    读取数据集中某通道的最小/最大值金字塔
+    """
+
+    def __init__(self, group: zarr.hierarchy.Group):
+        """
+        :param group: 金字塔分组，即 pyramid/<通道索引>
+        :type group: zarr.hierarchy.Group
+        """
+        self._group = group
+        metadata = group.attrs["metadata"]
+        self.factor: int = metadata["factor"]
+        self.levels: list[tuple[int, int]] = [(level, bin_size) for level, bin_size in metadata["levels"]]
+
+    @classmethod
+    def open(cls, dataset: TraceDataset, channel_name: str | int = 0) -> "MinMaxPyramid | None":
+        """
+        打开数据集中某通道的金字塔
+
+        :param dataset: 曲线数据集
+        :type dataset: TraceDataset
+        :param channel_name: 通道名称或通道索引
+        :type channel_name: str | int
+        :return: 金字塔，数据集未构建金字塔时为 None
+        :rtype: MinMaxPyramid | None
+        """
+        if not isinstance(dataset, ZarrTraceDataset):
+            return None
+        channel_index = channel_name if isinstance(channel_name, int) else dataset.channel_names.index(channel_name)
+        group = dataset.get_origin_data().get(f"{PYRAMID_GROUP_PATH}/{channel_index}")
+        if group is None or "metadata" not in group.attrs:
+            return None
+        return cls(group)
+
+    def select_level(self, start: int, end: int, pixel: int) -> tuple[int, int] | None:
+        """
+        选择在 [start, end) 区间内每个像素至少有一个分段的最粗层级
+
+        :return: (层级, 分段长度)，区间过短时没有合适的层级，返回 None
+        :rtype: tuple[int, int] | None
+        """
+        selected = None
+        for level, bin_size in self.levels:
+            if bin_size * pixel <= end - start:
+                selected = level, bin_size
+        return selected
+
+    def minmax(
+        self, trace_index: int, start: int, end: int, pixel: int
+    ) -> tuple[NDArray[np.int32], NDArray[np.int16]] | None:
+        """
+        读取曲线在 [start, end) 区间内的降采样结果，格式与 downsample.minmax 一致：
+        每个分段对应两个点，横坐标均为分段起点，纵坐标依次为最大值、最小值。
+
+        :param trace_index: 曲线索引
+        :type trace_index: int
+        :param start: 起始数据点
+        :type start: int
+        :param end: 结束数据点（不包含）
+        :type end: int
+        :param pixel: 屏幕宽度（像素）
+        :type pixel: int
+        :return: 横坐标及纵坐标，没有合适的层级时返回 None，此时应使用原始曲线降采样
+        :rtype: tuple[NDArray[np.int32], NDArray[np.int16]] | None
+        """
+        result = self.minmax_2d([trace_index], start, end, pixel)
+        if result is None:
+            return None
+        index, values = result
+        return index, values[0]
+
+    def minmax_2d(
+        self, trace_indexes: list[int], start: int, end: int, pixel: int
+    ) -> tuple[NDArray[np.int32], np.ndarray] | None:
+        """
+        一次读取多条曲线在 [start, end) 区间内的降采样结果，格式与 downsample.minmax_2d 一致
+
+        :param trace_indexes: 曲线索引列表
+        :type trace_indexes: list[int]
+        :param start: 起始数据点
+        :type start: int
+        :param end: 结束数据点（不包含）
+        :type end: int
+        :param pixel: 屏幕宽度（像素）
+        :type pixel: int
+        :return: 横坐标及 (曲线条数, 点数) 纵坐标，没有合适的层级或金字塔不包含某条曲线（构建后数据集增长）时返回 None
+        :rtype: tuple[NDArray[np.int32], np.ndarray] | None
+        """
+        selected = self.select_level(start, end, pixel)
+        if selected is None:
+            return None
+        level, bin_size = selected
+        array = self._group[str(level)]
+        if len(trace_indexes) > 0 and max(trace_indexes) >= array.shape[0]:
+            return None
+        bin_start, bin_end = start // bin_size, min(-(-end // bin_size), array.shape[1])
+        min_max = array.oindex[list(trace_indexes), bin_start:bin_end]
+        index = np.maximum(np.arange(bin_start, bin_end, dtype=np.int32) * bin_size, start).repeat(2)
+        return index, min_max[:, :, ::-1].reshape(len(trace_indexes), -1)
@@ -0,0 +1,155 @@
+# Copyright 2024 CrackNuts. All rights reserved.
+
+import numpy as np
+import zarr
+
+STATS_GROUP_PATH = "stats"
+ARRAY_MEAN_PATH = "mean"
+ARRAY_VARIANCE_PATH = "variance"
+ARRAY_MIN_PATH = "min"
+ARRAY_MAX_PATH = "max"
+
+
+class SampleStats:
+    """
+    逐数据点的运行统计量：均值、方差、最小值及最大值。
+
+    曲线先缓存为一批，批满后按 Welford 算法的批量形式（Chan 等人的合并公式）累计到总体统计量中，
+    每个数据点只保留均值与二阶中心矩之和，数值稳定且不需要保存曲线本身。
+    """
+
+    _BATCH_SAMPLES = 4_194_304  # 单批缓存的目标数据点数量: 4M
+
+    def __init__(self, sample_count: int, batch_size: int | None = None):
+        """
+        :param sample_count: 曲线长度（数据点数量）
+        :type sample_count: int
+        :param batch_size: 单批缓存的曲线条数，为 None 时根据曲线长度自动计算
+        :type batch_size: int | None
+        """
+        self.sample_count: int = sample_count
+        self._count: int = 0
+        self._mean: np.ndarray = np.zeros(sample_count, dtype=np.float64)
+        self._m2: np.ndarray = np.zeros(sample_count, dtype=np.float64)
+        self._min: np.ndarray = np.full(sample_count, np.inf)
+        self._max: np.ndarray = np.full(sample_count, -np.inf)
+        if batch_size is None:
+            batch_size = min(256, self._BATCH_SAMPLES // max(1, sample_count))
+        self._batch: np.ndarray = np.empty((max(1, batch_size), sample_count), dtype=np.float64)
+        self._batch_count: int = 0
+
+    @property
+    def count(self) -> int:
+        self._flush_batch()
+        return self._count
+
+    @property
+    def mean(self) -> np.ndarray:
+        self._flush_batch()
+        return self._mean
+
+    @property
+    def variance(self) -> np.ndarray:
+        """
+        总体方差
+        """
+        self._flush_batch()
+        return self._m2 / self._count if self._count > 0 else np.zeros_like(self._m2)
+
+    @property
+    def min(self) -> np.ndarray:
+        self._flush_batch()
+        return self._min
+
+    @property
+    def max(self) -> np.ndarray:
+        self._flush_batch()
+        return self._max
+
+    def add(self, trace: np.ndarray) -> None:
+        """
+        累计一条曲线
+
+        :param trace: 曲线
+        :type trace: np.ndarray
+        """
+        self._batch[self._batch_count] = trace
+        self._batch_count += 1
+        if self._batch_count == len(self._batch):
+            self._flush_batch()
+
+    def update(self, traces: np.ndarray) -> None:
+        """
+        累计一批曲线
+
+        :param traces: (n, sample_count) 曲线
+        :type traces: np.ndarray
+        """
+        self._flush_batch()
+        self._update(np.asarray(traces, dtype=np.float64))
+
+    def _flush_batch(self):
+        if self._batch_count > 0:
+            batch_count, self._batch_count = self._batch_count, 0
+            self._update(self._batch[:batch_count])
+
+    def _update(self, traces: np.ndarray):
+        if len(traces) == 0:
+            return
+        mean = traces.mean(axis=0)
+        m2 = ((traces - mean) ** 2).sum(axis=0)
+        self._combine(len(traces), mean, m2)
+        np.minimum(self._min, traces.min(axis=0), out=self._min)
+        np.maximum(self._max, traces.max(axis=0), out=self._max)
+
+    def _combine(self, count: int, mean: np.ndarray, m2: np.ndarray):
+        total = self._count + count
+        delta = mean - self._mean
+        self._mean += delta * (count / total)
+        self._m2 += m2 + delta**2 * (self._count * count / total)
+        self._count = total
+
+    def merge(self, other: "SampleStats") -> None:
+        """
+        合并另一组统计量
+
+        :param other: 另一组统计量
+        :type other: SampleStats
+        """
+        if other.count == 0:
+            return
+        self._flush_batch()
+        self._combine(other._count, other._mean, other._m2)
+        np.minimum(self._min, other._min, out=self._min)
+        np.maximum(self._max, other._max, out=self._max)
+
+    def save(self, group: zarr.hierarchy.Group) -> None:
+        """
+        将统计量写入 zarr 分组
+
+        :param group: 统计量所在分组，通常为 stats/<通道索引>
+        :type group: zarr.hierarchy.Group
+        """
+        for path, value in (
+            (ARRAY_MEAN_PATH, self.mean),
+            (ARRAY_VARIANCE_PATH, self.variance),
+            (ARRAY_MIN_PATH, self.min),
+            (ARRAY_MAX_PATH, self.max),
+        ):
+            group.array(path, value, overwrite=True)
+        group.attrs["count"] = self._count
+
+    @staticmethod
+    def read(group: zarr.hierarchy.Group) -> dict[str, np.ndarray | int]:
+        """
+        从 zarr 分组读取统计量
+
+        :param group: 统计量所在分组
+        :type group: zarr.hierarchy.Group
+        :return: 以 count、mean、variance、min、max 为键的字典
+        :rtype: dict[str, np.ndarray | int]
+        """
+        stats = {"count": group.attrs.get("count", 0)}
+        for path in (ARRAY_MEAN_PATH, ARRAY_VARIANCE_PATH, ARRAY_MIN_PATH, ARRAY_MAX_PATH):
+            stats[path] = group[path][:]
+        return stats
@@ -1,16 +1,19 @@
 # Copyright 2024 CrackNuts. All rights reserved.
 
 import abc
+import io
 import json
 import os.path
 import time
 import typing
 import warnings
+from collections.abc import Sequence
 
 import numpy as np
 import zarr
 
 from cracknuts import logger
+from cracknuts.trace.sample_stats import STATS_GROUP_PATH, SampleStats
 
 
 class TraceDatasetData:
@@ -244,6 +247,85 @@ class TraceDataset(abc.ABC):
         """
         ...
 
+    def get_data_arrays(
+        self, channel_name: str | int, trace_slice: slice | list[int] | int = slice(None)
+    ) -> dict[str, np.ndarray | None]:
+        """
+        批量获取指定通道的明文、密文、密钥及扩展数据，每类数据只读取一次
+
+        :param channel_name: 通道名称或通道索引
+        :type channel_name: str | int
+        :param trace_slice: 曲线索引，支持切片、索引列表或单个索引
+        :type trace_slice: slice | list[int] | int
+        :return: 以 plaintext、ciphertext、key、extended 为键的字典，值为 (n, length) 的 uint8 数组，不存在的数据为 None
+        :rtype: dict[str, np.ndarray | None]
+        """
+        channel_index = channel_name if isinstance(channel_name, int) else self._channel_names.index(channel_name)
+        return self._get_data_arrays(channel_index, self._to_trace_selection(self._trace_count, trace_slice))
+
+    @abc.abstractmethod
+    def _get_data_arrays(
+        self, channel_index: int, trace_selection: slice | list[int]
+    ) -> dict[str, np.ndarray | None]: ...
+
+    def get_trace_window(
+        self,
+        channel_name: str | int,
+        trace_slice: slice | list[int] | int = slice(None),
+        start: int = 0,
+        end: int | None = None,
+    ) -> np.ndarray:
+        """
+        读取指定通道部分曲线在 [start, end) 区间内的数据点，只读取该区间，不读取完整曲线
+
+        :param channel_name: 通道名称或通道索引
+        :type channel_name: str | int
+        :param trace_slice: 曲线索引，支持切片、索引列表或单个索引
+        :type trace_slice: slice | list[int] | int
+        :param start: 起始数据点
+        :type start: int
+        :param end: 结束数据点（不包含），为 None 时读取到曲线末尾
+        :type end: int | None
+        :return: (曲线条数, end - start) 的曲线
+        :rtype: np.ndarray
+        """
+        channel_index = channel_name if isinstance(channel_name, int) else self._channel_names.index(channel_name)
+        start = max(0, start)
+        end = self._sample_count if end is None else min(max(start, end), self._sample_count)
+        return self._get_trace_window(
+            channel_index, self._to_trace_selection(self._trace_count, trace_slice), start, end
+        )
+
+    @abc.abstractmethod
+    def _get_trace_window(
+        self, channel_index: int, trace_selection: slice | list[int], start: int, end: int
+    ) -> np.ndarray: ...
+
+    def _get_data_view(self, channel_index: int, trace_slice) -> "_TraceDataView":
+        trace_selection = self._to_trace_selection(self._trace_count, trace_slice)
+        return _TraceDataView(
+            self._get_data_arrays(channel_index, trace_selection),
+            len(self._parse_slice(self._trace_count, trace_selection)),
+            **self._data_view_options(),
+        )
+
+    def _data_view_options(self) -> dict:
+        return {}
+
+    @staticmethod
+    def _to_trace_selection(origin_count, index_slice) -> slice | list[int]:
+        # 统一为正向切片或索引列表，便于各存储格式一次性读取
+        if isinstance(index_slice, int):
+            index = range(origin_count)[index_slice]
+            return slice(index, index + 1)
+        elif isinstance(index_slice, slice):
+            start, stop, step = index_slice.indices(origin_count)
+            if step > 0:
+                return slice(start, stop, step)
+            return list(range(start, stop, step))
+        else:
+            return list(index_slice)
+
     @staticmethod
     def _parse_slice(origin_count, index_slice) -> list:
         if origin_count is None:
@@ -259,6 +341,17 @@ class TraceDataset(abc.ABC):
             raise ValueError("index_slice is not a slice or list")
         return indices
 
+    def get_sample_stats(self, channel_name: str | int = 0) -> dict[str, np.ndarray | int] | None:
+        """
+        获取写入时累计或由 compute_sample_stats 计算的逐数据点统计量，不需要读取曲线
+
+        :param channel_name: 通道名称或通道索引
+        :type channel_name: str | int
+        :return: 以 count、mean、variance、min、max 为键的字典，数据集未保存统计量时为 None
+        :rtype: dict[str, np.ndarray | int] | None
+        """
+        return None
+
     def __repr__(self):
         t = type(self)
         return f"<{t.__module__}.{t.__name__} ({self._channel_names}, {self._trace_count})"
@@ -320,6 +413,55 @@ class TraceDataset(abc.ABC):
         return tpw
 
 
+class _TraceDataView(Sequence):
+    """
+    按曲线访问数据的延迟视图，底层为批量读取的 (n, length) 数组，只有在访问某条曲线时才构造对应的数据字典
+    """
+
+    _DATA_KEYS = ("plaintext", "ciphertext", "key", "extended")
+
+    def __init__(
+        self,
+        data_arrays: dict[str, np.ndarray | None],
+        count: int,
+        key_names: dict[str, str] | None = None,
+        keep_missing: bool = False,
+    ):
+        self._data_arrays = data_arrays
+        self._count = count
+        self._key_names = key_names or {}
+        self._keep_missing = keep_missing
+
+    @property
+    def arrays(self) -> dict[str, np.ndarray | None]:
+        """
+        底层批量数据数组
+        """
+        return self._data_arrays
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("trace data index out of range")
+        data = {}
+        for key in self._DATA_KEYS:
+            array = self._data_arrays.get(key)
+            if array is not None:
+                data[self._key_names.get(key, key)] = array[index].tobytes()
+            elif self._keep_missing:
+                data[self._key_names.get(key, key)] = None
+        return data
+
+    def __repr__(self):
+        return repr(list(self))
+
+
 class _InfoRender:
     def __init__(
         self,
@@ -374,6 +516,13 @@ class ZarrTraceDataset(TraceDataset):
     │       ├── key                     [Array]
     │       └── ...
     │
+    ├── stats/                          <-- [一级分组] 采集时累计的逐数据点统计量
+    │   └── 0/                          <-- [二级分组] 通道 0
+    │       ├── mean                    [Array]
+    │       ├── variance                [Array]
+    │       ├── min                     [Array]
+    │       └── max                     [Array]
+    │
     ├── aligned/                        <-- [一级分组] 处理后的数据集
     │   │
     │   ├── 0/                          <-- [二级分组] 对应通道 0 的对齐数据
@@ -396,6 +545,7 @@ class ZarrTraceDataset(TraceDataset):
     _ARRAY_DATA_EXTENDED_PATH = "extended"
 
     _ZARR_ARRAY_CHUNK_MAX = 52_428_800  # 50M
+    _ZARR_TRACE_CHUNK_SAMPLES = 4_194_304  # 自动计算 chunk 曲线条数时，单个chunk的目标数据点数量: 4M
 
     def __init__(
         self,
@@ -414,6 +564,8 @@ class ZarrTraceDataset(TraceDataset):
         zarr_data_group_kwargs: dict | None = None,
         create_time: int | None = None,
         version: str | None = None,
+        trace_chunk_size: int | None = None,
+        sample_stats: bool = False,
     ):
         """
         以Zarr格式存储的 CrackNuts曲线数据集，用户使用时不建议使用构造函数，而是调用 load 函数。
@@ -421,8 +573,9 @@ class ZarrTraceDataset(TraceDataset):
         :type zarr_path: str
         :param channel_names: 曲线中通道的名称列表
         :type channel_names: list[str]
-        :param trace_count: 曲线条数
-        :type trace_count: int
+        :param trace_count: 曲线条数，为 None 或小于等于 0 时创建可增长的数据集，曲线条数随写入自动扩展，
+                            最终条数在 dump 时写入元数据
+        :type trace_count: int | None
         :param sample_count: 曲线长度（数据点数量）
         :type sample_count: int
         :param data_plaintext_length: 明文长度
@@ -443,6 +596,12 @@ class ZarrTraceDataset(TraceDataset):
         :type create_time: int
         :param version: Cracker等版本信息
         :type version: str
+        :param trace_chunk_size: 单个chunk块包含的曲线条数，为 None 时根据曲线长度自动计算。
+                                 写入时曲线会先缓存在内存中，凑满一个chunk块后整块写入磁盘。
+        :type trace_chunk_size: int | None
+        :param sample_stats: 写入时是否累计逐数据点统计量，每个通道需要约 5 条 float64 曲线的内存，
+                             并增加每次写入的计算量，不累计时可在采集后调用 compute_sample_stats 计算
+        :type sample_stats: bool
         """
 
         self._zarr_path: str = zarr_path
@@ -459,6 +618,14 @@ class ZarrTraceDataset(TraceDataset):
 
         self._logger = logger.get_logger(self)
 
+        # 写入缓冲，key 为 (通道索引, 数组名称)
+        self._write_buffers: dict[tuple[int, str], _ZarrChunkBuffer] = {}
+        # 写入时累计的逐数据点统计量，key 为通道索引，dump 时写入 stats 分组
+        self._sample_stats_enabled: bool = sample_stats
+        self._sample_stats: dict[int, SampleStats] = {}
+        # 已累计到统计量中的曲线，key 为通道索引，每条曲线一个字节，重复写入的曲线不再累计
+        self._sample_stats_counted: dict[int, bytearray] = {}
+
         if zarr_kwargs is None:
             zarr_kwargs = {}
         if zarr_trace_group_kwargs is None:
@@ -469,60 +636,45 @@ class ZarrTraceDataset(TraceDataset):
         mode = zarr_kwargs.pop("mode", "w" if create_empty else "r")
         self._zarr_data = zarr.open(zarr_path, mode=mode, **zarr_kwargs)
 
+        self._growable: bool = create_empty and (self._trace_count is None or self._trace_count <= 0)
+
         if create_empty:
-            if self._channel_names is None or self._trace_count is None or self._sample_count is None:
-                raise ValueError(
-                    "channel_names and trace_count and sample_count " "must be specified when in write mode."
-                )
+            if self._channel_names is None or self._sample_count is None:
+                raise ValueError("channel_names and sample_count must be specified when in write mode.")
             self._create_time = int(time.time())
+            if trace_chunk_size is None:
+                trace_chunk_size = self._ZARR_TRACE_CHUNK_SAMPLES // self._sample_count
+            if self._growable:
+                self._trace_count = 0
+                self._trace_chunk_size = max(1, trace_chunk_size)
+                self._trace_capacity: int = self._trace_chunk_size
+            else:
+                self._trace_chunk_size = min(max(1, trace_chunk_size), max(1, self._trace_count))
+                self._trace_capacity: int = self._trace_count
             group_root = self._zarr_data.create_group(self._GROUP_ROOT_PATH)
             for i, _ in enumerate(self._channel_names):
                 channel_group = group_root.create_group(str(i))
                 zarr_array_chunks = (
-                    1,
+                    self._trace_chunk_size,
                     self._ZARR_ARRAY_CHUNK_MAX
                     if self._sample_count > self._ZARR_ARRAY_CHUNK_MAX
                     else self._sample_count,
-                )  # 一个chunk块只有一条曲线，单个chunk最大100M数据点，200M大小（未压缩时）
+                )  # 单个chunk最大50M数据点，100M大小（未压缩时）
                 channel_group.create(
                     self._ARRAY_TRACES_PATH,
-                    shape=(self._trace_count, self._sample_count),
+                    shape=(self._trace_capacity, self._sample_count),
                     dtype=trace_dtype,
                     chunks=zarr_array_chunks,
                     **zarr_trace_group_kwargs,
                 )
-                if self._data_plaintext_length is not None:
-                    channel_group.create(
-                        self._ARRAY_DATA_PLAINTEXT_PATH,
-                        shape=(
-                            self._trace_count,
-                            self._data_plaintext_length,
-                        ),
-                    )
-                if self._data_ciphertext_length is not None:
-                    channel_group.create(
-                        self._ARRAY_DATA_CIPHERTEXT_PATH,
-                        shape=(
-                            self._trace_count,
-                            self._data_ciphertext_length,
-                        ),
-                    )
-                if self._data_key_length is not None:
-                    channel_group.create(
-                        self._ARRAY_DATA_KEY_PATH,
-                        shape=(
-                            self._trace_count,
-                            self._data_key_length,
-                        ),
-                    )
-                if self._data_extended_length is not None:
-                    channel_group.create(
-                        self._ARRAY_DATA_EXTENDED_PATH,
-                        shape=(
-                            self._trace_count,
-                            self._data_extended_length,
-                        ),
-                    )
+                for data_path, data_length in (
+                    (self._ARRAY_DATA_PLAINTEXT_PATH, self._data_plaintext_length),
+                    (self._ARRAY_DATA_CIPHERTEXT_PATH, self._data_ciphertext_length),
+                    (self._ARRAY_DATA_KEY_PATH, self._data_key_length),
+                    (self._ARRAY_DATA_EXTENDED_PATH, self._data_extended_length),
+                ):
+                    if data_length is not None:
+                        self._create_data_array(channel_group, data_path, data_length, **zarr_data_group_kwargs)
             self._zarr_data.attrs[self._ATTR_METADATA_KEY] = {
                 "create_time": self._create_time,
                 "channel_names": self._channel_names,
@@ -554,6 +706,18 @@ class ZarrTraceDataset(TraceDataset):
             self._data_key_length = metadata.get("data_key_length")
             self._data_extended_length = metadata.get("data_extended_length")
             self._version = metadata.get("version")
+            traces = self._get_under_root(0, self._ARRAY_TRACES_PATH)
+            self._trace_chunk_size = 1 if traces is None else traces.chunks[0]
+            self._trace_capacity: int = self._trace_count
+
+    def _create_data_array(self, channel_group: zarr.hierarchy.Group, path: str, data_length: int, **kwargs):
+        return channel_group.create(
+            path,
+            shape=(self._trace_capacity, data_length),
+            chunks=(self._trace_chunk_size, data_length),
+            dtype=np.uint8,
+            **kwargs,
+        )
 
     @classmethod
     def load(cls, path: str, **kwargs) -> "TraceDataset":
@@ -579,8 +743,29 @@ class ZarrTraceDataset(TraceDataset):
         data_ciphertext_length: int | None = None,
         data_key_length: int | None = None,
         data_extended_length: int | None = None,
+        trace_chunk_size: int | None = None,
+        sample_stats: bool = False,
         **kwargs,
     ) -> "TraceDataset":
+        """
+        创建新的曲线数据集
+
+        :param path: 曲线路径
+        :type path: str
+        :param channel_names: 通道名称列表
+        :type channel_names: list[str]
+        :param trace_count: 曲线条数，为 None 或小于等于 0 时创建可增长的数据集
+        :type trace_count: int | None
+        :param sample_count: 曲线长度（数据点数量）
+        :type sample_count: int
+        :param version: Cracker等版本信息
+        :type version: str
+        :param trace_chunk_size: 单个chunk块包含的曲线条数，为 None 时根据曲线长度自动计算
+        :type trace_chunk_size: int | None
+        :param sample_stats: 写入时是否累计逐数据点统计量，默认不累计，可在采集后调用 compute_sample_stats 计算
+        :type sample_stats: bool
+        :param kwargs: zarr 格式的参数
+        """
         kwargs["mode"] = "w"
         return cls(
             path,
@@ -594,9 +779,28 @@ class ZarrTraceDataset(TraceDataset):
             data_key_length=data_key_length,
             data_extended_length=data_extended_length,
             zarr_kwargs=kwargs,
+            trace_chunk_size=trace_chunk_size,
+            sample_stats=sample_stats,
         )
 
+    def flush(self):
+        """
+        将写入缓冲中尚未落盘的曲线及数据写入 zarr 存储，读取曲线及数据的方法会先调用该函数，
+        因此写入过程中读取也能获取到缓冲中的曲线
+        """
+        for buffer in self._write_buffers.values():
+            buffer.flush()
+
     def dump(self, path: str | None = None, **kwargs):
+        self.flush()
+        if self._growable:
+            if self._trace_capacity != self._trace_count:
+                self._resize_trace_axis(self._trace_count)
+            self._zarr_data.attrs[self._ATTR_METADATA_KEY] = self._zarr_data.attrs[self._ATTR_METADATA_KEY] | {
+                "trace_count": self._trace_count
+            }
+        for channel_index, stats in self._sample_stats.items():
+            stats.save(self._zarr_data.require_group(f"{STATS_GROUP_PATH}/{channel_index}"))
         if path is not None and path != self._zarr_path:
             zarr.copy_store(self._zarr_data, zarr.open(path, mode="w"))
 
@@ -608,13 +812,14 @@ class ZarrTraceDataset(TraceDataset):
         data: dict[str, np.ndarray[np.int8] | bytes] | None = None,
     ):
         """
-        设置曲线，该函数仅需要上位机调用，用户无需调用
+        设置曲线，该函数仅需要上位机调用，用户无需调用。
+        曲线会先写入内存中的 chunk 缓冲，调用 flush 或 dump 后才保证写入磁盘，读取前会自动调用 flush。
         """
         if self._trace_count is None or self._channel_count is None:
             raise Exception("Channel or trace count must has not specified.")
         if channel_name not in self._channel_names:
             raise ValueError("channel index out range")
-        if trace_index not in range(0, self._trace_count):
+        if trace_index < 0 or (not self._growable and trace_index >= self._trace_count):
             raise ValueError(f"trace, index out of range: trace count: {self._trace_count}, trace index: {trace_index}")
         if self._sample_count != trace.shape[0]:
             self._logger.error(
@@ -622,8 +827,14 @@ class ZarrTraceDataset(TraceDataset):
                 f"defined value {self._sample_count}, so the trace will be ignored."
             )
             return
+        if self._growable:
+            if trace_index >= self._trace_capacity:
+                self._grow(trace_index + 1)
+            self._trace_count = max(self._trace_count, trace_index + 1)
         channel_index = self._channel_names.index(channel_name)
-        self._get_under_root(channel_index, self._ARRAY_TRACES_PATH)[trace_index] = trace
+        self._get_write_buffer(channel_index, self._ARRAY_TRACES_PATH).put(trace_index, trace)
+        if self._sample_stats_enabled:
+            self._add_sample_stats(channel_index, trace_index, trace)
         if data is not None:
             channel_group = self._get_under_root(str(channel_index))
             for k, v in data.items():
@@ -637,58 +848,59 @@ class ZarrTraceDataset(TraceDataset):
                     attrs = self._zarr_data.attrs[self._ATTR_METADATA_KEY]
                     if k == "plaintext":
                         self._data_plaintext_length = data_length
-                        data_item_group = channel_group.create(
-                            k,
-                            shape=(
-                                self._trace_count,
-                                self._data_plaintext_length,
-                            ),
-                            dtype=np.uint8,
-                        )
+                        data_item_group = self._create_data_array(channel_group, k, data_length)
                         self._zarr_data.attrs[self._ATTR_METADATA_KEY] = attrs | {
                             "data_plaintext_length": self._data_plaintext_length
                         }
                     if k == "ciphertext":
                         self._data_ciphertext_length = data_length
-                        data_item_group = channel_group.create(
-                            k,
-                            shape=(
-                                self._trace_count,
-                                self._data_ciphertext_length,
-                            ),
-                            dtype=np.uint8,
-                        )
+                        data_item_group = self._create_data_array(channel_group, k, data_length)
                         self._zarr_data.attrs[self._ATTR_METADATA_KEY] = attrs | {
                             "data_ciphertext_length": self._data_ciphertext_length
                         }
                     if k == "key":
                         self._data_key_length = data_length
-                        data_item_group = channel_group.create(
-                            k,
-                            shape=(
-                                self._trace_count,
-                                self._data_key_length,
-                            ),
-                            dtype=np.uint8,
-                        )
+                        data_item_group = self._create_data_array(channel_group, k, data_length)
                         self._zarr_data.attrs[self._ATTR_METADATA_KEY] = attrs | {
                             "data_key_length": self._data_key_length
                         }
                     if k == "extended":
                         self._data_extended_length = data_length
-                        data_item_group = channel_group.create(
-                            k,
-                            shape=(
-                                self._trace_count,
-                                self._data_extended_length,
-                            ),
-                            dtype=np.uint8,
-                        )
+                        data_item_group = self._create_data_array(channel_group, k, data_length)
                         self._zarr_data.attrs[self._ATTR_METADATA_KEY] = attrs | {
                             "data_extended_length": self._data_extended_length
                         }
                 if data_item_group is not None:
-                    data_item_group[trace_index] = v
+                    self._get_write_buffer(channel_index, k).put(trace_index, v)
+
+    def _grow(self, required_count: int):
+        # 容量按倍数增长并对齐到 chunk 大小，保证扩容的均摊开销为常数
+        capacity = max(required_count, self._trace_capacity * 2)
+        capacity = -(-capacity // self._trace_chunk_size) * self._trace_chunk_size
+        self._resize_trace_axis(capacity)
+
+    def _resize_trace_axis(self, capacity: int):
+        # zarr 调整数组大小只修改数组元数据，已写入的 chunk 不会被重写
+        for channel_index in range(self._channel_count):
+            for path in (
+                self._ARRAY_TRACES_PATH,
+                self._ARRAY_DATA_PLAINTEXT_PATH,
+                self._ARRAY_DATA_CIPHERTEXT_PATH,
+                self._ARRAY_DATA_KEY_PATH,
+                self._ARRAY_DATA_EXTENDED_PATH,
+            ):
+                buffer = self._write_buffers.get((channel_index, path))
+                array = self._get_under_root(channel_index, path) if buffer is None else buffer.array
+                if array is not None:
+                    array.resize(capacity, *array.shape[1:])
+        self._trace_capacity = capacity
+
+    def _get_write_buffer(self, channel_index: int, path: str) -> "_ZarrChunkBuffer":
+        buffer = self._write_buffers.get((channel_index, path))
+        if buffer is None:
+            buffer = _ZarrChunkBuffer(self._get_under_root(channel_index, path))
+            self._write_buffers[(channel_index, path)] = buffer
+        return buffer
 
     def get_origin_data(self) -> zarr.hierarchy.Group:
         """
@@ -697,41 +909,116 @@ class ZarrTraceDataset(TraceDataset):
         :return: zarr数据对象
         :rtype: zarr.hierarchy.Group
         """
+        self.flush()
         return self._zarr_data
 
+    def _add_sample_stats(self, channel_index: int, trace_index: int, trace: np.ndarray):
+        counted = self._sample_stats_counted.setdefault(channel_index, bytearray())
+        if trace_index < len(counted) and counted[trace_index]:
+            self._logger.warning(
+                f"Trace {trace_index} of channel {channel_index} is rewritten, the sample statistics keep the first "
+                f"write, call compute_sample_stats after dump to recompute them."
+            )
+            return
+        if trace_index >= len(counted):
+            counted.extend(bytes(max(trace_index + 1, 2 * len(counted)) - len(counted)))
+        counted[trace_index] = 1
+        stats = self._sample_stats.get(channel_index)
+        if stats is None:
+            stats = self._sample_stats[channel_index] = SampleStats(self._sample_count)
+        stats.add(trace)
+
+    def get_sample_stats(self, channel_name: str | int = 0) -> dict[str, np.ndarray | int] | None:
+        channel_index = channel_name if isinstance(channel_name, int) else self._channel_names.index(channel_name)
+        stats = self._sample_stats.get(channel_index)
+        if stats is not None:
+            return {
+                "count": stats.count,
+                "mean": stats.mean,
+                "variance": stats.variance,
+                "min": stats.min,
+                "max": stats.max,
+            }
+        group = self._zarr_data.get(f"{STATS_GROUP_PATH}/{channel_index}")
+        return None if group is None else SampleStats.read(group)
+
+    def compute_sample_stats(self, channel_name: str | int | None = None, chunk_size: int | None = None) -> None:
+        """
+        扫描曲线计算逐数据点统计量并写入 stats 分组，用于采集时未累计统计量的数据集
+
+        :param channel_name: 通道名称或通道索引，为 None 时计算所有通道
+        :type channel_name: str | int | None
+        :param chunk_size: 每次读取的曲线条数，为 None 时使用 zarr chunk 大小
+        :type chunk_size: int | None
+        """
+        if channel_name is None:
+            channel_indexes = range(self._channel_count)
+        elif isinstance(channel_name, int):
+            channel_indexes = [channel_name]
+        else:
+            channel_indexes = [self._channel_names.index(channel_name)]
+        self.flush()
+        # 加载的数据集以只读方式打开，重新以可写方式打开存储写入统计量
+        root = zarr.open_group(store=self._zarr_data.store, mode="a")
+        for channel_index in channel_indexes:
+            traces = self._get_under_root(channel_index, self._ARRAY_TRACES_PATH)
+            step = chunk_size or traces.chunks[0]
+            stats = SampleStats(self._sample_count)
+            for start in range(0, self._trace_count, step):
+                stats.update(traces[start : min(start + step, self._trace_count)])
+            stats.save(root.require_group(f"{STATS_GROUP_PATH}/{channel_index}"))
+
     def get_trace_by_indexes(
         self, channel_name: str | int, *trace_indexes: int
     ) -> tuple[np.ndarray, list[dict[str, bytes | None]]] | None:
         """
         根据索引获取曲线数据，该函数用户无需使用
         """
+        self.flush()
         channel_index = self._channel_names.index(channel_name)
         return (
             self._get_under_root(channel_index, self._ARRAY_TRACES_PATH)[[i for i in trace_indexes]],
-            [self._get_data_by_index(channel_index, trace_index) for trace_index in trace_indexes],
+            self._get_data_view(channel_index, list(trace_indexes)),
         )
 
     def _get_data_by_index(self, channel_index: int, trace_index: int) -> dict[str, bytes | None]:
-        plaintext = self._get_under_root(channel_index, self._ARRAY_DATA_PLAINTEXT_PATH)
-        ciphertext = self._get_under_root(channel_index, self._ARRAY_DATA_CIPHERTEXT_PATH)
-        key = self._get_under_root(channel_index, self._ARRAY_DATA_KEY_PATH)
-        extended = self._get_under_root(channel_index, self._ARRAY_DATA_EXTENDED_PATH)
-        if plaintext is not None:
-            plaintext = plaintext[trace_index]
-            if ciphertext is not None:
-                plaintext = plaintext.tobytes()
-        if ciphertext is not None:
-            ciphertext = ciphertext[trace_index]
-            if ciphertext is not None:
-                ciphertext = ciphertext.tobytes()
-        if key is not None:
-            key = key[trace_index]
-            if key is not None:
-                key = key.tobytes()
-        if extended is not None:
-            if extended is not None:
-                extended = extended.tobytes()
-        return {"plaintext": plaintext, "ciphertext": ciphertext, "key": key, "extend": extended}
+        return self._get_data_view(channel_index, trace_index)[0]
+
+    def _data_view_options(self) -> dict:
+        # 兼容原有格式，扩展数据在字典中的键为 extend
+        return {"key_names": {"extended": "extend"}, "keep_missing": True}
+
+    def _get_data_arrays(self, channel_index: int, trace_selection: slice | list[int]) -> dict[str, np.ndarray | None]:
+        self.flush()
+        data_arrays = {}
+        for key, path in (
+            ("plaintext", self._ARRAY_DATA_PLAINTEXT_PATH),
+            ("ciphertext", self._ARRAY_DATA_CIPHERTEXT_PATH),
+            ("key", self._ARRAY_DATA_KEY_PATH),
+            ("extended", self._ARRAY_DATA_EXTENDED_PATH),
+        ):
+            array = self._get_under_root(channel_index, path)
+            if array is None:
+                data_arrays[key] = None
+            elif isinstance(trace_selection, slice):
+                data_arrays[key] = np.asarray(array[trace_selection], dtype=np.uint8)
+            elif len(trace_selection) == 0:
+                data_arrays[key] = np.empty((0, array.shape[1]), dtype=np.uint8)
+            else:
+                data_arrays[key] = np.asarray(array.oindex[trace_selection, :], dtype=np.uint8)
+        return data_arrays
+
+    def _get_trace_window(
+        self, channel_index: int, trace_selection: slice | list[int], start: int, end: int
+    ) -> np.ndarray:
+        self.flush()
+        traces = self._get_under_root(channel_index, self._ARRAY_TRACES_PATH)
+        if isinstance(trace_selection, slice):
+            return traces[trace_selection, start:end]
+        elif len(trace_selection) == 0:
+            return np.empty((0, end - start), dtype=traces.dtype)
+        else:
+            return traces.oindex[trace_selection, start:end]
 
     def get_trace_by_range(
         self, channel_name: str, index_start: int, index_end: int
@@ -739,10 +1026,11 @@ class ZarrTraceDataset(TraceDataset):
         """
         根据索引获取曲线数据，该函数用户无需使用
         """
+        self.flush()
         channel_index = self._channel_names.index(channel_name)
         return (
             self._get_under_root(channel_index, self._ARRAY_TRACES_PATH)[index_start:index_end],
-            [self._get_data_by_index(channel_index, trace_index) for trace_index in range(index_start, index_end)],
+            self._get_data_view(channel_index, slice(index_start, index_end)),
         )
 
     def _get_under_root(self, *paths: typing.Any):
@@ -756,6 +1044,7 @@ class ZarrTraceDataset(TraceDataset):
     def _get_trace_data_with_indices(
         self, channel_slice, trace_slice
     ) -> tuple[list, list, np.ndarray, list[list[dict[str, bytes | None]]]]:
+        self.flush()
         traces = []
         data = []
 
@@ -769,29 +1058,28 @@ class ZarrTraceDataset(TraceDataset):
 
         for channel_index in channel_indexes:
             traces.append(self._get_under_root(channel_index, self._ARRAY_TRACES_PATH)[trace_slice])
-            data.append([self._get_data_by_index(channel_index, trace_index) for trace_index in trace_indexes])
+            data.append(self._get_data_view(channel_index, trace_slice))
 
         return channel_indexes, trace_indexes, np.array(traces), data
 
     def _get_trace_data(self, channel_slice, trace_slice) -> tuple[np.ndarray, list[list[dict[str, bytes | None]]]]:
+        self.flush()
         traces = []
         data = []
 
-        channel_indexes, trace_indexes = (
-            self._parse_slice(self._channel_count, channel_slice),
-            self._parse_slice(self._trace_count, trace_slice),
-        )
+        channel_indexes = self._parse_slice(self._channel_count, channel_slice)
 
         if isinstance(trace_slice, int):
             trace_slice = slice(trace_slice, trace_slice + 1)
 
         for channel_index in channel_indexes:
             traces.append(self._get_under_root(channel_index, self._ARRAY_TRACES_PATH)[trace_slice])
-            data.append([self._get_data_by_index(channel_index, trace_index) for trace_index in trace_indexes])
+            data.append(self._get_data_view(channel_index, trace_slice))
 
         return np.vstack(traces), data
 
     def _get_trace(self, channel_slice, trace_slice) -> np.ndarray:
+        self.flush()
         traces = []
 
         channel_indexes = self._parse_slice(self.channel_count, channel_slice)
@@ -807,43 +1095,50 @@ class ZarrTraceDataset(TraceDataset):
     def _get_data(self, channel_slice, trace_slice) -> list[list[dict[str, bytes | None]]]:
         data = []
 
-        channel_indexes, trace_indexes = (
-            self._parse_slice(self._channel_count, channel_slice),
-            self._parse_slice(self._trace_count, trace_slice),
-        )
+        channel_indexes = self._parse_slice(self._channel_count, channel_slice)
 
         for channel_index in channel_indexes:
-            data.append([self._get_data_by_index(channel_index, trace_index) for trace_index in trace_indexes])
+            data.append(self._get_data_view(channel_index, trace_slice))
 
         return data
 
+    def get_trace_array_by_filter(self, trace_index_filter: TraceIndexFilter) -> tuple[list[int], zarr.core.Array]:
+        """
+        获取过滤器选中的曲线索引及其分组、通道下的 zarr 曲线数组，不读取曲线，用于按需读取部分区间
+
+        :param trace_index_filter: 曲线过滤器
+        :type trace_index_filter: TraceIndexFilter
+        :return: 选中的曲线索引及曲线数组
+        :rtype: tuple[list[int], zarr.core.Array]
+        """
+        self.flush()
+        group = trace_index_filter.group.strip()
+        if not group or group == self._GROUP_ORIGIN_PATH:  # 这里兼容原有格式，origin波形分组对应到 “/0”，
+            group = self._GROUP_ROOT_PATH
+        channel = trace_index_filter.channel
+        if isinstance(channel, str):
+            if channel.lower() == "a":
+                channel = "0"
+            if channel.lower() == "b":
+                channel = "1"
+        else:
+            channel = str(channel)
+        traces = self._zarr_data[group][channel][self._ARRAY_TRACES_PATH]
+        start, stop, step = trace_index_filter.filter.indices(self._trace_count)
+        return list(range(start, stop, step)), traces
+
     def get_traces_by_filters(self, trace_index_filters: list[TraceIndexFilter]):
-        groups = []
-        channels_indices = []
         trace_indices_list = []
         traces_list = []
         for trace_index_filter in trace_index_filters:
-            group = trace_index_filter.group.strip()
-            if not group or group == self._GROUP_ORIGIN_PATH:  # 这里兼容原有格式，origin波形分组对应到 “/0”，
-                group = self._GROUP_ROOT_PATH
-            channel = trace_index_filter.channel
-            if isinstance(channel, str):
-                if channel.lower() == "a":
-                    channel = "0"
-                if channel.lower() == "b":
-                    channel = "1"
-            else:
-                channel = str(channel)
             try:
-                traces = self._zarr_data[group][channel][self._ARRAY_TRACES_PATH][trace_index_filter.filter]
+                trace_indices, traces = self.get_trace_array_by_filter(trace_index_filter)
+                traces = traces[trace_index_filter.filter]
             except Exception as e:
                 self._logger.error(f"Error getting traces for filter {trace_index_filter}: {e}")
                 continue
 
-            groups.append(group)
-            channels_indices.append(channel)
-            start, stop, step = trace_index_filter.filter.indices(self._trace_count)
-            trace_indices_list.append(list(range(start, stop, step)))
+            trace_indices_list.append(trace_indices)
             traces_list.append(traces)
         shapes = set()
         for traces in traces_list:
@@ -862,6 +1157,56 @@ class ZarrTraceDataset(TraceDataset):
         return trace_indices_list, traces_list
 
 
+class _ZarrChunkBuffer:
+    """
+    zarr 数组的写缓冲，在内存中缓存曲线维度上的一个完整 chunk 块，
+    块写满、或写入位置切换到其他块、或调用 flush 时整块写入 zarr 数组。
+    """
+
+    def __init__(self, array: zarr.core.Array):
+        self._array: zarr.core.Array = array
+        self._block_size: int = array.chunks[0]
+        self._buffer: np.ndarray = np.zeros((self._block_size, *array.shape[1:]), dtype=array.dtype)
+        self._filled: np.ndarray = np.zeros(self._block_size, dtype=bool)
+        self._filled_count: int = 0
+        self._block_index: int | None = None
+
+    @property
+    def array(self) -> zarr.core.Array:
+        return self._array
+
+    def put(self, index: int, value: np.ndarray):
+        block_index = index // self._block_size
+        if block_index != self._block_index:
+            self.flush()
+            self._block_index = block_index
+        offset = index - block_index * self._block_size
+        self._buffer[offset] = value
+        if not self._filled[offset]:
+            self._filled[offset] = True
+            self._filled_count += 1
+        if self._filled_count == self._block_capacity():
+            self.flush()
+
+    def _block_capacity(self) -> int:
+        return min(self._block_size, self._array.shape[0] - self._block_index * self._block_size)
+
+    def flush(self):
+        if self._block_index is None or self._filled_count == 0:
+            return
+        start = self._block_index * self._block_size
+        count = self._block_capacity()
+        if self._filled_count == count:
+            self._array[start : start + count] = self._buffer[:count]
+        else:
+            # 块未写满时只写入已设置的行，避免覆盖磁盘上已有的数据
+            rows = np.flatnonzero(self._filled)
+            self._array.oindex[rows + start] = self._buffer[rows]
+        self._filled[:] = False
+        self._filled_count = 0
+        self._block_index = None
+
+
 class ScarrTraceDataset(ZarrTraceDataset):
     """
     [DEPRECATED] 这个类已经废弃，请使用 ZarrTraceDataset .
@@ -884,6 +1229,7 @@ class ScarrTraceDataset(ZarrTraceDataset):
         zarr_data_group_kwargs: dict | None = None,
         create_time: int | None = None,
         version: str | None = None,
+        trace_chunk_size: int | None = None,
     ):
         warnings.warn("这个类已经废弃，请使用 ZarrTraceDataset。")
         super().__init__(
@@ -902,6 +1248,7 @@ class ScarrTraceDataset(ZarrTraceDataset):
             zarr_data_group_kwargs,
             create_time,
             version,
+            trace_chunk_size,
         )
 
 
@@ -918,6 +1265,8 @@ class NumpyTraceDataset(TraceDataset):
 
     _METADATA_PATH = "metadata.json"
 
+    _GROWABLE_INITIAL_CAPACITY = 256  # 可增长数据集的初始曲线容量
+
     def __init__(
         self,
         path: str | None = None,
@@ -932,8 +1281,21 @@ class NumpyTraceDataset(TraceDataset):
         data_extended_length: int | None = None,
         create_time: int | None = None,
         version: str | None = None,
+        mmap_mode: str | None = "r",
     ):
+        """
+        基于 npy 文件的曲线数据集，指定 path 时曲线及数据通过内存映射文件读写，内存占用与数据集大小无关
+
+        :param trace_count: 曲线条数，创建数据集时为 None 或小于等于 0 则创建可增长的数据集，
+                            曲线条数随写入按倍数扩展，dump 时裁剪为实际条数并写入元数据
+        :type trace_count: int | None
+        :param mmap_mode: 加载已有数据集时的内存映射模式，默认只读 "r"，需要修改已有数据时使用 "r+"，
+                          为 None 时全部读入内存
+        :type mmap_mode: str | None
+        """
         self._logger = logger.get_logger(NumpyTraceDataset)
+        self._path: str | None = path
+        self._mmap_mode: str | None = mmap_mode
 
         self._channel_names: list[str] | None = channel_names
         self._channel_count: int | None = None if self._channel_names is None else len(self._channel_names)
@@ -952,66 +1314,86 @@ class NumpyTraceDataset(TraceDataset):
         self._key_array: np.ndarray | None = None
         self._extended_array: np.ndarray | None = None
 
+        self._npy_trace_path: str | None = None
+        self._npy_data_plaintext_path: str | None = None
+        self._npy_data_ciphertext_path: str | None = None
+        self._npy_data_key_path: str | None = None
+        self._npy_data_extended_path: str | None = None
         if path is not None:
             self._set_path(path)
-            self._npy_metadata_path: str = os.path.join(path, self._METADATA_PATH)
+
+        self._growable: bool = create_empty and (self._trace_count is None or self._trace_count <= 0)
+        self._trace_capacity: int | None = self._trace_count
+        # 可增长的多通道数据集写入期间文件按 (曲线, 通道, 数据) 存储，增长时只需在文件末尾追加，
+        # dump 时再转换为 (通道, 曲线, 数据)
+        self._channel_minor: bool = (
+            self._growable and path is not None and self._channel_count is not None and self._channel_count > 1
+        )
 
         if create_empty:
-            if self._channel_names is None or self._trace_count is None or self._sample_count is None:
-                raise ValueError(
-                    "channel_names and trace_count and sample_count " "must be specified when in write mode."
-                )
-            self._trace_array = np.zeros(
-                shape=(self._channel_count, self._trace_count, self._sample_count), dtype=trace_dtype
-            )
+            if self._channel_names is None or self._sample_count is None:
+                raise ValueError("channel_names and sample_count must be specified when in write mode.")
+            if self._growable:
+                self._trace_count = 0
+                self._trace_capacity = self._GROWABLE_INITIAL_CAPACITY
+            if path is not None and not os.path.exists(path):
+                os.makedirs(path)
+            self._trace_array = self._new_array(self._npy_trace_path, self._sample_count, trace_dtype)
             if self._data_plaintext_length is not None:
-                self._plaintext_array = np.zeros(
-                    shape=(self._channel_count, self._trace_count, self._data_plaintext_length), dtype=np.uint8
-                )
+                self._plaintext_array = self._new_array(self._npy_data_plaintext_path, self._data_plaintext_length)
             if self._data_ciphertext_length is not None:
-                self._ciphertext_array = np.zeros(
-                    shape=(self._channel_count, self._trace_count, self._data_ciphertext_length), dtype=np.uint8
-                )
+                self._ciphertext_array = self._new_array(self._npy_data_ciphertext_path, self._data_ciphertext_length)
             if self._data_key_length is not None:
-                self._key_array = np.zeros(
-                    shape=(self._channel_count, self._trace_count, self._data_key_length), dtype=np.uint8
-                )
+                self._key_array = self._new_array(self._npy_data_key_path, self._data_key_length)
             if self._data_extended_length is not None:
-                self._extended_array = np.zeros(
-                    shape=(self._channel_count, self._trace_count, self._data_extended_length), dtype=np.uint8
-                )
+                self._extended_array = self._new_array(self._npy_data_extended_path, self._data_extended_length)
             self._create_time = int(time.time())
 
         else:
             if path is None:
                 print("path is required if create_empty is False")
             else:
-                self._trace_array = np.load(self._npy_trace_path)
+                self._trace_array = np.load(self._npy_trace_path, mmap_mode=self._mmap_mode)
 
                 if not os.path.exists(self._npy_data_plaintext_path):
                     self._logger.warning("npy_data_plaintext_path is not specified, plaintext will be not load.")
                 else:
-                    self._plaintext_array = np.load(self._npy_data_plaintext_path)
+                    self._plaintext_array = np.load(self._npy_data_plaintext_path, mmap_mode=self._mmap_mode)
 
                 if not os.path.exists(self._npy_data_ciphertext_path):
                     self._logger.warning("npy_data_ciphertext_path is not specified, ciphertext will be not load.")
                 else:
-                    self._ciphertext_array = np.load(self._npy_data_ciphertext_path)
+                    self._ciphertext_array = np.load(self._npy_data_ciphertext_path, mmap_mode=self._mmap_mode)
 
                 if not os.path.exists(self._npy_data_key_path):
                     self._logger.info("npy_data_key_path is not specified, key will be not load.")
                 else:
-                    self._key_array = np.load(self._npy_data_key_path)
+                    self._key_array = np.load(self._npy_data_key_path, mmap_mode=self._mmap_mode)
 
                 if not os.path.exists(self._npy_data_extended_path):
                     self._logger.info("npy_data_extended_path is not specified, extended will be not load.")
                 else:
-                    self._extended_array = np.load(self._npy_data_extended_path)
+                    self._extended_array = np.load(self._npy_data_extended_path, mmap_mode=self._mmap_mode)
 
                 if not os.path.exists(self._npy_metadata_path):
                     self._logger.info("npy_metadata_path is not specified, metadata will be not load.")
                 else:
                     self._load_metadata()
+                self._trace_capacity = self._trace_array.shape[1]
+
+    def _new_array(self, file_path: str | None, item_length: int, dtype: np.dtype = np.uint8) -> np.ndarray:
+        # 指定了数据集路径时直接创建内存映射文件，数据写入即落盘，无需一次性在内存中分配整个数据集
+        shape = (self._channel_count, self._trace_capacity, item_length)
+        if file_path is None:
+            return np.zeros(shape=shape, dtype=dtype)
+        if self._channel_minor:
+            shape = (self._trace_capacity, self._channel_count, item_length)
+            return np.lib.format.open_memmap(file_path, mode="w+", dtype=dtype, shape=shape).swapaxes(0, 1)
+        return np.lib.format.open_memmap(file_path, mode="w+", dtype=dtype, shape=shape)
+
+    def _open_array(self, file_path: str) -> np.ndarray:
+        array = np.load(file_path, mmap_mode="r+")
+        return array.swapaxes(0, 1) if self._channel_minor else array
 
     def _load_metadata(self):
         with open(self._npy_metadata_path) as f:
@@ -1146,23 +1528,54 @@ class NumpyTraceDataset(TraceDataset):
         self._npy_data_ciphertext_path: str = os.path.join(path, self._ARRAY_CIPHERTEXT_PATH)
         self._npy_data_key_path: str = os.path.join(path, self._ARRAY_KEY_PATH)
         self._npy_data_extended_path: str = os.path.join(path, self._ARRAY_EXTENDED_PATH)
+        self._npy_metadata_path: str = os.path.join(path, self._METADATA_PATH)
+
+    def _array_paths(self) -> list[tuple[str, str]]:
+        return [
+            ("_trace_array", self._npy_trace_path),
+            ("_plaintext_array", self._npy_data_plaintext_path),
+            ("_ciphertext_array", self._npy_data_ciphertext_path),
+            ("_key_array", self._npy_data_key_path),
+            ("_extended_array", self._npy_data_extended_path),
+        ]
 
     def dump(self, path: str | None = None, **kwargs):
-        if path is not None:
+        """
+        保存数据集，数据集已映射到 path 对应的文件时仅刷新内存映射并写入元数据，否则将数据复制到 path，
+        之后的写入将映射到新的文件上
+
+        :param path: 数据集保存路径，为 None 时保存到当前路径
+        :type path: str | None
+        """
+        if self._growable and self._trace_capacity != self._trace_count:
+            self._resize_trace_axis(self._trace_count)
+        if self._channel_minor:
+            # 转换为 (通道, 曲线, 数据) 格式，之后继续增长时按该格式调整文件大小
+            arrays = [(name, file_path) for name, file_path in self._array_paths() if getattr(self, name) is not None]
+            for name, file_path in arrays:
+                getattr(self, name).flush()
+                setattr(self, name, None)
+                _transpose_npy_leading_axes(file_path)
+            self._channel_minor = False
+            for name, file_path in arrays:
+                setattr(self, name, self._open_array(file_path))
+        if path is not None and (self._path is None or os.path.abspath(path) != os.path.abspath(self._path)):
+            if not os.path.exists(path):
+                os.makedirs(path)
+            self._path = path
             self._set_path(path)
+            for name, file_path in self._array_paths():
+                array = getattr(self, name)
+                if array is not None:
+                    np.save(file_path, array)
+                    setattr(self, name, np.load(file_path, mmap_mode="r+"))
         if self._npy_trace_path is None:
             print("Path must be provided, either as an argument or set in __init__.")
             return
-        np.save(self._npy_trace_path, self._trace_array)
-
-        if self._plaintext_array is not None:
-            np.save(self._npy_data_plaintext_path, self._plaintext_array)
-        if self._ciphertext_array is not None:
-            np.save(self._npy_data_ciphertext_path, self._ciphertext_array)
-        if self._key_array is not None:
-            np.save(self._npy_data_key_path, self._key_array)
-        if self._extended_array is not None:
-            np.save(self._npy_data_extended_path, self._extended_array)
+        for name, _ in self._array_paths():
+            array = getattr(self, name)
+            if isinstance(array, np.memmap) and array.mode != "r":
+                array.flush()
         self._dump_metadata()
 
     def set_trace(self, channel_name: str | int, trace_index: int, trace: np.ndarray, data: dict[str, bytes] | None):
@@ -1171,6 +1584,11 @@ class NumpyTraceDataset(TraceDataset):
         else:
             channel_index = self._channel_names.index(channel_name)
 
+        if self._growable:
+            if trace_index >= self._trace_capacity:
+                self._resize_trace_axis(max(trace_index + 1, self._trace_capacity * 2))
+            self._trace_count = max(self._trace_count, trace_index + 1)
+
         self._trace_array[channel_index, trace_index, :] = trace
 
         data_plaintext = None if data is None else data.get("plaintext")
@@ -1181,29 +1599,46 @@ class NumpyTraceDataset(TraceDataset):
         if data_plaintext is not None:
             if self._plaintext_array is None:
                 item_length = len(data_plaintext)
-                self._plaintext_array = np.zeros(
-                    shape=(self._channel_count, self._trace_count, item_length), dtype=np.uint8
-                )
+                self._data_plaintext_length = item_length
+                self._plaintext_array = self._new_array(self._npy_data_plaintext_path, item_length)
             self._plaintext_array[channel_index, trace_index, :] = np.frombuffer(data_plaintext, dtype=np.uint8)
         if data_ciphertext is not None:
             if self._ciphertext_array is None:
                 item_length = len(data_ciphertext)
-                self._ciphertext_array = np.zeros(
-                    shape=(self._channel_count, self._trace_count, item_length), dtype=np.uint8
-                )
+                self._data_ciphertext_length = item_length
+                self._ciphertext_array = self._new_array(self._npy_data_ciphertext_path, item_length)
             self._ciphertext_array[channel_index, trace_index, :] = np.frombuffer(data_ciphertext, dtype=np.uint8)
         if data_key is not None:
             if self._key_array is None:
                 item_length = len(data_key)
-                self._key_array = np.zeros(shape=(self._channel_count, self._trace_count, item_length), dtype=np.uint8)
+                self._data_key_length = item_length
+                self._key_array = self._new_array(self._npy_data_key_path, item_length)
             self._key_array[channel_index, trace_index, :] = np.frombuffer(data_key, dtype=np.uint8)
         if data_extended is not None:
             if self._extended_array is None:
                 item_length = len(data_extended)
-                self._extended_array = np.zeros(
-                    shape=(self._channel_count, self._trace_count, item_length), dtype=np.uint8
-                )
-            self._key_array[channel_index, trace_index, :] = np.frombuffer(data_extended, dtype=np.uint8)
+                self._data_extended_length = item_length
+                self._extended_array = self._new_array(self._npy_data_extended_path, item_length)
+            self._extended_array[channel_index, trace_index, :] = np.frombuffer(data_extended, dtype=np.uint8)
+
+    def _resize_trace_axis(self, capacity: int):
+        for name, file_path in self._array_paths():
+            array = getattr(self, name)
+            if array is None:
+                continue
+            if isinstance(array, np.memmap):
+                # 释放内存映射后在原文件上调整大小，再重新映射
+                array.flush()
+                setattr(self, name, None)
+                del array
+                _resize_npy_trace_axis(file_path, capacity, channel_minor=self._channel_minor)
+                setattr(self, name, self._open_array(file_path))
+            else:
+                resized = np.zeros((array.shape[0], capacity, array.shape[2]), dtype=array.dtype)
+                count = min(capacity, array.shape[1])
+                resized[:, :count] = array[:, :count]
+                setattr(self, name, resized)
+        self._trace_capacity = capacity
 
     def _get_trace_data_with_indices(
         self, channel_slice, trace_slice
@@ -1223,17 +1658,14 @@ class NumpyTraceDataset(TraceDataset):
     def _get_trace_data(self, channel_slice, trace_slice) -> tuple[np.ndarray, list[list[dict[str, bytes | None]]]]:
         data = []
 
-        channel_indexes, trace_indexes = (
-            self._parse_slice(self._channel_count, channel_slice),
-            self._parse_slice(self._trace_count, trace_slice),
-        )
+        channel_indexes = self._parse_slice(self._channel_count, channel_slice)
 
         if isinstance(trace_slice, int):
             trace_slice = slice(trace_slice, trace_slice + 1)
 
         traces = self._trace_array[channel_slice, trace_slice]
         for channel_index in channel_indexes:
-            data.append([self._get_data_by_index(channel_index, trace_index) for trace_index in trace_indexes])
+            data.append(self._get_data_view(channel_index, trace_slice))
 
         return traces, data
 
@@ -1243,24 +1675,129 @@ class NumpyTraceDataset(TraceDataset):
     def _get_data(self, channel_slice, trace_slice) -> list[list[dict[str, bytes | None]]]:
         data = []
 
-        channel_indexes, trace_indexes = (
-            self._parse_slice(self._channel_count, channel_slice),
-            self._parse_slice(self._trace_count, trace_slice),
-        )
+        channel_indexes = self._parse_slice(self._channel_count, channel_slice)
 
         for channel_index in channel_indexes:
-            data.append([self._get_data_by_index(channel_index, trace_index) for trace_index in trace_indexes])
+            data.append(self._get_data_view(channel_index, trace_slice))
 
         return data
 
     def _get_data_by_index(self, channel_index: int, trace_index: int) -> dict[str, bytes | None]:
-        data = {}
-        if self._plaintext_array is not None:
-            data["plaintext"] = self._plaintext_array[channel_index, trace_index].tobytes()
-        if self._ciphertext_array is not None:
-            data["ciphertext"] = self._ciphertext_array[channel_index, trace_index].tobytes()
-        if self._key_array is not None:
-            data["key"] = self._key_array[channel_index, trace_index].tobytes()
-        if self._extended_array is not None:
-            data["extended"] = self._extended_array[channel_index, trace_index].tobytes()
-        return data
+        return self._get_data_view(channel_index, trace_index)[0]
+
+    def _get_trace_window(
+        self, channel_index: int, trace_selection: slice | list[int], start: int, end: int
+    ) -> np.ndarray:
+        return self._trace_array[channel_index, trace_selection, start:end]
+
+    def _get_data_arrays(self, channel_index: int, trace_selection: slice | list[int]) -> dict[str, np.ndarray | None]:
+        return {
+            key: None if array is None else array[channel_index, trace_selection]
+            for key, array in (
+                ("plaintext", self._plaintext_array),
+                ("ciphertext", self._ciphertext_array),
+                ("key", self._key_array),
+                ("extended", self._extended_array),
+            )
+        }
+
+
+def _resize_npy_trace_axis(
+    file_path: str, capacity: int, batch_size: int = 64 * 1024 * 1024, channel_minor: bool = False
+):
+    """
+    调整 (通道, 曲线, 数据) 格式 npy 文件的曲线维度大小。
+    在原文件上改写文件头并按批移动第一个通道之后的数据块，单通道时已有数据不会被移动；
+    channel_minor 为 True 时文件为 (曲线, 通道, 数据) 格式，只需在末尾追加或截断；
+    文件头长度发生变化时，退化为复制到新文件。
+    """
+    with open(file_path, "r+b") as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, _, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, _, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+        if channel_minor:
+            old_capacity, channel_count, item_length = shape
+            new_shape = (capacity, channel_count, item_length)
+            # 所有通道位于同一个数据块中
+            block_count, row_size = 1, channel_count * item_length * dtype.itemsize
+        else:
+            channel_count, old_capacity, item_length = shape
+            new_shape = (channel_count, capacity, item_length)
+            block_count, row_size = channel_count, item_length * dtype.itemsize
+        header = io.BytesIO()
+        header_dict = {
+            "descr": np.lib.format.dtype_to_descr(dtype),
+            "fortran_order": False,
+            "shape": new_shape,
+        }
+        if version == (1, 0):
+            np.lib.format.write_array_header_1_0(header, header_dict)
+        else:
+            np.lib.format.write_array_header_2_0(header, header_dict)
+
+        if len(header.getvalue()) == offset:
+            old_block, new_block = old_capacity * row_size, capacity * row_size
+            if new_block > old_block:
+                f.truncate(offset + block_count * new_block)
+            size = block_count * max(old_block, new_block)
+            if size > 0 and block_count > 1:
+                buffer = np.memmap(f, dtype=np.uint8, mode="r+", offset=offset, shape=(size,))
+                moved = min(old_block, new_block)
+                growing = new_block > old_block
+                # 扩大时从后向前移动，缩小时从前向后移动，避免覆盖尚未移动的数据
+                channels = range(block_count - 1, 0, -1) if growing else range(1, block_count)
+                for channel in channels:
+                    src, dst = channel * old_block, channel * new_block
+                    starts = range(0, moved, batch_size)
+                    for start in reversed(starts) if growing else starts:
+                        end = min(start + batch_size, moved)
+                        buffer[dst + start : dst + end] = buffer[src + start : src + end]
+                if growing:
+                    for channel in range(block_count):
+                        buffer[channel * new_block + old_block : (channel + 1) * new_block] = 0
+                buffer.flush()
+                del buffer
+            if new_block < old_block:
+                f.truncate(offset + block_count * new_block)
+            f.seek(0)
+            f.write(header.getvalue())
+            return
+
+    old_array = np.load(file_path, mmap_mode="r")
+    temp_path = file_path + ".tmp"
+    new_array = np.lib.format.open_memmap(temp_path, mode="w+", dtype=dtype, shape=new_shape)
+    if channel_minor:
+        old_array, new_array_view = old_array.swapaxes(0, 1), new_array.swapaxes(0, 1)
+    else:
+        new_array_view = new_array
+    count = min(old_capacity, capacity)
+    step = max(1, batch_size // max(1, item_length * dtype.itemsize))
+    for channel in range(channel_count):
+        for start in range(0, count, step):
+            end = min(start + step, count)
+            new_array_view[channel, start:end] = old_array[channel, start:end]
+    new_array.flush()
+    del new_array, new_array_view, old_array
+    os.replace(temp_path, file_path)
+
+
+def _transpose_npy_leading_axes(file_path: str, batch_size: int = 64 * 1024 * 1024):
+    """
+    将 (曲线, 通道, 数据) 格式的 npy 文件按批转换为 (通道, 曲线, 数据) 格式
+    """
+    old_array = np.load(file_path, mmap_mode="r")
+    trace_count, channel_count, item_length = old_array.shape
+    temp_path = file_path + ".tmp"
+    new_array = np.lib.format.open_memmap(
+        temp_path, mode="w+", dtype=old_array.dtype, shape=(channel_count, trace_count, item_length)
+    )
+    step = max(1, batch_size // max(1, channel_count * item_length * old_array.dtype.itemsize))
+    for start in range(0, trace_count, step):
+        end = min(start + step, trace_count)
+        new_array[:, start:end] = old_array[start:end].swapaxes(0, 1)
+    new_array.flush()
+    del new_array, old_array
+    os.replace(temp_path, file_path)
@@ -0,0 +1,54 @@
+import types
+
+import numpy as np
+import pytest
+
+from cracknuts.acquisition.acquisition import Acquisition
+from cracknuts.trace.trace import NumpyTraceDataset, ZarrTraceDataset
+
+
+class _Cracker:
+    def __init__(self, sample_length):
+        self.config = types.SimpleNamespace(
+            osc_channel_0_enable=True, osc_channel_1_enable=True, osc_sample_length=sample_length
+        )
+
+    def get_firmware_version(self):
+        return "test"
+
+    def get_current_config(self):
+        return self.config
+
+    def osc_single(self): ...
+
+    def osc_is_triggered(self):
+        return 0, True
+
+    def osc_get_analog_wave(self, channel, offset, sample_length):
+        return 0, np.full(sample_length, channel, dtype=np.int16)
+
+
+class _StopAfter(Acquisition):
+    def __init__(self, cracker, stop_count, **kwargs):
+        super().__init__(cracker, **kwargs)
+        self.stop_count = stop_count
+
+    def init(self): ...
+
+    def do(self, count):
+        return {"plaintext": bytes([count]) * 16}
+
+    def _post_do(self, index, data):
+        if index + 1 == self.stop_count:
+            self.stop()
+
+
+@pytest.mark.parametrize("file_format, dataset_class", [("zarr", ZarrTraceDataset), ("numpy", NumpyTraceDataset)])
+def test_acquisition_open_ended_run(tmp_path, file_format, dataset_class):
+    acq = _StopAfter(_Cracker(64), 25, trigger_judge_wait_time=0.001)
+    acq.run_sync(count=0, sample_length=-1, file_format=file_format, file_path=str(tmp_path))
+
+    ds = dataset_class.load(acq._dataset_path)
+    assert ds.trace_count == 25
+    assert (ds.get_trace_window("1", 24) == 1).all()
+    assert ds.get_data_arrays("0")["plaintext"][:, 0].tolist() == list(range(25))
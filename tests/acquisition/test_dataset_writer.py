@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from cracknuts.acquisition.dataset_writer import DatasetWriter, DatasetWriterError
+from cracknuts.trace.trace import ZarrTraceDataset
+
+
+def test_dataset_writer_write_and_dump(tmp_path):
+    path = str(tmp_path / "writer.zarr")
+    count, sample_count = 50, 128
+    ds = ZarrTraceDataset.new(path, ["0", "1"], count, sample_count, "test")
+    writer = DatasetWriter(ds, max_queue_size=4)
+    writer.start()
+    for i in range(count):
+        waves = {0: np.full(sample_count, i, dtype=np.int16), 1: np.full(sample_count, -i, dtype=np.int16)}
+        writer.put(i, waves, {"plaintext": bytes([i]) * 16})
+    writer.close()
+    assert writer.lag == 0
+
+    ds = ZarrTraceDataset.load(path)
+    assert (ds.get_origin_data()["0/1/traces"][:, 0] == -np.arange(count)).all()
+    assert (ds.get_data_arrays("0")["plaintext"][:, 0] == np.arange(count)).all()
+
+
+def test_dataset_writer_error(tmp_path):
+    path = str(tmp_path / "error.zarr")
+    ds = ZarrTraceDataset.new(path, ["0"], 0, 128, "test")
+    writer = DatasetWriter(ds)
+    writer.start()
+    writer.put(0, {0: np.ones(128, dtype=np.int16)}, None)
+    # Channel "1" does not exist in the dataset, so the writer thread fails.
+    writer.put(1, {1: np.zeros(128, dtype=np.int16)}, None)
+    with pytest.raises(DatasetWriterError):
+        writer.close()
+
+    # The trace written before the failure is dumped.
+    ds = ZarrTraceDataset.load(path)
+    assert ds.trace_count == 1
+    assert (ds.get_trace_window("0", 0)[0] == 1).all()
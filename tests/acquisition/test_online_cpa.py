@@ -0,0 +1,40 @@
+import numpy as np
+
+from cracknuts.acquisition.online_cpa import OnlineCPA
+from cracknuts.analysis.models import AES_SBOX, HW
+
+KEY = bytes(range(0x30, 0x40))
+
+
+def test_online_cpa_key_rank():
+    rng = np.random.default_rng(5)
+    results = []
+    online_cpa = OnlineCPA(byte_indexes=[0, 5], update_interval=100, stop_on_key_recovered=True)
+    online_cpa.on_result_changed(results.append)
+    online_cpa.reset()
+    for _ in range(1000):
+        plaintext = rng.integers(0, 256, 16, dtype=np.uint8)
+        wave = rng.normal(0, 1, 50)
+        wave[20] += 0.3 * HW[AES_SBOX[plaintext[0] ^ KEY[0]]]
+        wave[30] += 0.3 * HW[AES_SBOX[plaintext[5] ^ KEY[5]]]
+        online_cpa.add_trace({0: wave, 1: wave}, {"plaintext": plaintext.tobytes(), "key": KEY})
+    online_cpa.close()
+
+    assert results[-1]["trace_count"] == 1000
+    assert results[-1]["best_guesses"] == [KEY[0], KEY[5]]
+    assert results[-1]["key_ranks"] == [0, 0]
+    assert online_cpa.should_stop
+
+
+def test_online_cpa_update_error():
+    results = []
+    online_cpa = OnlineCPA(byte_indexes=[0], update_interval=2)
+    online_cpa.on_result_changed(results.append)
+    online_cpa.reset()
+    # The waves of different lengths can not be stacked, the update fails.
+    online_cpa.add_trace({0: np.zeros(10)}, {"plaintext": bytes(16)})
+    online_cpa.add_trace({0: np.zeros(20)}, {"plaintext": bytes(16)})
+    online_cpa.close()
+
+    assert results and results[-1]["error"] is not None
+    assert online_cpa.result["error"] is not None
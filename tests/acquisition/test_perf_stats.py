@@ -0,0 +1,28 @@
+import json
+
+from cracknuts.acquisition.perf_stats import PerfStats
+
+
+def test_perf_stats(tmp_path):
+    perf_stats = PerfStats(window_size=100)
+    perf_stats.reset()
+    for i in range(200):
+        perf_stats.record(PerfStats.PHASE_DO, (i % 100) / 1000)
+        with perf_stats.measure(PerfStats.PHASE_TRIGGER):
+            pass
+        perf_stats.trace_done(wire_bytes=2048)
+    perf_stats.stop()
+
+    stats = perf_stats.get_stats()
+    assert stats["traces"] == 200
+    assert stats["wire_bytes"] == 200 * 2048
+    assert stats["traces_per_second"] > 0 and stats["bytes_per_second"] > 0
+    do_stats = stats["phases"][PerfStats.PHASE_DO]
+    assert do_stats["count"] == 200
+    assert abs(do_stats["p50"] - 0.0495) < 1e-9
+    assert do_stats["max"] == 0.099
+    assert stats["phases"][PerfStats.PHASE_TRIGGER]["count"] == 200
+
+    path = tmp_path / "perf.json"
+    perf_stats.dump_json(str(path))
+    assert json.loads(path.read_text())["traces"] == 200
@@ -0,0 +1,36 @@
+import time
+
+from cracknuts.acquisition.trigger_waiter import TriggerWaiter
+
+
+class _DelayedTrigger:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.armed_time = time.perf_counter()
+
+    def arm(self):
+        self.armed_time = time.perf_counter()
+
+    def is_triggered(self) -> bool:
+        return time.perf_counter() - self.armed_time >= self.delay
+
+
+def test_trigger_waiter_learns_latency():
+    trigger = _DelayedTrigger(0.005)
+    waiter = TriggerWaiter(trigger.is_triggered, max_wait_time=0.01)
+    for _ in range(20):
+        trigger.arm()
+        assert waiter.wait(timeout=1)
+    stats = waiter.get_stats()
+    assert stats["triggered"] == 20 and stats["timeouts"] == 0
+    assert 0.004 < stats["expected_latency"] < 0.006
+    assert stats["latency_p50"] >= 0.005
+    # Once the latency is learned, most waits need only a few polls.
+    assert stats["polls_per_wait"] < 5
+
+
+def test_trigger_waiter_timeout():
+    waiter = TriggerWaiter(lambda: False, max_wait_time=0.005)
+    assert not waiter.wait(timeout=0.02)
+    assert waiter.get_stats()["timeouts"] == 1
+    assert not waiter.wait(timeout=1, is_running=lambda: False)
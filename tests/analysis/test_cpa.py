@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+import zarr
+
+from cracknuts.analysis import CPA
+from cracknuts.analysis.models import AES_SBOX, HW
+from cracknuts.trace.trace import ZarrTraceDataset
+
+
+def test_cpa_recovers_key(tmp_path, new_aes_dataset, aes_key):
+    ds = new_aes_dataset(tmp_path / "cpa.zarr", 600, 100)
+    cpa = CPA().run(ds, "0", chunk_size=128)
+    assert cpa.trace_count == 600
+    assert bytes(cpa.best_guesses().astype(np.uint8)) == aes_key
+
+    traces = ds.trace[0, :].astype(np.float64)
+    plaintext = ds.get_data_arrays("0")["plaintext"]
+    hypotheses = HW[AES_SBOX[plaintext[:, 3] ^ aes_key[3]]].astype(np.float64)
+    expected = np.corrcoef(np.column_stack((hypotheses, traces)).T)[0, 1:]
+    assert np.allclose(cpa.correlation(3)[aes_key[3]], expected)
+
+    merged = CPA().run(ds, "0", slice(0, 250), chunk_size=100)
+    merged.merge(CPA().run(ds, "0", slice(250, None), chunk_size=100))
+    assert np.allclose(merged.correlation(), cpa.correlation())
+
+    cpa.save(str(tmp_path / "correlation.zarr"))
+    correlation = zarr.open(str(tmp_path / "correlation.zarr"), mode="r")["/0/0/correlation"]
+    assert correlation.shape == (256, 16, 100)
+
+    # Saving over an existing zarr, here the trace dataset itself, fails instead of deleting it.
+    with pytest.raises(ValueError):
+        cpa.save(str(tmp_path / "cpa.zarr"))
+    assert ZarrTraceDataset.load(str(tmp_path / "cpa.zarr")).trace_count == 600
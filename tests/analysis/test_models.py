@@ -0,0 +1,41 @@
+import numpy as np
+
+from cracknuts.analysis import AesLastRound, AesSboxOutput, DesSboxOutput, Sm4SboxOutput
+from cracknuts.analysis.models import AES_INV_SBOX, AES_SBOX, HW, SM4_SBOX
+
+
+def test_models_match_per_trace_reference():
+    rng = np.random.default_rng(0)
+    data = {
+        "plaintext": rng.integers(0, 256, (50, 16), dtype=np.uint8),
+        "ciphertext": rng.integers(0, 256, (50, 16), dtype=np.uint8),
+    }
+    plaintext, ciphertext = data["plaintext"].astype(int), data["ciphertext"].astype(int)
+
+    hypotheses = AesSboxOutput().hypotheses(data, 3)
+    assert hypotheses.shape == (50, 256) and hypotheses.dtype == np.uint8
+    assert all(hypotheses[n, k] == HW[AES_SBOX[plaintext[n, 3] ^ k]] for n in range(50) for k in range(256))
+
+    hypotheses = AesLastRound().hypotheses(data, 1)
+    assert all(
+        hypotheses[n, k] == HW[AES_INV_SBOX[ciphertext[n, 1] ^ k] ^ ciphertext[n, 5]]
+        for n in range(50)
+        for k in (0, 77)
+    )
+
+    hypotheses = Sm4SboxOutput(hamming_weight=False).hypotheses(data, 2)
+    inputs = plaintext[:, 6] ^ plaintext[:, 10] ^ plaintext[:, 14]
+    assert all(hypotheses[n, k] == SM4_SBOX[inputs[n] ^ k] for n in range(50) for k in (0, 200))
+
+
+def test_des_sbox_output():
+    # The first round of the worked example of "The DES Algorithm Illustrated" by J. Orlin Grabbe.
+    data = {"plaintext": np.frombuffer(bytes.fromhex("0123456789ABCDEF"), dtype=np.uint8)[None, :]}
+    subkey = [0b000110, 0b110000, 0b001011, 0b101111, 0b111111, 0b000111, 0b000001, 0b110010]
+    outputs = [0b0101, 0b1100, 0b1000, 0b0010, 0b1011, 0b0101, 0b1001, 0b0111]
+    model = DesSboxOutput(hamming_weight=False)
+    assert model.guess_count == 64
+    for sbox in range(8):
+        hypotheses = model.hypotheses(data, sbox)
+        assert hypotheses.shape == (1, 64)
+        assert hypotheses[0, subkey[sbox]] == outputs[sbox]
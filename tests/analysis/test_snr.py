@@ -0,0 +1,35 @@
+import numpy as np
+import zarr
+
+from cracknuts.analysis import SNR
+from cracknuts.analysis.models import AES_SBOX, HW
+
+
+def test_snr_finds_points_of_interest(tmp_path, new_zarr_dataset, aes_key):
+    path = str(tmp_path / "snr.zarr")
+    trace_count, sample_count = 3000, 40
+
+    def make_trace(rng, _):
+        plaintext = rng.integers(0, 256, 16, dtype=np.uint8)
+        trace = rng.normal(100, 2, sample_count)
+        trace[5] += 4 * HW[plaintext[0]]
+        trace[30] += 4 * HW[AES_SBOX[plaintext[1] ^ aes_key[1]]]
+        return trace, {"plaintext": plaintext.tobytes(), "key": aes_key}
+
+    ds = new_zarr_dataset(
+        path, trace_count, sample_count, make_trace, seed=2, data_plaintext_length=16, data_key_length=16
+    )
+
+    plaintext_snr = SNR(SNR.INTERMEDIATE_PLAINTEXT, byte_indexes=[0, 1]).run(ds, "0", chunk_size=512).snr()
+    assert plaintext_snr.shape == (2, sample_count)
+    assert plaintext_snr[0].argmax() == 5
+
+    snr = SNR(byte_indexes=[0, 1]).run(ds, "0", chunk_size=512)
+    assert snr.snr()[1].argmax() == 30
+
+    merged = SNR(byte_indexes=[0, 1]).run(ds, "0", slice(0, 1000))
+    merged.merge(SNR(byte_indexes=[0, 1]).run(ds, "0", slice(1000, None)))
+    assert np.allclose(merged.snr(), snr.snr())
+
+    snr.save(ds, "0")
+    assert zarr.open(path, mode="r")["snr/0/snr"].shape == (2, sample_count)
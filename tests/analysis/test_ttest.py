@@ -0,0 +1,46 @@
+import numpy as np
+import zarr
+
+from cracknuts.analysis import CentralMoments, TTest
+from cracknuts.trace.trace import ZarrTraceDataset
+
+
+def test_central_moments_merge():
+    rng = np.random.default_rng(0)
+    traces = rng.normal(1000, 5, (1000, 8)) ** 1.5
+    moments = CentralMoments(6)
+    for chunk in np.array_split(traces, 7):
+        moments.update(chunk)
+    assert moments.count == 1000
+    assert np.allclose(moments.mean, traces.mean(axis=0))
+    centered = traces - traces.mean(axis=0)
+    for p in range(2, 7):
+        assert np.allclose(moments.central_moment(p), (centered**p).mean(axis=0))
+
+
+def test_ttest_fixed_vs_random(tmp_path, new_zarr_dataset):
+    path = str(tmp_path / "tvla.zarr")
+    trace_count, sample_count = 2000, 50
+
+    def make_trace(rng, index):
+        label = index % 2
+        trace = rng.normal(500, 10, sample_count)
+        trace[10] += 5 * label  # first order leakage
+        trace[20] += rng.normal(0, 15) * label  # second order leakage
+        return trace, {"extended": bytes([label])}
+
+    ds = new_zarr_dataset(path, trace_count, sample_count, make_trace, seed=1, data_extended_length=1)
+
+    ttest = TTest(max_order=2).run(ds, "0", chunk_size=300)
+    assert ttest.trace_counts == (1000, 1000)
+    t1, t2 = np.abs(ttest.t(1)), np.abs(ttest.t(2))
+    assert t1[10] > TTest.THRESHOLD and np.delete(t1, [10, 20]).max() < TTest.THRESHOLD
+    assert t2[20] > TTest.THRESHOLD
+
+    merged = TTest(max_order=2).run(ds, "0", slice(0, 700))
+    merged.merge(TTest(max_order=2).run(ds, "0", slice(700, None)))
+    assert np.allclose(merged.t(2), ttest.t(2))
+
+    ttest.save(ds, "0")
+    assert zarr.open(path, mode="r")["ttest/0/t"].shape == (2, sample_count)
+    assert ZarrTraceDataset.load(path).trace_count == trace_count
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from cracknuts.analysis.models import AES_SBOX, HW
+from cracknuts.trace.trace import ZarrTraceDataset
+
+
+@pytest.fixture
+def aes_key():
+    return bytes(range(0x10, 0x20))
+
+
+@pytest.fixture
+def new_zarr_dataset():
+    """
+    Factory of single channel zarr datasets: ``new_zarr_dataset(path, trace_count, sample_count, make_trace)`` writes
+    the ``(trace, data)`` returned by ``make_trace(rng, index)`` for each trace, dumps the dataset and loads it back.
+    The other keyword arguments are passed to ``ZarrTraceDataset.new``.
+    """
+
+    def new(path, trace_count, sample_count, make_trace, seed=0, **kwargs):
+        rng = np.random.default_rng(seed)
+        ds = ZarrTraceDataset.new(str(path), ["0"], trace_count, sample_count, "test", **kwargs)
+        for i in range(trace_count):
+            trace, data = make_trace(rng, i)
+            ds.set_trace("0", i, np.asarray(trace).astype(np.int16), data)
+        ds.dump()
+        return ZarrTraceDataset.load(str(path))
+
+    return new
+
+
+@pytest.fixture
+def new_aes_dataset(new_zarr_dataset, aes_key):
+    """
+    Factory of zarr datasets with random plaintexts, whose traces leak the Hamming weight of the first round S-box
+    output of the 16 key bytes from ``leak_sample``. With ``label`` the extended data holds a fixed/random label.
+    """
+    key = np.frombuffer(aes_key, dtype=np.uint8)
+
+    def new(path, trace_count, sample_count, leak_sample=40, label=False):
+        def make_trace(rng, index):
+            plaintext = rng.integers(0, 256, 16, dtype=np.uint8)
+            trace = rng.normal(1000, 20, sample_count)
+            trace[leak_sample : leak_sample + 16] += 30 * HW[AES_SBOX[plaintext ^ key]]
+            data = {"plaintext": plaintext.tobytes()}
+            if label:
+                data["extended"] = bytes([index % 2])
+            return trace, data
+
+        return new_zarr_dataset(
+            path,
+            trace_count,
+            sample_count,
+            make_trace,
+            data_plaintext_length=16,
+            data_extended_length=1 if label else None,
+        )
+
+    return new
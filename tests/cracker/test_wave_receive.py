@@ -0,0 +1,40 @@
+import socket
+import threading
+
+import numpy as np
+
+from cracknuts.cracker import protocol
+from cracknuts.cracker.cracker_s1 import CrackerS1
+
+
+def _serve_waves(server: socket.socket, waves: list[np.ndarray]):
+    for wave in waves:
+        server.recv(protocol.REQ_HEADER_SIZE + 9)
+        response = protocol.build_response_message(protocol.STATUS_OK, wave.astype("<i2").tobytes())
+        # Send in small pieces to exercise partial receives.
+        for i in range(0, len(response), 1000):
+            server.sendall(response[i : i + 1000])
+
+
+def _connected_cracker(waves: list[np.ndarray]) -> CrackerS1:
+    client, server = socket.socketpair()
+    threading.Thread(target=_serve_waves, args=(server, waves), daemon=True).start()
+    cracker = CrackerS1()
+    cracker._socket = client
+    cracker._connection_status = True
+    return cracker
+
+
+def test_osc_get_analog_wave_receive_into():
+    waves = [np.arange(-5000, 5000, dtype=np.int16), np.arange(10000, dtype=np.int16)[::-1].copy()]
+    cracker = _connected_cracker(waves)
+
+    status, wave = cracker.osc_get_analog_wave(0, 0, 10000)
+    assert status == protocol.STATUS_OK
+    assert (wave == waves[0]).all()
+
+    out = np.empty(10000, dtype=np.int16)
+    status, wave = cracker.osc_get_analog_wave(0, 0, 10000, out=out)
+    assert status == protocol.STATUS_OK
+    assert np.shares_memory(wave, out)
+    assert (wave == waves[1]).all()
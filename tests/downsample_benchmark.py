@@ -107,3 +107,35 @@ if __name__ == "__main__":
         idx3, val3 = down_sample_numba(data, 0, len(data), down_count)
         end = time.time()
         print(f"Numba down_sample time: {end - start:.6f} seconds")
+
+    # 多条曲线：逐条调用 minmax 与一次调用 minmax_2d（自动/串行/并行）对比
+    from cracknuts.trace.downsample import minmax, minmax_2d
+
+    def bench(func, repeat=20):
+        func()  # 预热，排除 numba 编译时间
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - start) / repeat
+
+    for trace_count, sample_count in ((8, 4_000), (8, 20_000), (200, 100_000), (1000, 20_000)):
+        traces = np.random.randint(-32768, 32767, size=(trace_count, sample_count), dtype=np.int16)
+        down_count = 1920
+        loop_time = bench(lambda: [minmax(trace, 0, sample_count, down_count) for trace in traces])
+        auto_time = bench(lambda: minmax_2d(traces, 0, sample_count, down_count))
+        serial_time = bench(lambda: minmax_2d(traces, 0, sample_count, down_count, parallel=False))
+        parallel_time = bench(lambda: minmax_2d(traces, 0, sample_count, down_count, parallel=True))
+        print(
+            f"{trace_count} x {sample_count}: minmax loop {loop_time * 1000:.3f} ms, "
+            f"minmax_2d auto {auto_time * 1000:.3f} ms ({loop_time / auto_time:.1f}x), "
+            f"serial {serial_time * 1000:.3f} ms, parallel {parallel_time * 1000:.3f} ms"
+        )
+
+    # 10M 数据点的曲线：minmax、M4 及 LTTB 的耗时与输出点数对比
+    from cracknuts.trace.downsample import lttb, m4
+
+    trace = np.random.randint(-32768, 32767, size=10_000_000, dtype=np.int16)
+    for name, func in (("minmax", minmax), ("m4", m4), ("lttb", lttb)):
+        down_time = bench(lambda: func(trace, 0, len(trace), 1920))
+        idx, _ = func(trace, 0, len(trace), 1920)
+        print(f"{name} 10M samples: {down_time * 1000:.3f} ms, {len(idx)} points")
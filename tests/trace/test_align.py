@@ -0,0 +1,34 @@
+import numpy as np
+import zarr
+
+from cracknuts.trace.align import align_traces
+from cracknuts.trace.trace import ZarrTraceDataset
+
+
+def test_align_traces(tmp_path, new_zarr_dataset):
+    path = str(tmp_path / "align.zarr")
+    trace_count, sample_count = 300, 400
+    pattern = np.sin(np.linspace(0, 6 * np.pi, 60)) * 200 * np.hanning(60)
+    expected_shifts = np.random.default_rng(3).integers(-20, 21, trace_count)
+    expected_shifts[0] = 0
+
+    def make_trace(rng, index):
+        trace = rng.normal(0, 5, sample_count)
+        position = 150 - expected_shifts[index]
+        trace[position : position + 60] += pattern
+        return trace, None
+
+    ds = new_zarr_dataset(path, trace_count, sample_count, make_trace, seed=3)
+
+    shifts = align_traces(ds, "0", (140, 220), max_shift=30, chunk_size=64, max_workers=2)
+    assert (shifts == expected_shifts).all()
+
+    aligned = zarr.open(path, mode="r")["aligned/0"]
+    assert (aligned["shifts"][:] == expected_shifts).all()
+    aligned_traces = aligned["traces"][:].astype(np.float64)
+    assert np.corrcoef(aligned_traces[:, 150:210])[0].min() > 0.9
+
+    # The default batch size is derived from the trace length.
+    assert (align_traces(ds, "0", (140, 220), max_shift=30, max_workers=1) == expected_shifts).all()
+    chunks = zarr.open(path, mode="r")["aligned/0/traces"].chunks
+    assert chunks == (ZarrTraceDataset._ZARR_TRACE_CHUNK_SAMPLES // sample_count, sample_count)
@@ -0,0 +1,63 @@
+import numpy as np
+
+from cracknuts.trace.downsample import envelope, lttb, m4, minmax, minmax_2d
+
+
+def test_envelope():
+    rng = np.random.default_rng(0)
+    traces = rng.integers(-1000, 1000, (37, 1003)).astype(np.int16)
+    x, upper, lower, mean = envelope(traces, 10, 1003, 100)
+    assert upper.dtype == np.int16 and len(x) == len(upper) == len(lower) == len(mean) == 111
+    for i, start in enumerate(x):
+        block = traces[:, start : start + 9]
+        assert upper[i] == block.max() and lower[i] == block.min()
+        assert np.isclose(mean[i], block.mean())
+    assert x[-1] == 1000
+
+    assert len(envelope(traces[:0], 0, 100, 10)[0]) == 0
+
+
+def test_minmax_2d():
+    rng = np.random.default_rng(1)
+    traces = rng.integers(-1000, 1000, (5, 3001)).astype(np.int16)
+    for parallel in (None, True, False):
+        x, y = minmax_2d(traces, 7, 3001, 100, parallel=parallel)
+        assert y.shape == (5, len(x))
+        for t in range(5):
+            expected_x, expected_y = minmax(traces[t], 7, 3001, 100)
+            assert np.array_equal(x, expected_x) and np.array_equal(y[t], expected_y)
+
+    x, y = minmax_2d(traces.astype(np.float32), 0, 50, 100)
+    assert y.dtype == np.float32 and np.array_equal(y, traces[:, :50]) and np.array_equal(x, np.arange(50))
+
+
+def test_m4():
+    rng = np.random.default_rng(2)
+    trace = rng.integers(-1000, 1000, 10_007).astype(np.int16)
+    x, y = m4(trace, 3, 10_007, 100)
+    assert len(x) == 4 * 101 and np.array_equal(y, trace[x]) and (np.diff(x) >= 0).all()
+    for i in range(101):
+        start = 3 + i * 100
+        block = trace[start : start + 100]
+        assert x[4 * i] == start and x[4 * i + 3] == min(start + 100, 10_007) - 1
+        assert sorted(y[4 * i + 1 : 4 * i + 3]) == [block.min(), block.max()]
+
+
+def test_lttb():
+    rng = np.random.default_rng(3)
+    trace = rng.normal(size=5_000).astype(np.float32)
+    x, y = lttb(trace, 0, 5_000, 100)
+    assert len(x) == 100 and x[0] == 0 and x[-1] == 4_999 and (np.diff(x) > 0).all()
+    assert np.array_equal(y, trace[x])
+
+    # 按定义逐桶计算的参考实现
+    every = (5_000 - 2) / 98
+    selected = [0]
+    for i in range(98):
+        avg_range = np.arange(int((i + 1) * every) + 1, min(int((i + 2) * every) + 1, 5_000))
+        avg_x, avg_y = avg_range.mean(), trace[avg_range].astype(np.float64).mean()
+        candidates = np.arange(int(i * every) + 1, int((i + 1) * every) + 1)
+        a = selected[-1]
+        areas = np.abs((a - avg_x) * (trace[candidates] - trace[a]) - (a - candidates) * (avg_y - trace[a]))
+        selected.append(candidates[np.argmax(areas)])
+    assert np.array_equal(x[:-1], selected)
@@ -0,0 +1,30 @@
+import numpy as np
+import zarr
+
+from cracknuts.trace.dtw import WARP_SUMMARY_COLUMNS, dtw_align_traces
+
+
+def test_dtw_align_traces(tmp_path, new_zarr_dataset):
+    path = str(tmp_path / "dtw.zarr")
+    trace_count, sample_count = 40, 600
+    reference = np.cumsum(np.random.default_rng(4).normal(0, 1, sample_count))
+    reference = (reference - reference.mean()) * 20
+
+    def make_trace(rng, index):
+        if index == 0:
+            return reference, None
+        # Smooth random warping of the time axis, like clock jitter.
+        warped_axis = np.arange(sample_count) + 10 * np.sin(np.arange(sample_count) / 80 + rng.uniform(0, 6))
+        return np.interp(warped_axis, np.arange(sample_count), reference) + rng.normal(0, 1, sample_count), None
+
+    ds = new_zarr_dataset(path, trace_count, sample_count, make_trace, seed=4)
+
+    summaries = dtw_align_traces(ds, "0", band=20, downsample_factor=4, chunk_size=16)
+    assert summaries.shape == (trace_count, len(WARP_SUMMARY_COLUMNS))
+    assert summaries[0, 2] == 0
+
+    aligned = zarr.open(path, mode="r")["aligned/0"]
+    origin_error = np.abs(ds.trace[0, :].astype(np.float64) - reference).mean()
+    aligned_error = np.abs(aligned["traces"][:].astype(np.float64) - reference).mean()
+    assert aligned_error < origin_error / 3
+    assert (aligned["warp_summary"][:] == summaries).all()
@@ -0,0 +1,39 @@
+import functools
+
+import numpy as np
+
+from cracknuts.analysis import CPA, CentralMoments, TTest
+from cracknuts.trace.executor import TileExecutor, concatenate_windows
+
+
+def test_tile_executor(tmp_path, new_aes_dataset):
+    ds = new_aes_dataset(tmp_path / "executor.zarr", 700, 90, label=True)
+    executor = TileExecutor(ds, "0", slice(50, None), trace_chunk_size=128, sample_window_size=40, max_workers=2)
+    assert len(executor.tiles) == 6 * 3
+    assert [window.stop for window in executor.sample_windows] == [40, 80, 90]
+
+    results = executor.run(functools.partial(CPA, byte_indexes=[0, 5]))
+    expected = CPA(byte_indexes=[0, 5]).run(ds, "0", slice(50, None))
+    correlation = concatenate_windows(results, lambda cpa: cpa.correlation())
+    assert np.allclose(correlation, expected.correlation())
+    assert results[0][1].trace_count == 650
+
+    results = executor.run(functools.partial(CentralMoments, 2), with_data=False)
+    traces = ds.trace[0, 50:].astype(np.float64)
+    assert np.allclose(concatenate_windows(results, lambda moments: moments.mean), traces.mean(axis=0))
+
+    serial = TileExecutor(ds, "0", trace_chunk_size=300, max_workers=1)
+    results = serial.run(functools.partial(TTest, 2), functools.partial(TTest.update_with_data, label_byte=0))
+    assert np.allclose(results[0][1].t(2), TTest(2).run(ds, "0").t(2))
+
+
+def test_tile_executor_default_tile_size(tmp_path, monkeypatch, new_aes_dataset):
+    ds = new_aes_dataset(tmp_path / "executor.zarr", 700, 90)
+    assert TileExecutor(ds, "0").sample_window_size == 90
+
+    monkeypatch.setattr(TileExecutor, "_TILE_SAMPLES", 7000)
+    executor = TileExecutor(ds, "0", max_workers=1)
+    assert executor.trace_chunk_size == 700 and executor.sample_window_size == 10
+    results = executor.run(functools.partial(CentralMoments, 2), with_data=False)
+    traces = ds.trace[0, :].astype(np.float64)
+    assert np.allclose(concatenate_windows(results, lambda moments: moments.mean), traces.mean(axis=0))
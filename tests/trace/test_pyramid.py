@@ -0,0 +1,50 @@
+import numpy as np
+
+from cracknuts.trace.downsample import minmax
+from cracknuts.trace.pyramid import MinMaxPyramid, build_pyramid
+
+
+def test_build_pyramid(tmp_path, new_zarr_dataset):
+    traces = np.random.default_rng(0).integers(-1000, 1000, (20, 5000), dtype=np.int16)
+    ds = new_zarr_dataset(tmp_path / "pyramid.zarr", 20, 5000, lambda _, i: (traces[i], None), trace_chunk_size=8)
+    assert MinMaxPyramid.open(ds, "0") is None
+
+    build_pyramid(ds)
+    pyramid = MinMaxPyramid.open(ds, "0")
+    assert pyramid.levels == [(2, 16), (3, 64), (4, 256), (5, 1024), (6, 4096)]
+    level_4 = ds.get_origin_data()["pyramid/0/4"]
+    assert level_4.shape == (20, 20, 2)
+    assert (level_4[3, -1] == [traces[3, 4864:].min(), traces[3, 4864:].max()]).all()
+
+    assert pyramid.select_level(0, 5000, 10) == (4, 256)
+    assert pyramid.select_level(100, 200, 10) is None
+    x, y = pyramid.minmax(7, 1024, 4032, 40)
+    assert len(x) >= 2 * 40 and x[0] == 1024
+    bins = np.searchsorted(np.unique(x), np.arange(1024, 4032), side="right") - 1
+    values = traces[7, 1024:4032]
+    assert (y[0::2] == [values[bins == b].max() for b in range(len(x) // 2)]).all()
+    assert (y[1::2] == [values[bins == b].min() for b in range(len(x) // 2)]).all()
+    _, expected = minmax(traces[7], 0, 5000, 5000 // 64)
+    assert np.array_equal(pyramid.minmax(7, 0, 5000, 5000 // 64)[1][: len(expected)], expected)
+
+    x_2d, y_2d = pyramid.minmax_2d([7, 2], 1024, 4032, 40)
+    assert np.array_equal(x_2d, x) and np.array_equal(y_2d[0], y)
+    assert np.array_equal(y_2d[1], pyramid.minmax(2, 1024, 4032, 40)[1])
+    assert np.array_equal(ds.get_trace_window("0", [7, 2], 1024, 4032), traces[[7, 2], 1024:4032])
+    assert ds.get_trace_window(0, slice(None), 4990).shape == (20, 10)
+    # Traces added after the pyramid was built are not covered, the caller falls back to the raw traces.
+    assert pyramid.minmax_2d([7, 20], 0, 5000, 10) is None
+
+
+def test_build_pyramid_chunks(tmp_path, new_zarr_dataset):
+    ramp = np.arange(5000, dtype=np.int16)
+    ds = new_zarr_dataset(tmp_path / "chunks.zarr", 8, 5000, lambda *_: (ramp, None), trace_chunk_size=8)
+    build_pyramid(ds, chunk_size=4, min_bin_size=4)
+    level = ds.get_origin_data()["pyramid/0/1"]
+    assert level.shape == (8, 1250, 2) and level.chunks == (4, 1250, 2)
+    build_pyramid(ds, chunk_size=1 << 20, min_bin_size=4)
+    level = ds.get_origin_data()["pyramid/0/1"]
+    assert level.chunks == (1 << 20, 2, 2)
+    x, y = MinMaxPyramid.open(ds).minmax(3, 1000, 1200, 10)
+    # Bins cover whole bins, the first one starts before the window.
+    assert x[0] == 1000 and y.max() == 1199 and y.min() == 1000 // 16 * 16
@@ -1,5 +1,8 @@
-from cracknuts.trace.trace import ZarrTraceDataset, NumpyTraceDataset, TraceDataset
+from cracknuts.trace.trace import ZarrTraceDataset, NumpyTraceDataset, TraceDataset, TraceIndexFilter
+import os
+
 import numpy as np
+import zarr
 
 channel_name = ['1', '2']
 trace_count = 100
@@ -70,4 +73,130 @@ def test_numpy_trace_dataset_data_slice():
     # print(ds.data[0,1:3][2].shape)
     s = slice(0, 1)
     print(ds.data_with_indices[s, 1:3][2].shape)
-    print(ds.data_with_indices[0, 1][2])
\ No newline at end of file
+    print(ds.data_with_indices[0, 1][2])
+
+
+def test_zarr_trace_dataset_chunk_buffer(tmp_path):
+    path = str(tmp_path / "chunk.zarr")
+    count = 25
+    traces = np.random.randint(low=-100, high=100, size=(count, sample_count), dtype=np.int16)
+    ds = ZarrTraceDataset.new(path, channel_name, count, sample_count, version, trace_chunk_size=10)
+    for i in range(count):
+        ds.set_trace(channel_name[0], i, traces[i], {"plaintext": bytes(data_length)})
+    ds.dump()
+
+    origin = ZarrTraceDataset.load(path).get_origin_data()
+    assert origin["0/0/traces"].chunks[0] == 10
+    assert (origin["0/0/traces"][:] == traces).all()
+
+
+def test_zarr_trace_dataset_read_while_writing(tmp_path):
+    path = str(tmp_path / "pending.zarr")
+    count = 4
+    traces = np.random.randint(low=-100, high=100, size=(count, sample_count), dtype=np.int16)
+    ds = ZarrTraceDataset.new(path, channel_name, None, sample_count, version, trace_chunk_size=10)
+    for i in range(3):
+        ds.set_trace(channel_name[0], i, traces[i], {"plaintext": bytes([i] * data_length)})
+
+    # The traces still held in the chunk buffer are visible before dump.
+    assert (ds.get_trace_window(channel_name[0], slice(0, 3)) == traces[:3]).all()
+    assert (ds.get_data_arrays(channel_name[0])["plaintext"][:, 0] == np.arange(3)).all()
+    _, traces_list = ds.get_traces_by_filters([TraceIndexFilter("0", "0", slice(0, 3))])
+    assert (traces_list[0] == traces[:3]).all()
+
+    # Writing continues into the partly flushed chunk.
+    ds.set_trace(channel_name[0], 3, traces[3], {"plaintext": bytes([3] * data_length)})
+    ds.dump()
+    assert (ZarrTraceDataset.load(path).get_trace_window(channel_name[0]) == traces).all()
+
+
+def test_zarr_trace_dataset_data_arrays(tmp_path):
+    path = str(tmp_path / "data.zarr")
+    count = 12
+    plaintext = np.random.randint(0, 256, size=(count, data_length), dtype=np.uint8)
+    extended = np.random.randint(0, 256, size=(count, 4), dtype=np.uint8)
+    ds = ZarrTraceDataset.new(path, channel_name, count, sample_count, version, trace_chunk_size=5)
+    for i in range(count):
+        trace = np.zeros(sample_count, dtype=np.int16)
+        ds.set_trace(channel_name[0], i, trace, {"plaintext": plaintext[i].tobytes(), "extended": extended[i].tobytes()})
+    ds.dump()
+
+    ds = ZarrTraceDataset.load(path)
+    arrays = ds.get_data_arrays(channel_name[0], slice(2, 9))
+    assert (arrays["plaintext"] == plaintext[2:9]).all()
+    assert (arrays["extended"] == extended[2:9]).all()
+    assert arrays["ciphertext"] is None
+    assert (ds.get_data_arrays(channel_name[0], [7, 1])["plaintext"] == plaintext[[7, 1]]).all()
+
+    data = ds.data[0, 3:6][0][1]
+    assert data["plaintext"] == plaintext[4].tobytes()
+    assert data["extend"] == extended[4].tobytes()
+
+
+def test_numpy_trace_dataset_memmap(tmp_path):
+    path = str(tmp_path / "npy")
+    count = 20
+    traces = np.random.randint(low=-100, high=100, size=(count, sample_count), dtype=np.int16)
+    ds = NumpyTraceDataset.new(path, channel_name, count, sample_count, version)
+    assert isinstance(ds.get_origin_data()[0], np.memmap)
+    for i in range(count):
+        ds.set_trace(channel_name[1], i, traces[i], {"extended": bytes([i])})
+    ds.dump()
+
+    ds = NumpyTraceDataset.load(path)
+    origin_traces = ds.get_origin_data()[0]
+    assert isinstance(origin_traces, np.memmap) and origin_traces.mode == "r"
+    assert (origin_traces[1] == traces).all()
+    assert ds.data[1, 5][0][0]["extended"] == bytes([5])
+
+
+def test_growable_trace_dataset(tmp_path):
+    count = 300
+    traces = np.random.randint(low=-100, high=100, size=(count, sample_count), dtype=np.int16)
+    for dataset_class, path in ((ZarrTraceDataset, "grow.zarr"), (NumpyTraceDataset, "grow.npy")):
+        path = str(tmp_path / path)
+        ds = dataset_class.new(path, channel_name, None, sample_count, version)
+        for i in range(count):
+            for c in channel_name:
+                ds.set_trace(c, i, traces[i], {"plaintext": bytes([i % 256] * data_length)})
+        ds.dump()
+        if dataset_class is NumpyTraceDataset:
+            assert np.load(os.path.join(path, "trace.npy")).shape == (len(channel_name), count, sample_count)
+
+        ds = dataset_class.load(path)
+        assert ds.trace_count == count
+        assert (np.asarray(ds.trace[1, :]).reshape(count, sample_count) == traces).all()
+        assert (ds.get_data_arrays(channel_name[1])["plaintext"][:, 0] == np.arange(count) % 256).all()
+
+
+def test_zarr_sample_stats(tmp_path):
+    rng = np.random.default_rng(0)
+    path = str(tmp_path / "stats.zarr")
+    traces = rng.normal(1000, 50, (300, 64)).astype(np.int16)
+    ds = ZarrTraceDataset.new(path, ["0", "1"], 0, 64, "test", trace_chunk_size=32, sample_stats=True)
+    for i, trace in enumerate(traces):
+        ds.set_trace("0", i, trace, None)
+        ds.set_trace("1", i, -trace, None)
+    # A rewritten trace is not counted twice.
+    ds.set_trace("0", 0, traces[0], None)
+    ds.dump()
+
+    ds = ZarrTraceDataset.load(path)
+    stats = ds.get_sample_stats("0")
+    assert stats["count"] == 300
+    assert np.allclose(stats["mean"], traces.mean(axis=0))
+    assert np.allclose(stats["variance"], traces.var(axis=0))
+    assert (stats["min"] == traces.min(axis=0)).all() and (stats["max"] == traces.max(axis=0)).all()
+    assert np.allclose(ds.get_sample_stats(1)["mean"], -traces.mean(axis=0))
+
+    plain_path = str(tmp_path / "plain.zarr")
+    ds = ZarrTraceDataset.new(plain_path, ["0"], 0, 64, "test")
+    ds.set_trace("0", 0, traces[0], None)
+    ds.dump()
+    assert ZarrTraceDataset.load(plain_path).get_sample_stats("0") is None
+
+    zarr.open_group(path, mode="a")["stats"].clear()
+    ds = ZarrTraceDataset.load(path)
+    assert ds.get_sample_stats("0") is None
+    ds.compute_sample_stats(chunk_size=70)
+    assert np.allclose(ds.get_sample_stats("0")["variance"], traces.var(axis=0))